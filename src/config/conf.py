@@ -1,5 +1,7 @@
 from functools import lru_cache
+from typing import Literal
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 
 
@@ -12,8 +14,84 @@ class Settings(BaseSettings):
     DATABASE_ENGINE_POOL_SIZE: int = 10
     DATABASE_ENGINE_MAX_OVERFLOW: int = 20
     DATABASE_ENGINE_POOL_PING: bool = True
+    # Prepared statements cached per asyncpg connection; 0 behind PgBouncer
+    # in transaction pooling mode
+    DATABASE_STATEMENT_CACHE_SIZE: int = 100
+    # Connections per database shared by all workers of src.serve
+    DATABASE_MAX_CONNECTIONS: int | None = None
+    DATABASE_REPLICA_URIS: list[str] = []
+    # Pool limits of replica engines; the primary's when unset
+    DATABASE_REPLICA_POOL_SIZE: int | None = None
+    DATABASE_REPLICA_MAX_OVERFLOW: int | None = None
+    DATABASE_REPLICA_SELECTION: Literal["round_robin", "least_connections"] = (
+        "round_robin"
+    )
+    DATABASE_REPLICA_EJECT_SECONDS: float = 30.0
+    DATABASE_REPLICA_FALLBACK_TO_PRIMARY: bool = True
     DEFAULT_DOMAIN: str = "http://localhost:8000"
     SHORT_URL_LENGTH: int = 6
+    SHORT_CODE_BLOCK_SIZE: int = 1000
+    SHORT_CODE_SALT: int = 0
+    SHORTEN_DEDUPLICATE: bool = False
+    BULK_SHORTEN_MAX_ITEMS: int = 10_000
+    BULK_INSERT_CHUNK_SIZE: int = 1000
+    STATS_MAX_BUCKETS: int = 2400
+    LINK_CACHE_MAX_SIZE: int = 100_000
+    LINK_CACHE_TTL: float = 300.0
+    LINK_CACHE_NEGATIVE_TTL: float = 30.0
+    SHARED_CACHE_URL: str | None = None
+    SHARED_CACHE_TTL: float = 3600.0
+    SHARED_CACHE_TIMEOUT: float = 0.1
+    LOOKUP_TIMEOUT: float = 5.0
+    LINK_FILTER_ENABLED: bool = True
+    LINK_FILTER_ERROR_RATE: float = 0.001
+    LINK_FILTER_MIN_CAPACITY: int = 1_000_000
+    LINK_SWEEP_INTERVAL: float = 60.0
+    LINK_SWEEP_BATCH_SIZE: int = 500
+    LINK_SWEEP_VISIT_BATCH_SIZE: int = 5000
+    LINK_SWEEP_GRACE: float = 86400.0
+    LINK_SWEEP_ARCHIVE: bool = False
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    ACCESS_LOG_SAMPLE_RATE: float = 1.0
+    ACCESS_LOG_REDIRECT_SAMPLE_RATE: float = 1.0
+    METRICS_ENABLED: bool = True
+    REDIRECT_FAST_PATH: bool = False
+    REDIRECT_STATUS: Literal[301, 302, 307, 308] = 307
+    REDIRECT_MAX_AGE: int = 0
+    REDIRECT_SNAPSHOT_PATH: str | None = None
+    REDIRECT_SNAPSHOT_RELOAD_INTERVAL: float = 10.0
+    STATS_MAX_AGE: int = 0
+    VISIT_FLUSH_INTERVAL: float = 1.0
+    VISIT_BATCH_SIZE: int = 500
+    VISIT_QUEUE_SIZE: int = 10_000
+    VISIT_QUEUE_POLICY: Literal["drop", "block"] = "drop"
+    VISIT_COPY_MIN_ROWS: int = 100
+    VISIT_PARTITIONS_AHEAD: int = 3
+    VISIT_PARTITIONS_INTERVAL: float = 3600.0
+    VISIT_RETENTION_MONTHS: int | None = None
+    UTM_CACHE_SIZE: int = 10_000
+    SERVER_HOST: str = "0.0.0.0"
+    SERVER_PORT: int = 8000
+    SERVER_WORKERS: int | None = None
+    SERVER_GRACEFUL_TIMEOUT: float = 30.0
+    STARTUP_WARM_POOL: bool = True
+    STARTUP_WARM_CACHE_SIZE: int = 0
+    CACHE_WARM_CHUNK_SIZE: int = 1000
+    CACHE_WARM_BROADCAST: bool = True
+    ADMIN_TOKEN: str | None = None
+
+    @model_validator(mode="after")
+    def check_sweep_grace(self) -> "Settings":
+        # Workers serve a cached link and queue its visits for up to this long
+        # after it expires; sweeping it sooner fails their visit batches
+        in_flight = self.LINK_CACHE_TTL + self.VISIT_FLUSH_INTERVAL
+        if self.LINK_SWEEP_GRACE < in_flight:
+            raise ValueError(
+                f"LINK_SWEEP_GRACE must be at least LINK_CACHE_TTL + "
+                f"VISIT_FLUSH_INTERVAL ({in_flight:g} seconds)"
+            )
+        return self
 
     class Config:
         env_file = ".env"
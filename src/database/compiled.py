@@ -0,0 +1,74 @@
+from typing import NamedTuple
+
+from sqlalchemy import CursorResult, Select
+from sqlalchemy.engine import Dialect
+from sqlalchemy.ext.asyncio import AsyncSession
+
+__all__ = ["PrecompiledQuery"]
+
+
+class PrecompiledQuery:
+    """Core statement compiled once per dialect and run as driver SQL.
+
+    Executing a statement normally costs a cache key computation and, through
+    the ORM session, a compile state on every call. Here the SQL string is
+    produced once and sent with ``exec_driver_sql``; on asyncpg it is then
+    prepared once per connection and found in the statement cache after.
+
+    ``first`` converts result columns with their types' processors, which
+    only some dialects need (e.g. datetimes stored as strings on SQLite).
+    """
+
+    def __init__(self, statement: Select):
+        self.statement = statement
+        self._compiled: dict[tuple[str, str], _Compiled] = {}
+
+    def compile(self, dialect: Dialect) -> tuple[str, list[str] | None]:
+        """SQL for ``dialect`` and the order of its positional parameters."""
+        compiled = self._compile(dialect)
+        return compiled.sql, compiled.names
+
+    def _compile(self, dialect: Dialect) -> "_Compiled":
+        key = (dialect.name, dialect.driver)
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            statement = self.statement.compile(dialect=dialect)
+            processors = [
+                column.type.dialect_impl(dialect).result_processor(dialect, None)
+                for column in self.statement.selected_columns
+            ]
+            compiled = self._compiled[key] = _Compiled(
+                str(statement),
+                list(statement.positiontup) if statement.positional else None,
+                processors if any(processors) else None,
+            )
+        return compiled
+
+    async def execute(self, session: AsyncSession, **params) -> CursorResult:
+        connection = await session.connection()
+        compiled = self._compile(connection.dialect)
+        return await connection.exec_driver_sql(compiled.sql, compiled.args(params))
+
+    async def first(self, session: AsyncSession, **params) -> tuple | None:
+        """First result row with its columns converted, or ``None``."""
+        connection = await session.connection()
+        compiled = self._compile(connection.dialect)
+        result = await connection.exec_driver_sql(compiled.sql, compiled.args(params))
+        row = result.first()
+        if row is None or compiled.processors is None:
+            return row
+        return tuple(
+            value if process is None or value is None else process(value)
+            for process, value in zip(compiled.processors, row, strict=True)
+        )
+
+
+class _Compiled(NamedTuple):
+    sql: str
+    names: list[str] | None
+    processors: list | None
+
+    def args(self, params: dict) -> tuple | dict:
+        if self.names is None:
+            return params
+        return tuple(params[name] for name in self.names)
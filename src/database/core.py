@@ -1,16 +1,49 @@
-from collections.abc import AsyncGenerator
+import time
+import uuid
+from collections.abc import AsyncGenerator, Callable
+from contextlib import asynccontextmanager
 
 from sqlalchemy.engine import make_url
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 from src.config.conf import settings
+from src.metrics import Gauge, Histogram
+
+POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a pooled connection (including opening new ones)",
+)
+
 
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waited."""
 
-def create_db_engine(connection_string: str):
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def create_db_engine(
+    connection_string: str,
+    pool_size: int | None = None,
+    max_overflow: int | None = None,
+):
     """Create a database engine with proper timeout settings.
 
     Args:
         connection_string: Database connection string
+        pool_size: Persistent connections, ``DATABASE_ENGINE_POOL_SIZE`` if unset
+        max_overflow: Extra connections, ``DATABASE_ENGINE_MAX_OVERFLOW`` if unset
     """
     url = make_url(connection_string)
 
@@ -21,16 +54,178 @@ def create_db_engine(connection_string: str):
         # Recycle connections after this many seconds
         "pool_recycle": settings.DATABASE_ENGINE_POOL_RECYCLE,
         # Maximum number of connections to keep in the pool
-        "pool_size": settings.DATABASE_ENGINE_POOL_SIZE,
+        "pool_size": (
+            settings.DATABASE_ENGINE_POOL_SIZE if pool_size is None else pool_size
+        ),
         # Maximum overflow connections allowed beyond pool_size
-        "max_overflow": settings.DATABASE_ENGINE_MAX_OVERFLOW,
+        "max_overflow": (
+            settings.DATABASE_ENGINE_MAX_OVERFLOW
+            if max_overflow is None
+            else max_overflow
+        ),
         # Connection pre-ping to verify connection is still alive
         "pool_pre_ping": settings.DATABASE_ENGINE_POOL_PING,
     }
-    return create_async_engine(url, **timeout_kwargs)
+    connect_args = {}
+    if url.get_driver_name() == "asyncpg":
+        connect_args = asyncpg_connect_args(settings.DATABASE_STATEMENT_CACHE_SIZE)
+    return create_async_engine(
+        url,
+        poolclass=InstrumentedQueuePool,
+        connect_args=connect_args,
+        **timeout_kwargs,
+    )
+
+
+def asyncpg_connect_args(statement_cache_size: int) -> dict:
+    """Prepared statement caching of asyncpg connections.
+
+    With ``0`` (PgBouncer in transaction pooling mode, where consecutive
+    statements may reach different server connections) nothing is cached and
+    statements get unique names, so they cannot clash with ones left on a
+    server connection by another client.
+    """
+    args = {
+        # SQLAlchemy's cache of prepared statements
+        "prepared_statement_cache_size": statement_cache_size,
+        # asyncpg's own cache, used by its query methods
+        "statement_cache_size": statement_cache_size,
+    }
+    if statement_cache_size == 0:
+        args["prepared_statement_name_func"] = lambda: f"__asyncpg_{uuid.uuid4()}__"
+    return args
+
+
+POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out", "Connections currently checked out", ["database"]
+)
+POOL_SIZE = Gauge(
+    "db_pool_size", "Connections currently held by the pool", ["database"]
+)
+POOL_SATURATION = Gauge(
+    "db_pool_saturation",
+    "Checked out connections as a fraction of pool_size + max_overflow",
+    ["database"],
+)
+
+
+def register_pool_metrics(engine: AsyncEngine, name: str) -> None:
+    """Expose pool usage of ``engine``, read at scrape time."""
+    pool = engine.pool
+    capacity = (
+        settings.DATABASE_ENGINE_POOL_SIZE + settings.DATABASE_ENGINE_MAX_OVERFLOW
+    )
+    POOL_CHECKED_OUT.labels(name).set_function(pool.checkedout)
+    POOL_SIZE.labels(name).set_function(lambda: pool.checkedin() + pool.checkedout())
+    POOL_SATURATION.labels(name).set_function(
+        lambda: pool.checkedout() / capacity if capacity else 0.0
+    )
+
+
+class ReplicaSet:
+    """Read replicas with round-robin or least-connections selection.
+
+    A replica that fails with a connection error is ejected for
+    ``eject_seconds`` and then tried again.
+    """
+
+    def __init__(
+        self,
+        engines: list[AsyncEngine],
+        selection: str = settings.DATABASE_REPLICA_SELECTION,
+        eject_seconds: float = settings.DATABASE_REPLICA_EJECT_SECONDS,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if selection not in ("round_robin", "least_connections"):
+            raise ValueError(f"Unknown replica selection: {selection}")
+        self.engines = engines
+        self.selection = selection
+        self.eject_seconds = eject_seconds
+        self.clock = clock
+        self._ejected_until: dict[AsyncEngine, float] = {}
+        self._next = 0
+
+    def healthy(self) -> list[AsyncEngine]:
+        now = self.clock()
+        return [
+            engine
+            for engine in self.engines
+            if self._ejected_until.get(engine, 0.0) <= now
+        ]
+
+    def choose(self) -> AsyncEngine | None:
+        """Pick a healthy replica, or ``None`` when every replica is ejected."""
+        healthy = self.healthy()
+        if not healthy:
+            return None
+        if self.selection == "least_connections":
+            return min(healthy, key=lambda engine: engine.pool.checkedout())
+        engine = healthy[self._next % len(healthy)]
+        self._next += 1
+        return engine
+
+    def eject(self, engine: AsyncEngine) -> None:
+        self._ejected_until[engine] = self.clock() + self.eject_seconds
+
+
+class DatabaseRouter:
+    """Routes writes to the primary and reads to a healthy replica.
+
+    Read sessions opened on a replica carry ``info["primary_fallback"]``, a
+    factory for a primary session, so callers can retry a lookup that missed
+    because the replica has not caught up with a freshly written row yet.
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession],
+        replicas: ReplicaSet | None = None,
+        fallback_to_primary: bool = settings.DATABASE_REPLICA_FALLBACK_TO_PRIMARY,
+    ):
+        self.sessionmaker = sessionmaker
+        self.replicas = replicas
+        self.fallback_to_primary = fallback_to_primary
+
+    def write_session(self) -> AsyncSession:
+        return self.sessionmaker()
+
+    def read_session(self) -> AsyncSession:
+        replica = self.replicas.choose() if self.replicas else None
+        if replica is None:
+            return self.sessionmaker()
+        session = self.sessionmaker(bind=replica)
+        session.info["replica"] = replica
+        if self.fallback_to_primary:
+            session.info["primary_fallback"] = self.write_session
+        return session
+
+    def report_failure(self, session: AsyncSession, error: Exception) -> None:
+        replica = session.info.get("replica")
+        if replica is not None and self.replicas and _is_connection_error(error):
+            self.replicas.eject(replica)
+
+
+def _is_connection_error(error: Exception) -> bool:
+    if isinstance(error, DBAPIError):
+        return error.connection_invalidated or isinstance(
+            error, OperationalError | InterfaceError
+        )
+    return isinstance(error, OSError)
 
 
 engine = create_db_engine(settings.DATABASE_URI)
+register_pool_metrics(engine, "primary")
+
+replica_engines = [
+    create_db_engine(
+        uri,
+        settings.DATABASE_REPLICA_POOL_SIZE,
+        settings.DATABASE_REPLICA_MAX_OVERFLOW,
+    )
+    for uri in settings.DATABASE_REPLICA_URIS
+]
+for index, replica_engine in enumerate(replica_engines):
+    register_pool_metrics(replica_engine, f"replica{index}")
 
 SessionLocal = async_sessionmaker(
     engine,
@@ -39,13 +234,38 @@ SessionLocal = async_sessionmaker(
     expire_on_commit=False,
 )
 
+DATABASE = DatabaseRouter(
+    SessionLocal, ReplicaSet(replica_engines) if replica_engines else None
+)
+
+
+async def dispose_engines() -> None:
+    """Close every pooled connection; called on shutdown."""
+    for pooled_engine in (engine, *replica_engines):
+        await pooled_engine.dispose()
 
-async def get_session() -> AsyncGenerator[AsyncSession]:
-    session = SessionLocal()
+
+@asynccontextmanager
+async def session_scope(session: AsyncSession) -> AsyncGenerator[AsyncSession]:
     try:
         yield session
     except Exception as e:
+        DATABASE.report_failure(session, e)
         await session.rollback()
         raise e
     finally:
         await session.close()
+
+
+async def get_write_session() -> AsyncGenerator[AsyncSession]:
+    async with session_scope(DATABASE.write_session()) as session:
+        yield session
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession]:
+    async with session_scope(DATABASE.read_session()) as session:
+        yield session
+
+
+# Sessions on the primary; kept for callers that predate the read/write split
+get_session = get_write_session
@@ -0,0 +1,159 @@
+import re
+from dataclasses import dataclass, field
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from src.logger import logger
+
+__all__ = [
+    "PartitionReport",
+    "add_months",
+    "is_partition_name",
+    "maintain_partitions",
+    "month_start",
+    "partition_name",
+]
+
+# Monthly partitions are named after their parent, e.g. ``visit_p2026_10``
+_PARTITION_NAME = re.compile(r"^(?P<table>\w+)_p(?P<year>\d{4})_(?P<month>\d{2})$")
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """First day of the month ``months`` after ``month`` (may be negative)."""
+    index = month.year * 12 + month.month - 1 + months
+    return month_start(month).replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y_%m}"
+
+
+def is_partition_name(name: str) -> bool:
+    return _PARTITION_NAME.match(name) is not None
+
+
+def _partition_month(table: str, name: str) -> datetime | None:
+    match = _PARTITION_NAME.match(name)
+    if match is None or match["table"] != table:
+        return None
+    return datetime(int(match["year"]), int(match["month"]), 1)
+
+
+@dataclass
+class PartitionReport:
+    partitioned: bool
+    created: list[str] = field(default_factory=list)
+    detached: list[str] = field(default_factory=list)
+    dropped: list[str] = field(default_factory=list)
+    deleted: int = 0
+
+
+async def _is_partitioned(conn: AsyncConnection, table: str) -> bool:
+    result = await conn.execute(
+        text(
+            "SELECT 1 FROM pg_partitioned_table pt "
+            "JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = :table AND pg_table_is_visible(c.oid)"
+        ),
+        {"table": table},
+    )
+    return result.first() is not None
+
+
+async def _list_partitions(conn: AsyncConnection, table: str) -> dict[datetime, str]:
+    result = await conn.execute(
+        text(
+            "SELECT child.relname FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)"
+        ),
+        {"table": table},
+    )
+    partitions = {}
+    for (name,) in result:
+        month = _partition_month(table, name)
+        if month is not None:
+            partitions[month] = name
+    return partitions
+
+
+async def maintain_partitions(
+    engine: AsyncEngine,
+    table: str,
+    column: str,
+    ahead: int,
+    retention: int | None = None,
+    keep_detached: bool = False,
+    now: datetime | None = None,
+) -> PartitionReport:
+    """Pre-create future monthly partitions of ``table`` and purge old ones.
+
+    Partitions for the current month and the ``ahead`` following ones are
+    created if missing. With ``retention`` set, every partition holding only
+    rows from before the current month minus ``retention`` months is
+    detached and, unless ``keep_detached``, dropped: the purge costs one
+    catalog change instead of a ``DELETE`` and the vacuum that follows.
+
+    Tables that are not partitioned (SQLite, or PostgreSQL before the
+    partitioning migration) fall back to deleting the expired rows.
+    """
+    current = month_start(now or datetime.now())
+    cutoff = add_months(current, -retention) if retention is not None else None
+
+    async with engine.begin() as conn:
+        quote = conn.dialect.identifier_preparer.quote
+        partitioned = conn.dialect.name == "postgresql" and await _is_partitioned(
+            conn, table
+        )
+        report = PartitionReport(partitioned=partitioned)
+
+        if not partitioned:
+            if cutoff is not None:
+                result = await conn.execute(
+                    text(f"DELETE FROM {quote(table)} WHERE {quote(column)} < :cutoff"),
+                    {"cutoff": cutoff},
+                )
+                report.deleted = result.rowcount
+            return report
+
+        existing = await _list_partitions(conn, table)
+        for offset in range(ahead + 1):
+            month = add_months(current, offset)
+            if month in existing:
+                continue
+            name = partition_name(table, month)
+            await conn.execute(
+                text(
+                    f"CREATE TABLE IF NOT EXISTS {quote(name)} "
+                    f"PARTITION OF {quote(table)} FOR VALUES "
+                    f"FROM ('{month.isoformat()}') "
+                    f"TO ('{add_months(month, 1).isoformat()}')"
+                )
+            )
+            report.created.append(name)
+
+        if cutoff is not None:
+            for month, name in sorted(existing.items()):
+                if add_months(month, 1) > cutoff:
+                    break
+                await conn.execute(
+                    text(f"ALTER TABLE {quote(table)} DETACH PARTITION {quote(name)}")
+                )
+                report.detached.append(name)
+                if not keep_detached:
+                    await conn.execute(text(f"DROP TABLE {quote(name)}"))
+                    report.dropped.append(name)
+
+    if report.created or report.detached:
+        logger.info(
+            f"Partitions of {table}: created {report.created}, "
+            f"detached {report.detached}, dropped {report.dropped}"
+        )
+    return report
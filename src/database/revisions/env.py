@@ -15,10 +15,17 @@ if config.config_file_name is not None:
 # Import all models to ensure they are registered with SQLModel
 from src.link.models import *  # noqa
 from sqlmodel import SQLModel  # noqa
+from src.database.partitions import is_partition_name  # noqa
 
 # Set target metadata for autogenerate support
 target_metadata = SQLModel.metadata
 
+
+def include_object(obj, name, type_, reflected, compare_to):
+    """Leave monthly partitions (``visit_p2026_10``, ...) out of autogenerate."""
+    return not (type_ == "table" and compare_to is None and is_partition_name(name))
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -42,6 +49,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -64,7 +72,11 @@ def run_migrations_online() -> None:
     )
 
     with connectable.connect() as connection:
-        context.configure(connection=connection, target_metadata=target_metadata)
+        context.configure(
+            connection=connection,
+            target_metadata=target_metadata,
+            include_object=include_object,
+        )
 
         with context.begin_transaction():
             context.run_migrations()
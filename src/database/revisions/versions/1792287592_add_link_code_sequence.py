@@ -0,0 +1,28 @@
+"""add link code sequence
+
+Revision ID: 584cc9102c59
+Revises: 6949506d5fdb
+Create Date: 2026-10-18 01:39:53.012742
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "584cc9102c59"
+down_revision: str | Sequence[str] | None = "6949506d5fdb"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(sa.schema.CreateSequence(sa.Sequence("link_code_seq", start=1)))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute(sa.schema.DropSequence(sa.Sequence("link_code_seq")))
@@ -0,0 +1,30 @@
+"""add link target hash
+
+Revision ID: 5103377aeab3
+Revises: 584cc9102c59
+Create Date: 2026-10-18 01:42:38.356300
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5103377aeab3"
+down_revision: str | Sequence[str] | None = "584cc9102c59"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("link", sa.Column("target_hash", sa.LargeBinary(), nullable=True))
+    op.create_index(op.f("ix_link_target_hash"), "link", ["target_hash"], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_link_target_hash"), table_name="link")
+    op.drop_column("link", "target_hash")
@@ -0,0 +1,53 @@
+"""add visit rollup and visit (link_id, visited_at) index
+
+Revision ID: e1020884f13e
+Revises: 5103377aeab3
+Create Date: 2026-10-18 02:02:50.224281
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1020884f13e"
+down_revision: str | Sequence[str] | None = "5103377aeab3"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_visit_link_id_visited_at", "visit", ["link_id", "visited_at"], unique=False
+    )
+    op.create_table(
+        "visit_rollup",
+        sa.Column("link_id", sa.Integer(), nullable=False),
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["link_id"], ["link.id"]),
+        sa.PrimaryKeyConstraint("link_id", "bucket"),
+    )
+    # Backfill from the visits recorded so far
+    if op.get_bind().dialect.name == "postgresql":
+        bucket = "date_trunc('hour', visited_at)"
+    else:
+        # SQLite stores datetimes as text in SQLAlchemy's format
+        bucket = "strftime('%Y-%m-%d %H:00:00.000000', visited_at)"
+    op.execute(
+        f"""
+        INSERT INTO visit_rollup (link_id, bucket, count)
+        SELECT link_id, {bucket}, count(*)
+        FROM visit
+        GROUP BY link_id, {bucket}
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("visit_rollup")
+    op.drop_index("ix_visit_link_id_visited_at", table_name="visit")
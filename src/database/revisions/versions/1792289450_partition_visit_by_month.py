@@ -0,0 +1,119 @@
+"""partition visit by visited_at month
+
+Revision ID: 7c41d2a9b5e0
+Revises: e1020884f13e
+Create Date: 2026-10-18 04:10:50.118342
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c41d2a9b5e0"
+down_revision: str | Sequence[str] | None = "e1020884f13e"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# Months of empty partitions created ahead of the current one; afterwards
+# ``python src/manage.py partitions`` keeps them coming
+PARTITIONS_AHEAD = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        # Declarative partitioning is PostgreSQL only; other databases keep
+        # the plain table and ``manage.py partitions`` deletes expired rows
+        return
+
+    op.execute("ALTER TABLE visit RENAME TO visit_unpartitioned")
+    op.execute("ALTER INDEX visit_pkey RENAME TO visit_unpartitioned_pkey")
+    op.execute(
+        "ALTER INDEX ix_visit_link_id_visited_at "
+        "RENAME TO ix_visit_unpartitioned_link_id_visited_at"
+    )
+    # The partition key has to be part of the primary key; ids stay unique
+    # since they still come from visit_id_seq
+    op.execute(
+        """
+        CREATE TABLE visit (
+            id INTEGER NOT NULL DEFAULT nextval('visit_id_seq'),
+            link_id INTEGER NOT NULL REFERENCES link (id),
+            utm VARCHAR,
+            visited_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            PRIMARY KEY (id, visited_at)
+        ) PARTITION BY RANGE (visited_at)
+        """
+    )
+    # Before the old table is dropped, or the sequence goes with it
+    op.execute("ALTER SEQUENCE visit_id_seq OWNED BY visit.id")
+    op.execute(
+        "CREATE INDEX ix_visit_link_id_visited_at ON visit (link_id, visited_at)"
+    )
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            month timestamp;
+            last timestamp;
+        BEGIN
+            SELECT
+                date_trunc('month', coalesce(min(visited_at), now()::timestamp)),
+                greatest(
+                    date_trunc('month', max(visited_at)),
+                    date_trunc('month', now()::timestamp)
+                        + interval '{PARTITIONS_AHEAD} months'
+                )
+            INTO month, last FROM visit_unpartitioned;
+            WHILE month <= last LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF visit FOR VALUES FROM (%L) TO (%L)',
+                    'visit_p' || to_char(month, 'YYYY_MM'),
+                    month,
+                    month + interval '1 month'
+                );
+                month := month + interval '1 month';
+            END LOOP;
+        END $$
+        """
+    )
+    op.execute(
+        "INSERT INTO visit (id, link_id, utm, visited_at) "
+        "SELECT id, link_id, utm, visited_at FROM visit_unpartitioned"
+    )
+    op.execute("DROP TABLE visit_unpartitioned")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE visit RENAME TO visit_partitioned")
+    op.execute(
+        "ALTER INDEX ix_visit_link_id_visited_at "
+        "RENAME TO ix_visit_partitioned_link_id_visited_at"
+    )
+    op.execute(
+        """
+        CREATE TABLE visit (
+            id INTEGER NOT NULL DEFAULT nextval('visit_id_seq'),
+            link_id INTEGER NOT NULL REFERENCES link (id),
+            utm VARCHAR,
+            visited_at TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+            CONSTRAINT visit_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE visit_id_seq OWNED BY visit.id")
+    op.execute(
+        "CREATE INDEX ix_visit_link_id_visited_at ON visit (link_id, visited_at)"
+    )
+    op.execute(
+        "INSERT INTO visit (id, link_id, utm, visited_at) "
+        "SELECT id, link_id, utm, visited_at FROM visit_partitioned"
+    )
+    # Drops every partition with it
+    op.execute("DROP TABLE visit_partitioned")
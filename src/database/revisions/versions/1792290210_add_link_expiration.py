@@ -0,0 +1,59 @@
+"""add link expiration and link archive
+
+Revision ID: 3f6b8d0c2a71
+Revises: 7c41d2a9b5e0
+Create Date: 2026-10-18 02:23:30.118402
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "3f6b8d0c2a71"
+down_revision: str | Sequence[str] | None = "7c41d2a9b5e0"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("link", sa.Column("expires_at", sa.DateTime(), nullable=True))
+    op.add_column("link", sa.Column("max_visits", sa.Integer(), nullable=True))
+    op.create_index(
+        "ix_link_expires_at",
+        "link",
+        ["expires_at"],
+        unique=False,
+        postgresql_where=sa.text("expires_at IS NOT NULL"),
+    )
+    op.create_table(
+        "link_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("target", sa.String(), nullable=False),
+        sa.Column("code", sa.String(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(), nullable=False),
+        sa.Column("max_visits", sa.Integer(), nullable=True),
+        sa.Column("visits_count", sa.Integer(), nullable=True),
+        sa.Column("archived_at", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_link_archive_code"), "link_archive", ["code"], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f("ix_link_archive_code"), table_name="link_archive")
+    op.drop_table("link_archive")
+    op.drop_index(
+        "ix_link_expires_at",
+        table_name="link",
+        postgresql_where=sa.text("expires_at IS NOT NULL"),
+    )
+    op.drop_column("link", "max_visits")
+    op.drop_column("link", "expires_at")
@@ -0,0 +1,60 @@
+"""add utm sets and utm visit rollup
+
+Revision ID: 9a4e1c7d5b23
+Revises: 3f6b8d0c2a71
+Create Date: 2026-10-18 02:36:15.482907
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9a4e1c7d5b23"
+down_revision: str | Sequence[str] | None = "3f6b8d0c2a71"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "utm_set",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("hash", sa.LargeBinary(), nullable=False),
+        sa.Column("source", sa.String(), nullable=True),
+        sa.Column("medium", sa.String(), nullable=True),
+        sa.Column("campaign", sa.String(), nullable=True),
+        sa.Column("term", sa.String(), nullable=True),
+        sa.Column("content", sa.String(), nullable=True),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(op.f("ix_utm_set_hash"), "utm_set", ["hash"], unique=True)
+    op.create_table(
+        "visit_utm_rollup",
+        sa.Column("link_id", sa.Integer(), nullable=False),
+        sa.Column("bucket", sa.DateTime(), nullable=False),
+        sa.Column("utm_set_id", sa.Integer(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(["link_id"], ["link.id"]),
+        sa.ForeignKeyConstraint(["utm_set_id"], ["utm_set.id"]),
+        sa.PrimaryKeyConstraint("link_id", "bucket", "utm_set_id"),
+    )
+    # The raw query strings were never recorded, there is nothing to convert
+    op.add_column("visit", sa.Column("utm_set_id", sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        "visit_utm_set_id_fkey", "visit", "utm_set", ["utm_set_id"], ["id"]
+    )
+    op.drop_column("visit", "utm")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column("visit", sa.Column("utm", sa.String(), nullable=True))
+    op.drop_constraint("visit_utm_set_id_fkey", "visit", type_="foreignkey")
+    op.drop_column("visit", "utm_set_id")
+    op.drop_table("visit_utm_rollup")
+    op.drop_index(op.f("ix_utm_set_hash"), table_name="utm_set")
+    op.drop_table("utm_set")
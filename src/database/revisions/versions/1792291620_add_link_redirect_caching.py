@@ -0,0 +1,32 @@
+"""add link redirect settings and last visit time
+
+Revision ID: b58d2f0e6c94
+Revises: 9a4e1c7d5b23
+Create Date: 2026-10-18 02:47:00.903516
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "b58d2f0e6c94"
+down_revision: str | Sequence[str] | None = "9a4e1c7d5b23"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("link", sa.Column("redirect_status", sa.Integer(), nullable=True))
+    op.add_column("link", sa.Column("redirect_max_age", sa.Integer(), nullable=True))
+    op.add_column("link", sa.Column("last_visit_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("link", "last_visit_at")
+    op.drop_column("link", "redirect_max_age")
+    op.drop_column("link", "redirect_status")
@@ -0,0 +1,129 @@
+from functools import lru_cache
+from types import SimpleNamespace
+from urllib.parse import quote
+
+from src.database.core import DATABASE, DatabaseRouter, session_scope
+from src.http_cache import cache_control_header
+from src.link.cache import MISSING
+from src.link.recorder import VISIT_RECORDER, VisitRecorder
+from src.link.service import SHORTENER_SERVICE, ShortenerService
+from src.link.utm import parse_utm
+from src.routers import redirect_to_url
+
+__all__ = ["RedirectFastPath"]
+
+# Lets the access log and metrics middlewares label fast path requests like
+# requests served by the FastAPI redirect route.
+FAST_PATH_ROUTE = SimpleNamespace(path="/{short_code}")
+
+NOT_FOUND_BODY = b'{"detail":"Link not found"}'
+NOT_FOUND_START = {
+    "type": "http.response.start",
+    "status": 404,
+    "headers": [
+        (b"content-length", str(len(NOT_FOUND_BODY)).encode()),
+        (b"content-type", b"application/json"),
+    ],
+}
+NOT_FOUND_BODY_MESSAGE = {"type": "http.response.body", "body": NOT_FOUND_BODY}
+GONE_BODY = b'{"detail":"Link expired"}'
+GONE_START = {
+    "type": "http.response.start",
+    "status": 410,
+    "headers": [
+        (b"content-length", str(len(GONE_BODY)).encode()),
+        (b"content-type", b"application/json"),
+    ],
+}
+GONE_BODY_MESSAGE = {"type": "http.response.body", "body": GONE_BODY}
+EMPTY_BODY_MESSAGE = {"type": "http.response.body", "body": b""}
+CONTENT_LENGTH_ZERO = (b"content-length", b"0")
+
+
+@lru_cache(maxsize=65536)
+def location_header(target: str) -> tuple[bytes, bytes]:
+    # Same escaping as starlette's RedirectResponse
+    return (b"location", quote(target, safe=":/%#?=@[]!$&'()*+,;").encode("latin-1"))
+
+
+class RedirectFastPath:
+    """Raw ASGI handler for ``GET /{short_code}`` ahead of FastAPI routing.
+
+    Skips routing, dependency injection and response objects: the code is
+    resolved through the redirect snapshot and the lookup cache, a database
+    session is only opened when both miss, and the redirect is written from
+    pre-encoded header bytes.
+    Everything else, including paths of static FastAPI routes such as
+    ``/metrics``, is passed to ``app`` unchanged.
+    """
+
+    def __init__(
+        self,
+        app,
+        routes: list,
+        service: ShortenerService = SHORTENER_SERVICE,
+        recorder: VisitRecorder = VISIT_RECORDER,
+        database: DatabaseRouter = DATABASE,
+    ):
+        self.app = app
+        self.routes = routes
+        self.service = service
+        self.recorder = recorder
+        self.database = database
+        self._static_paths: frozenset[str] | None = None
+
+    def _is_static(self, path: str) -> bool:
+        # Collected on first use so routes added after the middleware count
+        if self._static_paths is None:
+            self._static_paths = frozenset(
+                route.path for route in self.routes if "{" not in route.path
+            )
+        return path in self._static_paths
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or path.count("/") != 1
+            or len(path) < 2
+            or self._is_static(path)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        scope["route"] = FAST_PATH_ROUTE
+        scope["endpoint"] = redirect_to_url
+        code = path[1:]
+        service = self.service
+        snapshot = service.snapshot
+        link = snapshot.get(code) if snapshot is not None else None
+        if link is None:
+            link = service.cache.get(code)
+            if link is MISSING:
+                async with session_scope(self.database.read_session()) as session:
+                    link = await service.load_target(code, session)
+
+        if link is None:
+            await send(NOT_FOUND_START)
+            await send(NOT_FOUND_BODY_MESSAGE)
+            return
+        if link.expired():
+            await send(GONE_START)
+            await send(GONE_BODY_MESSAGE)
+            return
+
+        await self.recorder.record(link.id, parse_utm(scope.get("query_string", b"")))
+        status, max_age = service.redirect_policy(link)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [
+                    CONTENT_LENGTH_ZERO,
+                    location_header(link.target),
+                    cache_control_header(max_age),
+                ],
+            }
+        )
+        await send(EMPTY_BODY_MESSAGE)
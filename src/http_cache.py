@@ -0,0 +1,119 @@
+import hashlib
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+from functools import lru_cache
+
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+
+__all__ = [
+    "REDIRECT_STATUSES",
+    "cache_control",
+    "cache_control_header",
+    "conditional_json",
+    "etag",
+    "http_date",
+    "last_modified_second",
+    "not_modified",
+]
+
+REDIRECT_STATUSES = (301, 302, 307, 308)
+
+
+def cache_control(max_age: int, revalidate: bool = False) -> str:
+    """``Cache-Control`` letting any cache reuse a response ``max_age`` seconds.
+
+    Without a max-age, a response that can be ``revalidate``-d may be stored
+    but must be checked with us before every reuse; any other must not be
+    stored at all, so each request reaches the application.
+    """
+    if max_age > 0:
+        return f"public, max-age={max_age}"
+    return "no-cache" if revalidate else "no-store"
+
+
+@lru_cache(maxsize=1024)
+def cache_control_header(max_age: int) -> tuple[bytes, bytes]:
+    # Pre-encoded for the redirect fast path
+    return (b"cache-control", cache_control(max_age).encode())
+
+
+def etag(body: bytes) -> str:
+    """Strong validator: responses with the same bytes get the same tag."""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def http_date(moment: datetime) -> str:
+    # Naive datetimes are local times, as stored in the database
+    return format_datetime(moment.astimezone(UTC).replace(microsecond=0), usegmt=True)
+
+
+def last_modified_second(moment: datetime) -> datetime:
+    """``moment`` in UTC, rounded up to the whole second HTTP dates carry.
+
+    Rounding down would date later changes in the same second before the
+    validator, so a client holding it would be wrongly answered 304.
+    """
+    moment = moment.astimezone(UTC)
+    if moment.microsecond:
+        moment += timedelta(microseconds=1_000_000 - moment.microsecond)
+    return moment
+
+
+def not_modified(
+    headers: Headers, tag: str, last_modified: datetime | None = None
+) -> bool:
+    """Whether a conditional ``GET`` can be answered with 304 (RFC 9110 13.2.2).
+
+    ``If-None-Match`` takes precedence; ``If-Modified-Since`` is only used
+    without it, and only when ``last_modified`` is given.
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        # Weak comparison, as the RFC requires for If-None-Match
+        tags = {
+            candidate.strip().removeprefix("W/")
+            for candidate in if_none_match.split(",")
+        }
+        return "*" in tags or tag in tags
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=UTC)
+    return last_modified_second(last_modified) <= since
+
+
+def conditional_json(
+    headers: Headers,
+    content,
+    max_age: int,
+    last_modified: datetime | None = None,
+) -> Response:
+    """``JSONResponse`` of ``content`` with validators, or a 304 without a body.
+
+    The ``ETag`` is derived from the serialized body, so it changes exactly
+    when the response does; pass ``last_modified`` only when it bounds every
+    change of ``content``. No ``Last-Modified`` is sent while its second is
+    not over, since the content may still change within it.
+    """
+    if last_modified is not None and last_modified_second(last_modified) > datetime.now(
+        UTC
+    ):
+        last_modified = None
+    response = JSONResponse(content=content)
+    tag = etag(response.body)
+    validators = {
+        "etag": tag,
+        "cache-control": cache_control(max_age, revalidate=True),
+    }
+    if last_modified is not None:
+        validators["last-modified"] = http_date(last_modified_second(last_modified))
+    if not_modified(headers, tag, last_modified):
+        return Response(status_code=304, headers=validators)
+    response.headers.update(validators)
+    return response
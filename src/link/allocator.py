@@ -0,0 +1,65 @@
+import asyncio
+from collections import deque
+from collections.abc import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.conf import settings
+
+from .codec import ShortCodeCodec
+from .repo import LinkRepo
+
+__all__ = ["CodeAllocator"]
+
+
+class CodeAllocator:
+    """Hands out collision-free short codes from pre-reserved sequence blocks.
+
+    Each worker leases ``block_size`` values of ``link_code_seq`` at a time
+    and encodes them with ``ShortCodeCodec``. Sequence values are never
+    handed out twice, so these codes never collide with each other. Links
+    created before the sequence existed have random codes that may equal
+    an encoded value, so every leased block is checked against ``link`` in
+    one query and taken codes are skipped: two queries per block instead of
+    one per code.
+    """
+
+    def __init__(
+        self,
+        codec: ShortCodeCodec | None = None,
+        block_size: int = settings.SHORT_CODE_BLOCK_SIZE,
+        reserve: Callable[[int, AsyncSession], Awaitable[list[int]]] = (
+            LinkRepo.reserve_code_ids
+        ),
+        taken: Callable[[list[str], AsyncSession], Awaitable[set[str]]] = (
+            LinkRepo.get_existing_codes
+        ),
+    ):
+        self.codec = codec or ShortCodeCodec(
+            settings.SHORT_URL_LENGTH, settings.SHORT_CODE_SALT
+        )
+        self.block_size = block_size
+        self.reserve = reserve
+        self.taken = taken
+        self.skipped = 0
+        self._codes: deque[str] = deque()
+        self._lock = asyncio.Lock()
+
+    @property
+    def remaining(self) -> int:
+        return len(self._codes)
+
+    async def allocate(self, session: AsyncSession) -> str:
+        return (await self.allocate_many(1, session))[0]
+
+    async def allocate_many(self, count: int, session: AsyncSession) -> list[str]:
+        async with self._lock:
+            while len(self._codes) < count:
+                needed = max(self.block_size, count - len(self._codes))
+                codes = self.codec.encode_many(await self.reserve(needed, session))
+                taken = await self.taken(codes, session)
+                if taken:
+                    self.skipped += len(taken)
+                    codes = [code for code in codes if code not in taken]
+                self._codes.extend(codes)
+            return [self._codes.popleft() for _ in range(count)]
@@ -1,11 +1,33 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+import secrets
+from dataclasses import asdict
+from datetime import datetime, timedelta
+from typing import Literal
+from urllib.parse import urlsplit
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.core import get_session
-from src.link.service import SHORTENER_SERVICE
+from src.config.conf import settings
+from src.database.core import get_read_session, get_write_session
+from src.http_cache import conditional_json
+from src.link.service import SERIES_STEPS, SHORTENER_SERVICE
+from src.warmup import broadcast_warm_request, warm_cache
+
+from .schemas import (
+    BulkShortenedUrl,
+    BulkShortenedUrls,
+    BulkTargetUrls,
+    CacheWarmRequest,
+    CacheWarmResult,
+    ShortenedUrl,
+    TargetUrl,
+    UrlStats,
+    UtmCount,
+    VisitBucket,
+)
 
-from .schemas import ShortenedUrl, TargetUrl, UrlStats
+DEFAULT_SERIES_RANGES = {"hour": timedelta(days=1), "day": timedelta(days=30)}
 
 router = APIRouter(
     default_response_class=JSONResponse,
@@ -15,14 +37,73 @@ router = APIRouter(
 
 @router.post("/shorten", response_model=ShortenedUrl)
 async def create_short_url(
-    body: TargetUrl, session: AsyncSession = Depends(get_session)
+    body: TargetUrl, session: AsyncSession = Depends(get_write_session)
 ):
-    target_url = body.target_url
-    if not target_url.startswith("http"):
-        target_url = f"https://{target_url}"
+    target_url = normalize_target_url(body.target_url)
+    expires_at = to_local(body.expires_at) if body.expires_at else None
+    if expires_at is not None and expires_at <= datetime.now():
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="expires_at must be in the future",
+        )
 
-    shortened_url = await SHORTENER_SERVICE.create_short_url(target_url, session)
-    response_data = ShortenedUrl(shortened_url=shortened_url, target_url=target_url)
+    options = {
+        "expires_at": expires_at,
+        "max_visits": body.max_visits,
+        "redirect_status": body.redirect_status,
+        "redirect_max_age": body.cache_max_age,
+    }
+    shortened_url = await SHORTENER_SERVICE.create_short_url(
+        target_url,
+        session,
+        **{name: value for name, value in options.items() if value is not None},
+    )
+    response_data = ShortenedUrl(
+        shortened_url=shortened_url,
+        target_url=target_url,
+        expires_at=expires_at.isoformat() if expires_at else None,
+        max_visits=body.max_visits,
+        redirect_status=body.redirect_status,
+        cache_max_age=body.cache_max_age,
+    )
+
+    return JSONResponse(
+        content=response_data.model_dump(exclude_none=True),
+        status_code=status.HTTP_201_CREATED,
+    )
+
+
+@router.post("/shorten/bulk", response_model=BulkShortenedUrls)
+async def create_short_urls(
+    body: BulkTargetUrls, session: AsyncSession = Depends(get_write_session)
+):
+    if len(body.target_urls) > settings.BULK_SHORTEN_MAX_ITEMS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"At most {settings.BULK_SHORTEN_MAX_ITEMS} URLs per request",
+        )
+
+    results = []
+    valid = []
+    for raw_url in body.target_urls:
+        target_url = normalize_target_url(raw_url.strip())
+        if not urlsplit(target_url).hostname:
+            results.append(
+                BulkShortenedUrl(target_url=target_url, error="Invalid target URL")
+            )
+            continue
+        result = BulkShortenedUrl(target_url=target_url)
+        results.append(result)
+        valid.append(result)
+
+    if valid:
+        shortened_urls = await SHORTENER_SERVICE.create_short_urls(
+            [result.target_url for result in valid], session
+        )
+        for result, shortened_url in zip(valid, shortened_urls, strict=True):
+            result.shortened_url = shortened_url
+
+    response_data = BulkShortenedUrls(results=results)
 
     return JSONResponse(
         content=response_data.model_dump(),
@@ -31,24 +112,131 @@ async def create_short_url(
 
 
 @router.get("/stats/{short_code}", response_model=UrlStats)
-async def get_url_stats(short_code: str, session: AsyncSession = Depends(get_session)):
-    link = await SHORTENER_SERVICE.get_link_by_code(short_code, session)
+async def get_url_stats(
+    short_code: str,
+    request: Request,
+    granularity: Literal["hour", "day"] | None = None,
+    start: datetime | None = None,
+    end: datetime | None = None,
+    utm: Literal["source", "medium", "campaign"] | None = None,
+    session: AsyncSession = Depends(get_read_session),
+):
+    stats = await SHORTENER_SERVICE.get_url_stats(short_code, session)
 
-    if not link:
+    if not stats:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND, detail="Short URL not found"
         )
 
-    short_url = await SHORTENER_SERVICE.get_short_url(link.code)
+    # Bounds every change of the response, unless it depends on the clock
+    last_modified = None
+    if granularity is None or end is not None:
+        last_modified = stats["last_visit_at"] or stats["created_at"]
+        # Visits made just before it may still be waiting in a recorder queue
+        if datetime.now() - last_modified < timedelta(
+            seconds=settings.VISIT_FLUSH_INTERVAL
+        ):
+            last_modified = None
+    start = to_local(start) if start else None
+    end = to_local(end) if end else None
+
+    utm_counts = None
+    if utm is not None:
+        # Whole lifetime unless a range is given
+        breakdown = await SHORTENER_SERVICE.get_utm_breakdown(
+            stats["id"], utm, session, start=start, end=end
+        )
+        utm_counts = [
+            UtmCount(value=value, visits=visits) for value, visits in breakdown
+        ]
+
+    series = None
+    if granularity is not None:
+        end = end or datetime.now()
+        start = start or end - DEFAULT_SERIES_RANGES[granularity]
+        step = SERIES_STEPS[granularity]
+        if start >= end or (end - start) / step > settings.STATS_MAX_BUCKETS:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail=f"Give a non-empty range of at most "
+                f"{settings.STATS_MAX_BUCKETS} buckets",
+            )
+        buckets = await SHORTENER_SERVICE.get_visit_series(
+            stats["id"], start, end, granularity, session
+        )
+        series = [
+            VisitBucket(start=bucket.isoformat(), visits=visits)
+            for bucket, visits in buckets
+        ]
+
+    short_url = await SHORTENER_SERVICE.get_short_url(stats["code"])
 
     response_data = UrlStats(
         short_url=short_url,
-        target_url=link.target,
-        visits_count=link.visits_count,
-        created_at=link.created_at.isoformat(),
+        target_url=stats["target"],
+        visits_count=stats["visit_count"],
+        created_at=stats["created_at"].isoformat(),
+        series=series,
+        utm=utm_counts,
+    )
+
+    # Conditional requests from browsers and CDNs get a 304 without a body
+    return conditional_json(
+        request.headers,
+        response_data.model_dump(exclude_none=True),
+        max_age=settings.STATS_MAX_AGE,
+        last_modified=last_modified,
     )
 
+
+def require_admin_token(x_admin_token: str | None = Header(default=None)) -> None:
+    # Admin endpoints are disabled until ADMIN_TOKEN is configured
+    if settings.ADMIN_TOKEN is None or not secrets.compare_digest(
+        x_admin_token or "", settings.ADMIN_TOKEN
+    ):
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
+
+
+@router.post(
+    "/cache/warm",
+    response_model=CacheWarmResult,
+    dependencies=[Depends(require_admin_token)],
+)
+async def warm_link_cache(
+    body: CacheWarmRequest, session: AsyncSession = Depends(get_read_session)
+):
+    if (body.top is None) == (body.codes is None):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Give either top or codes",
+        )
+
+    broadcast = False
+    if body.broadcast and settings.CACHE_WARM_BROADCAST:
+        try:
+            broadcast = await broadcast_warm_request(body.top, body.codes)
+        except ValueError as e:
+            raise HTTPException(
+                status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=str(e)
+            ) from e
+
+    report = await warm_cache(session, body.top, body.codes)
+    response_data = CacheWarmResult(**asdict(report), broadcast=broadcast)
+
     return JSONResponse(
         content=response_data.model_dump(),
         status_code=status.HTTP_200_OK,
     )
+
+
+def to_local(moment: datetime) -> datetime:
+    # Visits and expiry times are stored as naive local times
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+def normalize_target_url(target_url: str) -> str:
+    if not target_url.startswith("http"):
+        target_url = f"https://{target_url}"
+    return target_url
@@ -1,13 +1,34 @@
-from sqlmodel import SQLModel
+from datetime import datetime
+from typing import Literal
+
+from sqlmodel import Field, SQLModel
 
 
 class TargetUrl(SQLModel):
     target_url: str
+    expires_at: datetime | None = None
+    max_visits: int | None = Field(default=None, ge=1)
+    redirect_status: Literal[301, 302, 307, 308] | None = None
+    cache_max_age: int | None = Field(default=None, ge=0)
 
 
 class ShortenedUrl(SQLModel):
     shortened_url: str
     target_url: str
+    expires_at: str | None = None
+    max_visits: int | None = None
+    redirect_status: int | None = None
+    cache_max_age: int | None = None
+
+
+class VisitBucket(SQLModel):
+    start: str
+    visits: int
+
+
+class UtmCount(SQLModel):
+    value: str
+    visits: int
 
 
 class UrlStats(SQLModel):
@@ -15,3 +36,35 @@ class UrlStats(SQLModel):
     target_url: str
     visits_count: int
     created_at: str
+    series: list[VisitBucket] | None = None
+    utm: list[UtmCount] | None = None
+
+
+class BulkTargetUrls(SQLModel):
+    target_urls: list[str]
+
+
+class BulkShortenedUrl(SQLModel):
+    target_url: str
+    shortened_url: str | None = None
+    error: str | None = None
+
+
+class BulkShortenedUrls(SQLModel):
+    results: list[BulkShortenedUrl]
+
+
+class CacheWarmRequest(SQLModel):
+    top: int | None = Field(default=None, ge=1)
+    codes: list[str] | None = None
+    broadcast: bool = True
+
+
+class CacheWarmResult(SQLModel):
+    links: int
+    shared: int
+    chunks: int
+    seconds: float
+    memory_bytes: int
+    instance: str
+    broadcast: bool
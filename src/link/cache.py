@@ -0,0 +1,134 @@
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from typing import NamedTuple
+
+from src.config.conf import settings
+
+__all__ = ["MISSING", "CacheStats", "CachedLink", "LinkCache"]
+
+# Sentinel returned by ``LinkCache.get`` when the code is not cached at all.
+# ``None`` is a valid cached value (negative entry for an unknown code).
+MISSING = object()
+
+
+class CachedLink(NamedTuple):
+    """Immutable part of a link needed to serve a redirect.
+
+    ``expires_at`` is a POSIX timestamp, so expiry is checked against the
+    wall clock without another lookup. ``status`` and ``max_age`` are the
+    link's own redirect settings, ``None`` for the global ones.
+    """
+
+    id: int
+    target: str
+    expires_at: float | None = None
+    status: int | None = None
+    max_age: int | None = None
+
+    @classmethod
+    def from_row(
+        cls,
+        link_id: int,
+        target: str,
+        expires_at: datetime | None = None,
+        status: int | None = None,
+        max_age: int | None = None,
+    ) -> "CachedLink":
+        # Naive datetimes are local times, which is what ``timestamp`` assumes
+        return cls(
+            link_id,
+            target,
+            expires_at.timestamp() if expires_at else None,
+            status,
+            max_age,
+        )
+
+    def expired(self, now: float | None = None) -> bool:
+        if self.expires_at is None:
+            return False
+        return self.expires_at <= (time.time() if now is None else now)
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+class LinkCache:
+    """Bounded per-worker LRU cache for ``code -> (id, target)`` lookups.
+
+    Entries expire after ``ttl`` seconds; unknown codes are cached as ``None``
+    for ``negative_ttl`` seconds so repeated misses do not hit the database.
+    A ``max_size`` of ``0`` disables the cache.
+    """
+
+    def __init__(
+        self,
+        max_size: int = settings.LINK_CACHE_MAX_SIZE,
+        ttl: float = settings.LINK_CACHE_TTL,
+        negative_ttl: float = settings.LINK_CACHE_NEGATIVE_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: OrderedDict[str, tuple[float, CachedLink | None]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, code: str) -> bool:
+        return self.get(code, record=False) is not MISSING
+
+    def get(self, code: str, record: bool = True):
+        """Return the cached entry, ``None`` for a negative hit or ``MISSING``."""
+        entry = self._entries.get(code)
+        if entry is None:
+            if record:
+                self.stats.misses += 1
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at <= self.clock():
+            del self._entries[code]
+            self.stats.expirations += 1
+            if record:
+                self.stats.misses += 1
+            return MISSING
+
+        self._entries.move_to_end(code)
+        if record:
+            self.stats.hits += 1
+        return value
+
+    def set(self, code: str, value: CachedLink | None) -> None:
+        if self.max_size <= 0:
+            return
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if ttl <= 0:
+            return
+
+        self._entries[code] = (self.clock() + ttl, value)
+        self._entries.move_to_end(code)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, code: str) -> None:
+        self._entries.pop(code, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
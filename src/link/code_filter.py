@@ -0,0 +1,194 @@
+import math
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.conf import settings
+
+from .repo import LinkRepo
+
+__all__ = [
+    "CODES_CHANNEL",
+    "BloomFilter",
+    "CodeFilter",
+    "CodeFilterStats",
+    "announce_codes",
+]
+
+CODES_CHANNEL = "link_codes"
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7999
+
+_MASK32 = (1 << 32) - 1
+
+
+class BloomFilter:
+    """Set of strings answering "maybe present" or "definitely absent".
+
+    ``capacity`` items can be added before the false positive rate exceeds
+    ``error_rate``. Bit positions are derived from Python's string hash by
+    double hashing; that hash is randomized per process, so a filter is only
+    meaningful in the process that built it.
+    """
+
+    def __init__(self, capacity: int, error_rate: float):
+        if capacity < 1 or not 0 < error_rate < 1:
+            raise ValueError("Capacity must be positive and error rate in (0, 1)")
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str) -> range:
+        h = hash(item)
+        # Odd step, so the positions of one item never collapse onto one bit
+        step = (h >> 32 & _MASK32) | 1
+        start = h & _MASK32
+        return range(start, start + step * self.hashes, step)
+
+    def add(self, item: str) -> None:
+        bits, size = self.bits, self.size
+        for value in self._positions(item):
+            position = value % size
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def update(self, items: Iterable[str]) -> None:
+        for item in items:
+            self.add(item)
+
+    def __contains__(self, item: str) -> bool:
+        bits, size = self.bits, self.size
+        for value in self._positions(item):
+            position = value % size
+            if not bits[position >> 3] & 1 << (position & 7):
+                return False
+        return True
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+    @property
+    def false_positive_rate(self) -> float:
+        """Expected rate for the number of items added so far."""
+        return (1 - math.exp(-self.hashes * self.count / self.size)) ** self.hashes
+
+
+@dataclass
+class CodeFilterStats:
+    # Codes that cannot have been issued (characters, length)
+    malformed: int = 0
+    # Well-formed codes the Bloom filter knows are absent
+    absent: int = 0
+    passed: int = 0
+
+
+class CodeFilter:
+    """Per-worker guard rejecting unknown short codes without the database.
+
+    Codes outside the base62 alphabet are rejected outright. Once ``build``
+    has loaded every existing code into a Bloom filter, codes of a length
+    never issued or absent from the filter are rejected too; a code that
+    passes may still not exist (false positive) and is looked up as usual.
+    Until then every base62 code passes.
+
+    Codes created later must be ``add``-ed, by this worker and, through
+    ``announce_codes``, by every other one.
+    """
+
+    def __init__(
+        self,
+        length: int = settings.SHORT_URL_LENGTH,
+        error_rate: float = settings.LINK_FILTER_ERROR_RATE,
+        min_capacity: int = settings.LINK_FILTER_MIN_CAPACITY,
+    ):
+        self.error_rate = error_rate
+        self.min_capacity = min_capacity
+        self.lengths = {length}
+        self.bloom: BloomFilter | None = None
+        self.stats = CodeFilterStats()
+        # Codes added while a build is running, replayed into the new filter
+        self._pending: list[str] | None = None
+
+    @property
+    def ready(self) -> bool:
+        return self.bloom is not None
+
+    def might_exist(self, code: str, record: bool = True) -> bool:
+        """Whether ``code`` may exist; ``record`` counts the answer in ``stats``."""
+        stats = self.stats if record else CodeFilterStats()
+        # ASCII letters and digits: exactly the base62 alphabet
+        if not (code.isascii() and code.isalnum()):
+            stats.malformed += 1
+            return False
+        bloom = self.bloom
+        if bloom is not None:
+            if len(code) not in self.lengths:
+                stats.malformed += 1
+                return False
+            if code not in bloom:
+                stats.absent += 1
+                return False
+        stats.passed += 1
+        return True
+
+    def add(self, codes: Iterable[str]) -> None:
+        codes = list(codes)
+        self.lengths.update(len(code) for code in codes)
+        if self.bloom is not None:
+            self.bloom.update(codes)
+        if self._pending is not None:
+            self._pending.extend(codes)
+
+    async def build(
+        self, session: AsyncSession, chunk_size: int = settings.CACHE_WARM_CHUNK_SIZE
+    ) -> BloomFilter:
+        """Load every existing code into a new filter, then switch to it.
+
+        Sized for twice the current number of links (at least
+        ``min_capacity``), so it absorbs growth before its false positive
+        rate climbs; rebuilding resizes it.
+        """
+        self._pending = []
+        try:
+            max_id = await LinkRepo.get_max_id(session)
+            bloom = BloomFilter(max(self.min_capacity, 2 * max_id), self.error_rate)
+            lengths = set()
+            async for codes in LinkRepo.stream_codes(session, chunk_size=chunk_size):
+                bloom.update(codes)
+                lengths.update(len(code) for code in codes)
+            self.lengths.update(lengths)
+            bloom.update(self._pending)
+            self.bloom = bloom
+        finally:
+            self._pending = None
+        return bloom
+
+
+def _payloads(codes: list[str]) -> Iterable[str]:
+    chunk, size = [], 0
+    for code in codes:
+        if size + len(code) + 1 > MAX_PAYLOAD_BYTES:
+            yield ",".join(chunk)
+            chunk, size = [], 0
+        chunk.append(code)
+        size += len(code) + 1
+    if chunk:
+        yield ",".join(chunk)
+
+
+async def announce_codes(codes: list[str], session: AsyncSession) -> None:
+    """Broadcast new codes on ``CODES_CHANNEL`` (PostgreSQL only).
+
+    Call it in the transaction that inserts the codes: ``NOTIFY`` is only
+    delivered when that transaction commits, and dropped if it rolls back.
+    """
+    if not codes or session.bind.dialect.name != "postgresql":
+        return
+    for payload in _payloads(codes):
+        await session.execute(select(func.pg_notify(CODES_CHANNEL, payload)))
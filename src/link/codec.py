@@ -0,0 +1,155 @@
+import bisect
+import random
+import string
+from collections.abc import Iterable
+
+__all__ = [
+    "BASE62",
+    "ShortCodeCodec",
+    "base62_decode",
+    "base62_encode",
+    "base62_encode_many",
+]
+
+BASE62 = string.ascii_letters + string.digits
+_BASE62_INDEX = {char: i for i, char in enumerate(BASE62)}
+# 62 ** 32 > 2 ** 190, enough for 128-bit UUIDs with room to spare
+_POWERS = [62**i for i in range(33)]
+
+
+def _digit_count(num: int) -> int:
+    """Number of base62 digits of ``num`` (``num > 0``)."""
+    if num < _POWERS[-1]:
+        return bisect.bisect_right(_POWERS, num)
+    count = len(_POWERS) - 1
+    while num >= 62**count:
+        count += 1
+    return count
+
+
+def base62_encode(num: int, length: int | None = None) -> str:
+    """Encode ``num`` in base62, keeping only the ``length`` leading digits.
+
+    The low digits that would be cut off are discarded with a single
+    division instead of being generated and thrown away.
+    """
+    if num == 0:
+        return BASE62[0]
+    if length is not None:
+        excess = _digit_count(num) - length
+        if excess > 0:
+            num //= _POWERS[excess] if excess < len(_POWERS) else 62**excess
+    chars = []
+    append = chars.append
+    while num:
+        num, rem = divmod(num, 62)
+        append(BASE62[rem])
+    return "".join(reversed(chars))
+
+
+def base62_encode_many(nums: Iterable[int], length: int | None = None) -> list[str]:
+    return [base62_encode(num, length) for num in nums]
+
+
+def base62_decode(code: str) -> int:
+    num = 0
+    try:
+        for char in code:
+            num = num * 62 + _BASE62_INDEX[char]
+    except KeyError as e:
+        raise ValueError(f"Invalid character in code: {e.args[0]!r}") from None
+    return num
+
+
+class ShortCodeCodec:
+    """Bijective, obfuscated mapping between integers and fixed-length codes.
+
+    Every integer in ``[0, 62 ** length)`` maps to exactly one code of
+    ``length`` characters and back, so distinct integers (e.g. values of a
+    database sequence) can never produce the same code. Consecutive integers
+    are scattered over the code space by a few rounds of an affine
+    permutation modulo ``62 ** length`` followed by a digit rotation, and the
+    alphabet itself is shuffled. All parameters are derived from ``salt``.
+
+    This is obfuscation, not encryption: it hides the creation order of links
+    from casual observers. Changing ``salt`` or ``length`` once codes have been
+    issued makes new codes collide with old ones.
+    """
+
+    ROUNDS = 3
+
+    def __init__(self, length: int, salt: int = 0, alphabet: str = BASE62):
+        if length < 2:
+            raise ValueError("Code length must be at least 2")
+        self.length = length
+        self.base = len(alphabet)
+        self.capacity = self.base**length
+        self._high = self.base ** (length - 1)
+
+        rng = random.Random(salt)
+        shuffled = list(alphabet)
+        rng.shuffle(shuffled)
+        self.alphabet = "".join(shuffled)
+        self._index = {char: i for i, char in enumerate(self.alphabet)}
+
+        self._keys: list[tuple[int, int, int]] = []
+        for _ in range(self.ROUNDS):
+            multiplier = rng.randrange(1, self.capacity)
+            # Must be coprime with the capacity to be invertible
+            while any(multiplier % p == 0 for p in _prime_factors(self.base)):
+                multiplier = rng.randrange(1, self.capacity)
+            offset = rng.randrange(self.capacity)
+            inverse = pow(multiplier, -1, self.capacity)
+            self._keys.append((multiplier, offset, inverse))
+
+    def permute(self, num: int) -> int:
+        for multiplier, offset, _ in self._keys:
+            num = (num * multiplier + offset) % self.capacity
+            # Rotate the lowest digit to the top so it influences every digit
+            num = (num % self.base) * self._high + num // self.base
+        return num
+
+    def unpermute(self, num: int) -> int:
+        for _, offset, inverse in reversed(self._keys):
+            num = (num % self._high) * self.base + num // self._high
+            num = ((num - offset) * inverse) % self.capacity
+        return num
+
+    def encode(self, num: int) -> str:
+        if not 0 <= num < self.capacity:
+            raise ValueError(f"{num} is outside the code space of {self.capacity}")
+        num = self.permute(num)
+        base, alphabet = self.base, self.alphabet
+        chars = []
+        for _ in range(self.length):
+            num, rem = divmod(num, base)
+            chars.append(alphabet[rem])
+        return "".join(chars)
+
+    def encode_many(self, nums: Iterable[int]) -> list[str]:
+        encode = self.encode
+        return [encode(num) for num in nums]
+
+    def decode(self, code: str) -> int:
+        if len(code) != self.length:
+            raise ValueError(f"Code must be {self.length} characters long")
+        num = 0
+        for char in reversed(code):
+            try:
+                num = num * self.base + self._index[char]
+            except KeyError:
+                raise ValueError(f"Invalid character in code: {char!r}") from None
+        return self.unpermute(num)
+
+
+def _prime_factors(num: int) -> set[int]:
+    factors = set()
+    divisor = 2
+    while divisor * divisor <= num:
+        while num % divisor == 0:
+            factors.add(divisor)
+            num //= divisor
+        divisor += 1
+    if num > 1:
+        factors.add(num)
+    return factors
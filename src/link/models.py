@@ -1,12 +1,39 @@
 from datetime import datetime
 
+from sqlalchemy import Index, LargeBinary, Sequence, text
 from sqlmodel import Field, Relationship, SQLModel
 
-__all__ = ["Link", "Visit"]
+__all__ = [
+    "Link",
+    "LinkArchive",
+    "UtmSet",
+    "Visit",
+    "VisitRollup",
+    "VisitUtmRollup",
+    "link_code_seq",
+]
+
+# Source of the integers short codes are derived from (see ``CodeAllocator``)
+link_code_seq = Sequence("link_code_seq", metadata=SQLModel.metadata)
 
 
 class Link(SQLModel, table=True):
-    """Link model representing shortened URLs."""
+    """Link model representing shortened URLs.
+
+    A link expires at ``expires_at``, or once ``max_visits`` visits have been
+    recorded (the recorder then sets ``expires_at``); expired links answer
+    410 until ``LinkSweeper`` removes them.
+    """
+
+    # Only links with a lifetime are indexed, which is all the sweeper scans
+    __table_args__ = (
+        Index(
+            "ix_link_expires_at",
+            "expires_at",
+            postgresql_where=text("expires_at IS NOT NULL"),
+            sqlite_where=text("expires_at IS NOT NULL"),
+        ),
+    )
 
     id: int = Field(primary_key=True)
     target: str = Field(..., description="The target URL to redirect to")
@@ -20,21 +47,56 @@ class Link(SQLModel, table=True):
     visits_count: int = Field(
         default=0, nullable=True, description="Number of visits to the link"
     )
+    target_hash: bytes | None = Field(
+        default=None,
+        sa_type=LargeBinary,
+        unique=True,
+        index=True,
+        description="SHA-256 of the normalized target, set in deduplication mode",
+    )
+    expires_at: datetime | None = Field(
+        default=None, description="When the link stops redirecting"
+    )
+    max_visits: int | None = Field(
+        default=None, description="Visits after which the link expires"
+    )
+    redirect_status: int | None = Field(
+        default=None, description="Redirect status code, REDIRECT_STATUS if unset"
+    )
+    redirect_max_age: int | None = Field(
+        default=None,
+        description="Seconds clients may cache the redirect, REDIRECT_MAX_AGE if unset",
+    )
+    last_visit_at: datetime | None = Field(
+        default=None, description="When visits of the link were last recorded"
+    )
 
-    # Relationship to visits
+    # Relationship to visits. Never loaded implicitly: a popular link has far
+    # too many visits, use ``LinkRepo.get_by_code(..., with_visits=True)``.
     visits: list["Visit"] = Relationship(
-        back_populates="link", sa_relationship_kwargs={"lazy": "joined"}
+        back_populates="link", sa_relationship_kwargs={"lazy": "raise"}
     )
 
 
 class Visit(SQLModel, table=True):
-    """Visit model tracking link visits."""
+    """Visit model tracking link visits.
+
+    On PostgreSQL the table is range-partitioned by ``visited_at`` month (see
+    ``src.database.partitions``), with ``(id, visited_at)`` as its primary
+    key; ids still come from one sequence, so ``id`` alone identifies a visit.
+    """
+
+    __table_args__ = (Index("ix_visit_link_id_visited_at", "link_id", "visited_at"),)
 
     id: int = Field(primary_key=True)
     link_id: int = Field(
         ..., foreign_key="link.id", description="Foreign key to the link"
     )
-    utm: str | None = Field(default=None, description="UTM parameters for tracking")
+    utm_set_id: int | None = Field(
+        default=None,
+        foreign_key="utm_set.id",
+        description="UTM parameters of the visit, stored once in utm_set",
+    )
     visited_at: datetime = Field(
         default_factory=lambda: datetime.now(),
         description="When the visit occurred",
@@ -42,5 +104,87 @@ class Visit(SQLModel, table=True):
 
     # Relationship to link
     link: Link = Relationship(
-        back_populates="visits", sa_relationship_kwargs={"lazy": "joined"}
+        back_populates="visits", sa_relationship_kwargs={"lazy": "raise"}
+    )
+
+
+class UtmSet(SQLModel, table=True):
+    """Distinct combination of UTM parameters, shared by every visit with it.
+
+    Dictionary encoding: a campaign's parameters are stored once here and
+    visits only hold its id.
+    """
+
+    __tablename__ = "utm_set"
+
+    id: int = Field(primary_key=True)
+    hash: bytes = Field(
+        ...,
+        sa_type=LargeBinary,
+        unique=True,
+        index=True,
+        description="SHA-256 of the parameters, see ``src.link.utm.Utm.digest``",
+    )
+    source: str | None = None
+    medium: str | None = None
+    campaign: str | None = None
+    term: str | None = None
+    content: str | None = None
+
+
+class VisitRollup(SQLModel, table=True):
+    """Visits per link and hour, maintained by the visit recorder.
+
+    Stats are read from here, so their cost grows with the number of hours
+    asked for instead of the number of visits.
+    """
+
+    __tablename__ = "visit_rollup"
+
+    link_id: int = Field(
+        ..., foreign_key="link.id", primary_key=True, description="Visited link"
     )
+    bucket: datetime = Field(
+        ..., primary_key=True, description="Start of the hour the visits fall in"
+    )
+    count: int = Field(default=0, description="Visits in the hour")
+
+
+class VisitUtmRollup(SQLModel, table=True):
+    """Visits with UTM parameters per link, hour and parameter set.
+
+    Maintained with ``visit_rollup``; visits without UTM parameters are only
+    counted there.
+    """
+
+    __tablename__ = "visit_utm_rollup"
+
+    link_id: int = Field(
+        ..., foreign_key="link.id", primary_key=True, description="Visited link"
+    )
+    bucket: datetime = Field(
+        ..., primary_key=True, description="Start of the hour the visits fall in"
+    )
+    utm_set_id: int = Field(
+        ..., foreign_key="utm_set.id", primary_key=True, description="UTM parameters"
+    )
+    count: int = Field(default=0, description="Visits in the hour")
+
+
+class LinkArchive(SQLModel, table=True):
+    """Expired links moved out of ``link`` when ``LINK_SWEEP_ARCHIVE`` is set.
+
+    Their visits and rollups are deleted; ``visits_count`` keeps the total.
+    """
+
+    __tablename__ = "link_archive"
+
+    # Keeps the id the link had
+    id: int = Field(primary_key=True, sa_column_kwargs={"autoincrement": False})
+    target: str
+    code: str = Field(..., index=True)
+    created_at: datetime
+    expires_at: datetime
+    max_visits: int | None = None
+    visits_count: int | None = None
+    archived_at: datetime = Field(default_factory=lambda: datetime.now())
@@ -0,0 +1,196 @@
+import asyncio
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from datetime import datetime
+from typing import NamedTuple
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src import metrics
+from src.config.conf import settings
+from src.database.core import SessionLocal
+from src.logger import logger
+
+from .repo import (
+    LinkRepo,
+    VisitRepo,
+    VisitRollupRepo,
+    VisitUtmRollupRepo,
+    hour_bucket,
+)
+from .service import SHORTENER_SERVICE
+from .utm import Utm, UtmSetIds
+
+__all__ = ["VISIT_RECORDER", "VisitEvent", "VisitRecorder"]
+
+
+class VisitEvent(NamedTuple):
+    link_id: int
+    visited_at: datetime
+    utm: Utm | None = None
+
+
+class VisitRecorder:
+    """Write-behind recorder for redirect visits.
+
+    Redirects only enqueue a ``VisitEvent``; a background task started in the
+    application lifespan persists queued events every ``flush_interval``
+    seconds (or as soon as ``batch_size`` events are waiting) with one
+    multi-row ``INSERT`` into ``visit``, one ``visits_count`` update per
+    link and one upsert of the hourly ``visit_rollup`` counts (and of
+    ``visit_utm_rollup`` for visits with UTM parameters, whose sets are
+    resolved to ``utm_set`` ids through ``utm_sets``). Links that
+    reach their ``max_visits`` are expired in the same transaction and
+    their codes handed to ``on_expired`` (cache invalidation) once
+    committed; other workers may keep redirecting to them for up to
+    ``LINK_CACHE_TTL``. When the
+    queue is full, ``policy`` decides whether the event is dropped
+    (``"drop"``) or the caller waits for room (``"block"``).
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession] = SessionLocal,
+        flush_interval: float = settings.VISIT_FLUSH_INTERVAL,
+        batch_size: int = settings.VISIT_BATCH_SIZE,
+        queue_size: int = settings.VISIT_QUEUE_SIZE,
+        policy: str = settings.VISIT_QUEUE_POLICY,
+        on_expired: Callable[[list[str]], Awaitable[None]] | None = None,
+        utm_sets: UtmSetIds | None = None,
+    ):
+        if policy not in ("drop", "block"):
+            raise ValueError(f"Unknown visit queue policy: {policy}")
+        self.sessionmaker = sessionmaker
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.policy = policy
+        self.on_expired = on_expired
+        self.utm_sets = utm_sets if utm_sets is not None else UtmSetIds()
+        self.queue: asyncio.Queue[VisitEvent] = asyncio.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.failed = 0
+        self._wakeup = asyncio.Event()
+        self._closing = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._closing.clear()
+        self._task = asyncio.create_task(self._run(), name="visit-recorder")
+
+    async def stop(self) -> None:
+        """Stop the background task after flushing every queued event."""
+        if self._task is None:
+            await self.flush()
+            return
+        self._closing.set()
+        self._wakeup.set()
+        await self._task
+        self._task = None
+
+    async def record(
+        self, link_id: int, utm: Utm | None = None, visited_at: datetime | None = None
+    ) -> bool:
+        """Enqueue a visit; returns ``False`` if it was dropped."""
+        event = VisitEvent(link_id, visited_at or datetime.now(), utm)
+        if self.policy == "block":
+            await self.queue.put(event)
+        else:
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped += 1
+                return False
+
+        if self.queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def flush(self) -> None:
+        """Persist every event currently in the queue, batch by batch."""
+        while not self.queue.empty():
+            batch = []
+            while len(batch) < self.batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            await self._write(batch)
+
+    async def _run(self) -> None:
+        while not self._closing.is_set():
+            with suppress(TimeoutError):
+                async with asyncio.timeout(self.flush_interval):
+                    await self._wakeup.wait()
+            self._wakeup.clear()
+            await self.flush()
+        await self.flush()
+
+    async def _write(self, batch: list[VisitEvent]) -> None:
+        counts = Counter(event.link_id for event in batch)
+        buckets = Counter(
+            (event.link_id, hour_bucket(event.visited_at)) for event in batch
+        )
+        utms = {event.utm for event in batch if event.utm is not None}
+        try:
+            async with self.sessionmaker() as session:
+                utm_ids = await self.utm_sets.resolve(utms, session) if utms else {}
+                await VisitRepo.bulk_create(
+                    (
+                        {
+                            "link_id": event.link_id,
+                            "visited_at": event.visited_at,
+                            "utm_set_id": utm_ids.get(event.utm),
+                        }
+                        for event in batch
+                    ),
+                    session,
+                    commit=False,
+                )
+                await LinkRepo.increment_visits_counts(counts, session, commit=False)
+                await VisitRollupRepo.increment(buckets, session, commit=False)
+                await VisitUtmRollupRepo.increment(
+                    Counter(
+                        (
+                            event.link_id,
+                            hour_bucket(event.visited_at),
+                            utm_ids[event.utm],
+                        )
+                        for event in batch
+                        if event.utm is not None
+                    ),
+                    session,
+                    commit=False,
+                )
+                expired = await LinkRepo.expire_exhausted(
+                    counts, datetime.now(), session
+                )
+                await session.commit()
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(msg=f"Error recording {len(batch)} visits", exc_info=e)
+            return
+        if expired and self.on_expired is not None:
+            try:
+                await self.on_expired(expired)
+            except Exception as e:
+                logger.error(msg="Error invalidating expired links", exc_info=e)
+
+
+VISIT_RECORDER = VisitRecorder(on_expired=SHORTENER_SERVICE.invalidate)
+
+metrics.Gauge("visit_queue_depth", "Visits waiting to be written").set_function(
+    VISIT_RECORDER.queue.qsize
+)
+metrics.Counter("visits_dropped_total", "Visits dropped on a full queue").set_function(
+    lambda: VISIT_RECORDER.dropped
+)
+metrics.Counter("visits_failed_total", "Visits lost to failed writes").set_function(
+    lambda: VISIT_RECORDER.failed
+)
+metrics.Counter(
+    "utm_set_lookups_total", "UTM parameter sets missing from the id cache"
+).set_function(lambda: VISIT_RECORDER.utm_sets.misses)
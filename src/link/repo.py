@@ -1,16 +1,87 @@
-from sqlalchemy import func, update
+import itertools
+from collections.abc import AsyncIterator, Iterable, Mapping, Sequence
+from datetime import datetime
+
+from sqlalchemy import (
+    DateTime,
+    Row,
+    Table,
+    bindparam,
+    delete,
+    false,
+    func,
+    insert,
+    literal,
+    or_,
+    true,
+    tuple_,
+    update,
+)
+from sqlalchemy import select as core_select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
 from sqlmodel import select
 
-from .models import Link, Visit
+from src.config.conf import settings
+from src.database.compiled import PrecompiledQuery
+
+from .models import (
+    Link,
+    LinkArchive,
+    UtmSet,
+    Visit,
+    VisitRollup,
+    VisitUtmRollup,
+    link_code_seq,
+)
+
+# Databases without sequences (SQLite in tests) get a process-local counter,
+# which is only collision-free for a single-process database.
+_local_code_seq = itertools.count(1)
+
+
+_link = Link.__table__
+_rollup = VisitRollup.__table__
+
+# Built once at import; the redirect lookup is also compiled once per dialect
+_TARGET_BY_CODE = PrecompiledQuery(
+    core_select(
+        _link.c.id,
+        _link.c.target,
+        _link.c.expires_at,
+        _link.c.redirect_status,
+        _link.c.redirect_max_age,
+    ).where(_link.c.code == bindparam("code"))
+)
+_STATS_BY_CODE = (
+    core_select(
+        _link.c.id,
+        _link.c.target,
+        _link.c.code,
+        _link.c.created_at,
+        _link.c.last_visit_at,
+        func.coalesce(func.sum(_rollup.c.count), 0).label("visit_count"),
+    )
+    .select_from(_link.outerjoin(_rollup, _link.c.id == _rollup.c.link_id))
+    .where(_link.c.code == bindparam("code"))
+    .group_by(
+        _link.c.id,
+        _link.c.target,
+        _link.c.code,
+        _link.c.created_at,
+        _link.c.last_visit_at,
+    )
+)
 
 
 class LinkRepo:
     @classmethod
     async def create(
-        cls, url: str, code: str, session: AsyncSession, commit=True
+        cls, url: str, code: str, session: AsyncSession, commit=True, **options
     ) -> Link:
-        link = Link(target=url, code=code)
+        """Insert a link; ``options`` set its other columns, e.g. ``max_visits``."""
+        link = Link(target=url, code=code, **options)
         session.add(link)
         await session.flush([link])
         if commit:
@@ -18,27 +89,286 @@ class LinkRepo:
         return link
 
     @classmethod
-    async def get_by_code(cls, code: str, session: AsyncSession) -> Link | None:
-        result = await session.execute(select(Link).where(Link.code == code))
-        return result.unique().scalar_one_or_none()
+    async def get_or_create(
+        cls,
+        url: str,
+        code: str,
+        target_hash: bytes,
+        session: AsyncSession,
+        commit=True,
+    ) -> Row:
+        """Insert a deduplicated link, or return the one with the same hash.
+
+        Returns ``(id, code, created)``. On PostgreSQL the insert and the
+        lookup of an existing row run as one statement.
+        """
+        table = Link.__table__
+        dialect = session.bind.dialect.name
+        insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        stmt = (
+            insert_fn(table)
+            .values(
+                target=url,
+                code=code,
+                target_hash=target_hash,
+                created_at=datetime.now(),
+                visits_count=0,
+            )
+            .on_conflict_do_nothing(index_elements=[table.c.target_hash])
+            .returning(table.c.id, table.c.code, true().label("created"))
+        )
+        existing = select(table.c.id, table.c.code, false().label("created")).where(
+            table.c.target_hash == target_hash
+        )
+
+        if dialect == "postgresql":
+            inserted = stmt.cte("inserted")
+            query = select(inserted).union_all(existing).limit(1)
+            row = (await session.execute(query)).first()
+        else:
+            row = (await session.execute(stmt)).first()
+
+        if row is None:
+            # Conflict with a row the statement snapshot could not see yet
+            # (PostgreSQL) or no single-statement path (other dialects).
+            row = (await session.execute(existing)).one()
+
+        if commit:
+            await session.commit()
+        return row
 
     @classmethod
-    async def get_stats_by_code(cls, code: str, session: AsyncSession) -> dict | None:
-        # Get link with visit count
+    async def bulk_create(
+        cls,
+        links: Sequence[tuple[str, str]],
+        session: AsyncSession,
+        chunk_size: int = 1000,
+        commit=True,
+    ) -> dict[str, int]:
+        """Insert ``(url, code)`` pairs, one multi-row ``INSERT`` per chunk.
+
+        Returns the new link ids keyed by code.
+        """
+        table = Link.__table__
+        created_at = datetime.now()
+        ids = {}
+        for start in range(0, len(links), chunk_size):
+            rows = [
+                {
+                    "target": url,
+                    "code": code,
+                    "created_at": created_at,
+                    "visits_count": 0,
+                }
+                for url, code in links[start : start + chunk_size]
+            ]
+            result = await session.execute(
+                insert(table).values(rows).returning(table.c.id, table.c.code)
+            )
+            ids.update((code, link_id) for link_id, code in result)
+        if commit:
+            await session.commit()
+        return ids
+
+    @classmethod
+    async def bulk_get_or_create(
+        cls,
+        links: Sequence[tuple[str, str, bytes]],
+        session: AsyncSession,
+        chunk_size: int = 1000,
+        commit=True,
+    ) -> dict[bytes, tuple[str, bool]]:
+        """Insert ``(url, code, target_hash)`` links unless their hash exists.
+
+        Same ``ON CONFLICT (target_hash) DO NOTHING`` as ``get_or_create``,
+        one multi-row ``INSERT`` per chunk, followed by one lookup of the
+        hashes that conflicted. Returns ``(code, created)`` keyed by hash;
+        of links repeating a hash, only the first is inserted.
+        """
+        table = Link.__table__
+        dialect = session.bind.dialect.name
+        insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        created_at = datetime.now()
+        first = {}
+        for url, code, target_hash in links:
+            first.setdefault(target_hash, (url, code))
+        unique = list(first.items())
+        codes = {}
+        for start in range(0, len(unique), chunk_size):
+            chunk = unique[start : start + chunk_size]
+            rows = [
+                {
+                    "target": url,
+                    "code": code,
+                    "target_hash": target_hash,
+                    "created_at": created_at,
+                    "visits_count": 0,
+                }
+                for target_hash, (url, code) in chunk
+            ]
+            result = await session.execute(
+                insert_fn(table)
+                .values(rows)
+                .on_conflict_do_nothing(index_elements=[table.c.target_hash])
+                .returning(table.c.target_hash, table.c.code)
+            )
+            codes.update((target_hash, (code, True)) for target_hash, code in result)
+            existing = [
+                target_hash for target_hash, _ in chunk if target_hash not in codes
+            ]
+            if existing:
+                result = await session.execute(
+                    select(table.c.target_hash, table.c.code).where(
+                        table.c.target_hash.in_(existing)
+                    )
+                )
+                codes.update(
+                    (target_hash, (code, False)) for target_hash, code in result
+                )
+        if commit:
+            await session.commit()
+        return codes
+
+    @classmethod
+    async def get_existing_codes(
+        cls, codes: Sequence[str], session: AsyncSession, chunk_size: int = 1000
+    ) -> set[str]:
+        """The given ``codes`` that already belong to a link."""
+        existing = set()
+        for start in range(0, len(codes), chunk_size):
+            chunk = codes[start : start + chunk_size]
+            result = await session.execute(
+                select(Link.code).where(Link.code.in_(chunk))
+            )
+            existing.update(result.scalars())
+        return existing
+
+    @classmethod
+    async def reserve_code_ids(cls, count: int, session: AsyncSession) -> list[int]:
+        """Take ``count`` values of ``link_code_seq`` in one round-trip."""
+        if session.bind.dialect.name != "postgresql":
+            return list(itertools.islice(_local_code_seq, count))
+        query = select(link_code_seq.next_value()).select_from(
+            func.generate_series(1, count)
+        )
+        result = await session.execute(query)
+        return list(result.scalars())
+
+    @classmethod
+    async def get_by_code(
+        cls, code: str, session: AsyncSession, with_visits: bool = False
+    ) -> Link | None:
+        query = select(Link).where(Link.code == code)
+        if with_visits:
+            # Separate SELECT ... WHERE link_id IN (...) instead of a JOIN
+            query = query.options(selectinload(Link.visits))
+        result = await session.execute(query)
+        return result.scalar_one_or_none()
+
+    @classmethod
+    async def get_target_by_code(cls, code: str, session: AsyncSession) -> tuple | None:
+        """Column-only lookup used by redirects.
+
+        Returns ``(id, target, expires_at, redirect_status, redirect_max_age)``.
+        """
+        return await _TARGET_BY_CODE.first(session, code=code)
+
+    @classmethod
+    async def stream_targets(
+        cls,
+        session: AsyncSession,
+        limit: int | None = None,
+        codes: Sequence[str] | None = None,
+        chunk_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Yield ``(code, id, target, expires_at, redirect_status,
+        redirect_max_age)`` rows in chunks of ``chunk_size``.
+
+        Either the ``limit`` most visited links, streamed from a server-side
+        cursor, or the links with the given ``codes``, one ``IN`` query per
+        chunk of codes.
+        """
+        query = select(
+            Link.code,
+            Link.id,
+            Link.target,
+            Link.expires_at,
+            Link.redirect_status,
+            Link.redirect_max_age,
+        )
+        if codes is not None:
+            for start in range(0, len(codes), chunk_size):
+                chunk = codes[start : start + chunk_size]
+                rows = (await session.execute(query.where(Link.code.in_(chunk)))).all()
+                if rows:
+                    yield rows
+            return
+
+        query = query.order_by(Link.visits_count.desc().nulls_last()).limit(limit)
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions():
+            yield rows
+
+    @classmethod
+    async def stream_codes(
+        cls, session: AsyncSession, chunk_size: int = 1000
+    ) -> AsyncIterator[Sequence[str]]:
+        """Yield every short code in chunks of ``chunk_size``."""
+        result = await session.stream_scalars(
+            select(Link.code).execution_options(yield_per=chunk_size)
+        )
+        async for codes in result.partitions():
+            yield codes
+
+    @classmethod
+    async def stream_snapshot(
+        cls, session: AsyncSession, now: datetime, chunk_size: int = 10_000
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Yield ``(code, id, target, expires_at, redirect_status,
+        redirect_max_age)`` rows of the links a redirect snapshot may serve,
+        in chunks of ``chunk_size`` and in byte order of their codes.
+
+        Links with ``max_visits`` can expire on any visit and links that
+        already expired are left out, so both keep being served from the
+        database.
+        """
+        code = Link.code
+        if session.bind.dialect.name == "postgresql":
+            # The default collation does not sort codes by their bytes
+            code = code.collate("C")
         query = (
             select(
+                Link.code,
                 Link.id,
                 Link.target,
-                Link.code,
-                Link.created_at,
-                func.count(Visit.id).label("visit_count"),
+                Link.expires_at,
+                Link.redirect_status,
+                Link.redirect_max_age,
             )
-            .join(Visit, Link.id == Visit.link_id)
-            .where(Link.code == code)
-            .group_by(Link.id, Link.target, Link.code, Link.created_at)
+            .where(
+                Link.max_visits.is_(None),
+                or_(Link.expires_at.is_(None), Link.expires_at > now),
+            )
+            .order_by(code)
         )
+        result = await session.stream(query.execution_options(yield_per=chunk_size))
+        async for rows in result.partitions():
+            yield rows
 
-        result = await session.execute(query)
+    @classmethod
+    async def get_max_id(cls, session: AsyncSession) -> int:
+        """Highest link id, an upper bound on the number of links."""
+        return await session.scalar(select(func.coalesce(func.max(Link.id), 0)))
+
+    @classmethod
+    async def get_stats_by_code(cls, code: str, session: AsyncSession) -> dict | None:
+        """Link details with its total visits, summed from ``visit_rollup``.
+
+        Links without visits are returned with a count of 0.
+        """
+        # Core statement on the connection: no ORM compile state per call
+        connection = await session.connection()
+        result = await connection.execute(_STATS_BY_CODE, {"code": code})
         row = result.first()
 
         if not row:
@@ -49,6 +379,7 @@ class LinkRepo:
             "target": row.target,
             "code": row.code,
             "created_at": row.created_at,
+            "last_visit_at": row.last_visit_at,
             "visit_count": row.visit_count,
         }
 
@@ -68,6 +399,144 @@ class LinkRepo:
         if commit:
             await session.commit()
 
+    @classmethod
+    async def increment_visits_counts(
+        cls, counts: Mapping[int, int], session: AsyncSession, commit=True
+    ):
+        """Add ``counts[link_id]`` to each link's ``visits_count``.
+
+        ``last_visit_at`` is set to now, which stats report as their last
+        modification. Links are updated in id order so concurrent flushes from several
+        workers always take row locks in the same order.
+        """
+        if not counts:
+            return
+        table = Link.__table__
+        stmt = (
+            update(table)
+            .where(table.c.id == bindparam("link_id"))
+            .values(
+                visits_count=func.coalesce(table.c.visits_count, 0) + bindparam("n"),
+                last_visit_at=datetime.now(),
+            )
+        )
+        params = [
+            {"link_id": link_id, "n": counts[link_id]} for link_id in sorted(counts)
+        ]
+        await session.execute(stmt, params)
+
+        if commit:
+            await session.commit()
+
+    @classmethod
+    async def expire_exhausted(
+        cls, link_ids: Iterable[int], now: datetime, session: AsyncSession
+    ) -> list[str]:
+        """Expire links among ``link_ids`` that reached their ``max_visits``.
+
+        Sets their ``expires_at`` to ``now`` and returns their codes. Meant
+        to run right after ``increment_visits_counts`` in the same
+        transaction, which already holds the row locks.
+        """
+        link_ids = sorted(link_ids)
+        if not link_ids:
+            return []
+        table = Link.__table__
+        result = await session.execute(
+            update(table)
+            .where(
+                table.c.id.in_(link_ids),
+                table.c.max_visits.is_not(None),
+                table.c.visits_count >= table.c.max_visits,
+                or_(table.c.expires_at.is_(None), table.c.expires_at > now),
+            )
+            .values(expires_at=now)
+            .returning(table.c.code)
+        )
+        return list(result.scalars())
+
+    @classmethod
+    async def delete_expired_dependents(
+        cls, model: type, before: datetime, limit: int, session: AsyncSession
+    ) -> int:
+        """Delete up to ``limit`` rows of ``model`` (visits or rollups) that
+        belong to links expired before ``before``; returns how many.
+
+        Lets the sweeper empty popular links chunk by chunk, so the
+        transaction removing the links themselves stays short. Leaves
+        committing to the caller.
+        """
+        child = model.__table__
+        link = Link.__table__
+        key = list(child.primary_key.columns)
+        rows = (
+            select(*key)
+            .join(link, child.c.link_id == link.c.id)
+            .where(link.c.expires_at < before)
+            .limit(limit)
+            .with_for_update(of=child, skip_locked=True)
+        )
+        column = key[0] if len(key) == 1 else tuple_(*key)
+        result = await session.execute(delete(child).where(column.in_(rows)))
+        return result.rowcount
+
+    @classmethod
+    async def sweep_expired(
+        cls,
+        before: datetime,
+        limit: int,
+        session: AsyncSession,
+        archive: bool = False,
+    ) -> list[str]:
+        """Remove up to ``limit`` links that expired before ``before``.
+
+        Their remaining visits and rollups, normally already removed by
+        ``delete_expired_dependents``, are deleted with them; with ``archive`` the
+        links are copied to ``link_archive`` first. Returns their codes and
+        leaves committing to the caller, so one batch is one short
+        transaction. On PostgreSQL rows locked by a concurrent sweep are
+        skipped rather than waited for.
+        """
+        table = Link.__table__
+        rows = (
+            await session.execute(
+                select(table.c.id, table.c.code)
+                .where(table.c.expires_at < before)
+                .order_by(table.c.expires_at)
+                .limit(limit)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+        if not rows:
+            return []
+        ids = sorted(row.id for row in rows)
+
+        for dependent in (Visit, VisitRollup, VisitUtmRollup):
+            child = dependent.__table__
+            await session.execute(delete(child).where(child.c.link_id.in_(ids)))
+        if archive:
+            archived = LinkArchive.__table__
+            columns = [
+                "id",
+                "target",
+                "code",
+                "created_at",
+                "expires_at",
+                "max_visits",
+                "visits_count",
+            ]
+            await session.execute(
+                insert(archived).from_select(
+                    [*columns, "archived_at"],
+                    select(
+                        *(table.c[column] for column in columns),
+                        literal(datetime.now(), DateTime()),
+                    ).where(table.c.id.in_(ids)),
+                )
+            )
+        await session.execute(delete(table).where(table.c.id.in_(ids)))
+        return [row.code for row in rows]
+
     @classmethod
     async def get_constant_visits_count(
         cls, link_id: int, session: AsyncSession
@@ -86,3 +555,190 @@ class VisitRepo:
         if commit:
             await session.commit()
         return visit
+
+    @classmethod
+    async def bulk_create(
+        cls,
+        visits: Iterable[Mapping],
+        session: AsyncSession,
+        commit=True,
+        copy_min_rows: int = settings.VISIT_COPY_MIN_ROWS,
+    ):
+        """Insert many visits without going through the ORM unit of work.
+
+        On asyncpg, batches of at least ``copy_min_rows`` visits are streamed
+        with the binary ``COPY ... FROM STDIN`` protocol; smaller batches and
+        other drivers use one Core ``INSERT`` run with ``executemany``.
+        """
+        rows = [dict(visit) for visit in visits]
+        if not rows:
+            return
+        if session.bind.dialect.driver == "asyncpg" and len(rows) >= copy_min_rows:
+            await cls._copy(rows, session)
+        else:
+            await session.execute(insert(Visit.__table__), rows)
+        if commit:
+            await session.commit()
+
+    @classmethod
+    async def _copy(cls, rows: list[dict], session: AsyncSession):
+        columns = ("link_id", "visited_at", "utm_set_id")
+        connection = await session.connection()
+        raw = await connection.get_raw_connection()
+        driver = raw.driver_connection
+        # The adapter only sends BEGIN before its own statements; COPY goes
+        # straight to asyncpg, so open the transaction first or the rows would
+        # be committed on their own and survive a rollback of the batch
+        if not driver.is_in_transaction():
+            await connection.exec_driver_sql("SELECT 1")
+        await driver.copy_records_to_table(
+            Visit.__tablename__,
+            records=[tuple(row.get(column) for column in columns) for row in rows],
+            columns=columns,
+        )
+
+
+async def _increment_counts(
+    table: Table,
+    keys: tuple[str, ...],
+    counts: Mapping[tuple, int],
+    session: AsyncSession,
+):
+    # Multi-row upsert adding to ``count``, rows in key order
+    if not counts:
+        return
+    dialect = session.bind.dialect.name
+    insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    stmt = insert_fn(table).values(
+        [
+            {**dict(zip(keys, key, strict=True)), "count": counts[key]}
+            for key in sorted(counts)
+        ]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c[key] for key in keys],
+        set_={"count": table.c.count + stmt.excluded.count},
+    )
+    await session.execute(stmt)
+
+
+def hour_bucket(moment: datetime) -> datetime:
+    """Start of the ``visit_rollup`` bucket ``moment`` falls in."""
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+class VisitRollupRepo:
+    @classmethod
+    async def increment(
+        cls,
+        counts: Mapping[tuple[int, datetime], int],
+        session: AsyncSession,
+        commit=True,
+    ):
+        """Add ``counts[(link_id, bucket)]`` visits, creating missing buckets.
+
+        One multi-row upsert; rows are written in key order so concurrent
+        flushes from several workers take row locks in the same order.
+        """
+        await _increment_counts(
+            VisitRollup.__table__, ("link_id", "bucket"), counts, session
+        )
+
+        if commit:
+            await session.commit()
+
+    @classmethod
+    async def get_series(
+        cls, link_id: int, start: datetime, end: datetime, session: AsyncSession
+    ) -> Sequence[Row]:
+        """Non-empty ``(bucket, count)`` rows with ``start <= bucket < end``."""
+        table = VisitRollup.__table__
+        result = await session.execute(
+            select(table.c.bucket, table.c.count)
+            .where(
+                table.c.link_id == link_id,
+                table.c.bucket >= start,
+                table.c.bucket < end,
+            )
+            .order_by(table.c.bucket)
+        )
+        return result.all()
+
+
+class VisitUtmRollupRepo:
+    @classmethod
+    async def increment(
+        cls,
+        counts: Mapping[tuple[int, datetime, int], int],
+        session: AsyncSession,
+        commit=True,
+    ):
+        """Add ``counts[(link_id, bucket, utm_set_id)]`` visits, like
+        ``VisitRollupRepo.increment``."""
+        await _increment_counts(
+            VisitUtmRollup.__table__,
+            ("link_id", "bucket", "utm_set_id"),
+            counts,
+            session,
+        )
+
+        if commit:
+            await session.commit()
+
+    @classmethod
+    async def get_breakdown(
+        cls,
+        link_id: int,
+        dimension: str,
+        session: AsyncSession,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Sequence[Row]:
+        """``(value, count)`` of one UTM parameter, most visits first.
+
+        ``dimension`` is a ``utm_set`` column such as ``"source"``; visits
+        without this parameter are left out.
+        """
+        rollup, utm_set = VisitUtmRollup.__table__, UtmSet.__table__
+        value = utm_set.c[dimension]
+        query = (
+            select(value, func.sum(rollup.c.count).label("count"))
+            .select_from(rollup.join(utm_set, rollup.c.utm_set_id == utm_set.c.id))
+            .where(rollup.c.link_id == link_id, value.is_not(None))
+            .group_by(value)
+            .order_by(func.sum(rollup.c.count).desc(), value)
+        )
+        if start is not None:
+            query = query.where(rollup.c.bucket >= start)
+        if end is not None:
+            query = query.where(rollup.c.bucket < end)
+        return (await session.execute(query)).all()
+
+
+class UtmSetRepo:
+    @classmethod
+    async def get_or_create_many(
+        cls, utms: Sequence, session: AsyncSession
+    ) -> dict[bytes, int]:
+        """Store the ``Utm`` sets not stored yet; returns ids by digest.
+
+        Commits, so the ids can be cached as soon as they are returned.
+        Sets inserted concurrently by another worker are found, not duplicated.
+        """
+        table = UtmSet.__table__
+        dialect = session.bind.dialect.name
+        insert_fn = postgresql.insert if dialect == "postgresql" else sqlite.insert
+        rows = {utm.digest: {"hash": utm.digest, **utm._asdict()} for utm in utms}
+        if not rows:
+            return {}
+        await session.execute(
+            insert_fn(table)
+            .values([rows[digest] for digest in sorted(rows)])
+            .on_conflict_do_nothing(index_elements=[table.c.hash])
+        )
+        result = await session.execute(
+            select(table.c.hash, table.c.id).where(table.c.hash.in_(list(rows)))
+        )
+        ids = dict(result.tuples().all())
+        await session.commit()
+        return ids
@@ -1,66 +1,286 @@
-import string
+import hashlib
+import time
 import uuid
+from collections.abc import Iterator
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit, urlunsplit
 
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.config.conf import settings
 from src.link.models import Link, Visit
+from src.metrics import Counter, Gauge
 
-from .repo import LinkRepo, VisitRepo
+from .allocator import CodeAllocator
+from .cache import MISSING, CachedLink, LinkCache
+from .code_filter import CodeFilter, announce_codes
+from .codec import BASE62, base62_encode
+from .repo import (
+    LinkRepo,
+    VisitRepo,
+    VisitRollupRepo,
+    VisitUtmRollupRepo,
+    hour_bucket,
+)
+from .shared_cache import RedisBackend, SharedLinkCache
+from .singleflight import SingleFlight
+from .snapshot import RedirectSnapshot, SnapshotLoader
 
 
 class ShortenerService:
     DEFAULT_DOMAIN = settings.DEFAULT_DOMAIN
-    BASE62 = string.ascii_letters + string.digits
+    BASE62 = BASE62
     length = settings.SHORT_URL_LENGTH
+    deduplicate = settings.SHORTEN_DEDUPLICATE
+    # Other workers only hear about new codes when they listen for broadcasts
+    announce = settings.CACHE_WARM_BROADCAST
+    redirect_status = settings.REDIRECT_STATUS
+    redirect_max_age = settings.REDIRECT_MAX_AGE
 
-    def __init__(self, repo=LinkRepo):
+    def __init__(
+        self,
+        repo=LinkRepo,
+        cache: LinkCache | None = None,
+        allocator: CodeAllocator | None = None,
+        shared_cache: SharedLinkCache | None = None,
+        code_filter: CodeFilter | None = None,
+    ):
         self.repo = repo
+        self.cache = cache if cache is not None else LinkCache()
+        self.allocator = allocator or CodeAllocator()
+        self.shared_cache = shared_cache
+        self.code_filter = code_filter
+        self.lookups = SingleFlight(timeout=settings.LOOKUP_TIMEOUT)
+        # Mapped by SNAPSHOT_LOADER when REDIRECT_SNAPSHOT_PATH is set
+        self.snapshot: RedirectSnapshot | None = None
 
     async def create_short_url(
-        self, url: str, session: AsyncSession | None = None
+        self, url: str, session: AsyncSession | None = None, **options
     ) -> str:
-        code = await self.generate_short_code(url)
+        """``options`` are optional ``Link`` columns, e.g. ``expires_at``."""
         if session:
-            await self.perform_create(url, code, session)
+            code = await self.allocate_short_code(session)
+            # A link with options of its own is never shared with other shortenings
+            if self.deduplicate and not options:
+                code = await self.perform_get_or_create(url, code, session)
+            else:
+                await self.perform_create(url, code, session, **options)
+        else:
+            code = self.generate_short_code(url)
         short_url = await self.get_short_url(code)
         return short_url
 
+    async def create_short_urls(
+        self, urls: list[str], session: AsyncSession
+    ) -> list[str]:
+        """Shorten many URLs in one transaction, results in input order.
+
+        With ``deduplicate``, URLs whose target already has a link, or that
+        repeat an earlier URL of the batch, get that link's code.
+        """
+        codes = await self.allocator.allocate_many(len(urls), session)
+        if self.deduplicate:
+            hashes = [target_hash(url) for url in urls]
+            links = await self.repo.bulk_get_or_create(
+                list(zip(urls, codes, hashes, strict=True)),
+                session,
+                chunk_size=settings.BULK_INSERT_CHUNK_SIZE,
+                commit=False,
+            )
+            codes = [links[url_hash][0] for url_hash in hashes]
+            created = [code for code, is_new in links.values() if is_new]
+        else:
+            await self.repo.bulk_create(
+                list(zip(urls, codes, strict=True)),
+                session,
+                chunk_size=settings.BULK_INSERT_CHUNK_SIZE,
+                commit=False,
+            )
+            created = codes
+        await self.on_created(created, session)
+        return [await self.get_short_url(code) for code in codes]
+
     async def get_short_url(self, short_code: str) -> str:
         return f"{self.DEFAULT_DOMAIN}/{short_code}"
 
-    async def perform_create(self, url: str, code: str, session: AsyncSession) -> Link:
-        link = await self.repo.create(url, code, session)
+    async def perform_create(
+        self, url: str, code: str, session: AsyncSession, **options
+    ) -> Link:
+        link = await self.repo.create(url, code, session, commit=False, **options)
+        await self.on_created([code], session)
         return link
 
-    async def generate_short_code(self, url: str):
+    async def allocate_short_code(self, session: AsyncSession) -> str:
+        return await self.allocator.allocate(session)
+
+    async def perform_get_or_create(
+        self, url: str, code: str, session: AsyncSession
+    ) -> str:
+        """Create the link unless the same target exists; returns its code."""
+        row = await self.repo.get_or_create(
+            url, code, target_hash(url), session, commit=False
+        )
+        await self.on_created([row.code] if row.created else [], session)
+        return row.code
+
+    def generate_short_code(self, url: str) -> str:
         u = uuid.uuid4()
-        short = await self.base62_encode(u.int)
-        short = short[: self.length]
-        return short
-
-    async def base62_encode(self, num: int) -> str:
-        if num == 0:
-            return self.BASE62[0]
-        encoded = ""
-        base = len(self.BASE62)
-        while num > 0:
-            num, rem = divmod(num, base)
-            encoded = self.BASE62[rem] + encoded
-        return encoded
-
-    async def get_target(self, short_code: str, session: AsyncSession) -> Link | None:
-        link = await self.repo.get_by_code(short_code, session)
-        if not link:
+        return self.base62_encode(u.int, self.length)
+
+    def base62_encode(self, num: int, length: int | None = None) -> str:
+        return base62_encode(num, length)
+
+    async def get_target(
+        self, short_code: str, session: AsyncSession
+    ) -> CachedLink | None:
+        snapshot = self.snapshot
+        if snapshot is not None:
+            link = snapshot.get(short_code)
+            if link is not None:
+                return link
+        cached = self.cache.get(short_code)
+        if cached is not MISSING:
+            return cached
+        return await self.load_target(short_code, session)
+
+    async def load_target(
+        self, short_code: str, session: AsyncSession
+    ) -> CachedLink | None:
+        """Resolve a code missing from the local cache and cache the result.
+
+        Codes the code filter rules out are answered without any lookup and
+        are not cached, so scans for random paths cannot evict real links.
+        Concurrent misses for the same code share one lookup.
+        """
+        code_filter = self.code_filter
+        if code_filter is not None and not code_filter.might_exist(short_code):
             return None
-        return link
+        return await self.lookups.run(
+            short_code, self._load_target, short_code, session
+        )
+
+    async def _load_target(
+        self, short_code: str, session: AsyncSession
+    ) -> CachedLink | None:
+        shared = self.shared_cache
+        if shared is not None:
+            target = await shared.get(short_code)
+            if target is not MISSING:
+                self.cache.set(short_code, target)
+                return target
+
+        row = await self.repo.get_target_by_code(short_code, session)
+        if row is None:
+            row = await self._on_primary(
+                self.repo.get_target_by_code, short_code, session
+            )
+        target = CachedLink.from_row(*row) if row else None
+        self.cache.set(short_code, target)
+        if shared is not None:
+            await shared.set(short_code, target)
+        return target
+
+    def use_snapshot(self, snapshot: RedirectSnapshot | None) -> None:
+        """Answer redirects of the links in ``snapshot`` without any lookup.
+
+        Codes missing from it, e.g. created after the export, still go
+        through the caches and the database.
+        """
+        self.snapshot = snapshot
+
+    def redirect_policy(
+        self, link: CachedLink, now: float | None = None
+    ) -> tuple[int, int]:
+        """Status code and ``Cache-Control`` max-age of a redirect to ``link``.
+
+        Visits served from a browser or CDN cache never reach us, so links
+        only trade exact counting for cacheable redirects when configured
+        to. The max-age never outlives the link.
+        """
+        status = link.status or self.redirect_status
+        max_age = self.redirect_max_age if link.max_age is None else link.max_age
+        if max_age > 0 and link.expires_at is not None:
+            remaining = link.expires_at - (time.time() if now is None else now)
+            max_age = min(max_age, max(0, int(remaining)))
+        return status, max_age
+
+    async def on_created(self, codes: list[str], session: AsyncSession) -> None:
+        """Commit the links inserted with ``codes`` and make them resolvable.
+
+        The codes are announced in the inserting transaction, so other
+        workers hear of exactly the links that were committed.
+        """
+        if self.code_filter is not None and self.announce:
+            await announce_codes(codes, session)
+        await session.commit()
+        # Drop possible negative entries cached before the codes existed
+        await self.invalidate(codes)
+        if self.code_filter is not None:
+            self.code_filter.add(codes)
+
+    async def invalidate(self, codes: list[str]) -> None:
+        """Drop cached entries of links that were created or changed."""
+        for code in codes:
+            self.cache.invalidate(code)
+        if self.shared_cache is not None:
+            await self.shared_cache.invalidate(codes)
 
     async def get_url_stats(
         self, short_code: str, session: AsyncSession
     ) -> dict | None:
         stats = await self.repo.get_stats_by_code(short_code, session)
+        if stats is None:
+            stats = await self._on_primary(
+                self.repo.get_stats_by_code, short_code, session
+            )
         return stats
 
+    async def get_visit_series(
+        self,
+        link_id: int,
+        start: datetime,
+        end: datetime,
+        granularity: str,
+        session: AsyncSession,
+    ) -> list[tuple[datetime, int]]:
+        """Visits per hour or day in ``[start, end)``, including empty buckets.
+
+        The range is widened to whole buckets, so the current partial hour or
+        day is included when ``end`` is now.
+        """
+        step = SERIES_STEPS[granularity]
+        start, aligned_end = (
+            align_bucket(start, granularity),
+            align_bucket(end, granularity),
+        )
+        end = aligned_end + step if aligned_end < end else aligned_end
+        counts = dict.fromkeys(_buckets(start, end, step), 0)
+        rows = await VisitRollupRepo.get_series(link_id, start, end, session)
+        for bucket, count in rows:
+            counts[align_bucket(bucket, granularity)] += count
+        return list(counts.items())
+
+    async def get_utm_breakdown(
+        self,
+        link_id: int,
+        dimension: str,
+        session: AsyncSession,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[tuple[str, int]]:
+        """Visits per value of one UTM parameter in ``[start, end)``.
+
+        The range is widened to whole hours, like the series.
+        """
+        if start is not None:
+            start = hour_bucket(start)
+        if end is not None and hour_bucket(end) < end:
+            end = hour_bucket(end) + SERIES_STEPS["hour"]
+        rows = await VisitUtmRollupRepo.get_breakdown(
+            link_id, dimension, session, start=start, end=end
+        )
+        return [(value, count) for value, count in rows]
+
     async def update_visits_count(
         self, link_id: int, session: AsyncSession, commit=True
     ):
@@ -70,8 +290,28 @@ class ShortenerService:
         self, short_code: str, session: AsyncSession
     ) -> Link | None:
         link = await self.repo.get_by_code(short_code, session)
+        if link is None:
+            link = await self._on_primary(self.repo.get_by_code, short_code, session)
         return link
 
+    async def _on_primary(self, lookup, short_code: str, session: AsyncSession):
+        """Retry a missed replica lookup on the primary.
+
+        A code created moments ago may not have reached the replica yet.
+        Codes the code filter rules out are not retried, so scans for random
+        codes cost the primary nothing; every code passes until it is built.
+        """
+        primary_fallback = session.info.get("primary_fallback")
+        if primary_fallback is None:
+            return None
+        code_filter = self.code_filter
+        if code_filter is not None and not code_filter.might_exist(
+            short_code, record=False
+        ):
+            return None
+        async with primary_fallback() as primary:
+            return await lookup(short_code, primary)
+
 
 class VisitService:
     def __init__(self, repo=VisitRepo):
@@ -84,6 +324,102 @@ class VisitService:
         return visit
 
 
-SHORTENER_SERVICE = ShortenerService()
+SERIES_STEPS = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+def align_bucket(moment: datetime, granularity: str) -> datetime:
+    """Start of the hour or day ``moment`` falls in."""
+    moment = hour_bucket(moment)
+    return moment.replace(hour=0) if granularity == "day" else moment
+
+
+def _buckets(start: datetime, end: datetime, step: timedelta) -> Iterator[datetime]:
+    while start < end:
+        yield start
+        start += step
+
+
+def target_hash(url: str) -> bytes:
+    """SHA-256 of ``url`` with its case-insensitive parts normalized."""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    userinfo, _, host = parts.netloc.rpartition("@")
+    host = host.lower()
+    default_port = {"http": ":80", "https": ":443"}.get(scheme)
+    if default_port:
+        host = host.removesuffix(default_port)
+    netloc = f"{userinfo}@{host}" if userinfo else host
+    normalized = urlunsplit(
+        (scheme, netloc, parts.path or "/", parts.query, parts.fragment)
+    )
+    return hashlib.sha256(normalized.encode()).digest()
+
+
+SHORTENER_SERVICE = ShortenerService(
+    shared_cache=(
+        SharedLinkCache(RedisBackend.from_url(settings.SHARED_CACHE_URL))
+        if settings.SHARED_CACHE_URL
+        else None
+    ),
+    code_filter=CodeFilter() if settings.LINK_FILTER_ENABLED else None,
+)
+SNAPSHOT_LOADER = SnapshotLoader(on_load=SHORTENER_SERVICE.use_snapshot)
+
+_cache_stats = SHORTENER_SERVICE.cache.stats
+Counter("link_cache_hits_total", "Redirect lookups served from cache").set_function(
+    lambda: _cache_stats.hits
+)
+Counter(
+    "link_cache_misses_total", "Redirect lookups that went to the database"
+).set_function(lambda: _cache_stats.misses)
+Counter(
+    "link_cache_evictions_total", "Entries evicted from the redirect cache"
+).set_function(lambda: _cache_stats.evictions)
+Gauge("link_cache_hit_ratio", "Redirect cache hit ratio").set_function(
+    lambda: _cache_stats.hit_ratio
+)
+Gauge("link_cache_entries", "Entries in the redirect cache").set_function(
+    lambda: len(SHORTENER_SERVICE.cache)
+)
+_lookup_stats = SHORTENER_SERVICE.lookups.stats
+Counter(
+    "link_lookups_coalesced_total",
+    "Redirect lookups that joined a concurrent lookup of the same code",
+).set_function(lambda: _lookup_stats.coalesced)
+Counter(
+    "link_lookup_timeouts_total", "Redirect lookups abandoned after LOOKUP_TIMEOUT"
+).set_function(lambda: _lookup_stats.timeouts)
+Gauge("link_snapshot_links", "Links in the mapped redirect snapshot").set_function(
+    lambda: len(SHORTENER_SERVICE.snapshot) if SHORTENER_SERVICE.snapshot else 0
+)
+Counter("link_snapshot_loads_total", "Redirect snapshots mapped").set_function(
+    lambda: SNAPSHOT_LOADER.loads
+)
+if SHORTENER_SERVICE.code_filter is not None:
+    _code_filter = SHORTENER_SERVICE.code_filter
+    Counter(
+        "link_filter_rejected_total",
+        "Redirect lookups rejected by the code filter without a query",
+    ).set_function(lambda: _code_filter.stats.malformed + _code_filter.stats.absent)
+    Gauge("link_filter_bytes", "Size of the code filter's bit array").set_function(
+        lambda: _code_filter.bloom.memory_bytes if _code_filter.bloom else 0
+    )
+    Gauge(
+        "link_filter_false_positive_rate",
+        "Expected false positive rate of the code filter",
+    ).set_function(
+        lambda: _code_filter.bloom.false_positive_rate if _code_filter.bloom else 0
+    )
+if SHORTENER_SERVICE.shared_cache is not None:
+    _shared_stats = SHORTENER_SERVICE.shared_cache.stats
+    Counter(
+        "link_shared_cache_hits_total", "Local cache misses served by the shared cache"
+    ).set_function(lambda: _shared_stats.hits)
+    Counter("link_shared_cache_misses_total", "Shared cache misses").set_function(
+        lambda: _shared_stats.misses
+    )
+    Counter(
+        "link_shared_cache_errors_total", "Failed shared cache operations"
+    ).set_function(lambda: _shared_stats.errors)
 
 VISIT_SERVICE = VisitService()
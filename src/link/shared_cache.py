@@ -0,0 +1,344 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable, Mapping, Sequence
+from dataclasses import dataclass
+from urllib.parse import unquote, urlsplit
+
+from src.config.conf import settings
+from src.logger import logger
+
+from .cache import MISSING, CachedLink
+
+__all__ = [
+    "CacheBackend",
+    "MemoryBackend",
+    "RedisBackend",
+    "RedisError",
+    "SharedCacheStats",
+    "SharedLinkCache",
+]
+
+
+class RedisError(Exception):
+    """Error reply sent by the server."""
+
+
+class CacheBackend(ABC):
+    """Byte-oriented key/value store shared by every worker and instance.
+
+    ``mget`` and ``mset`` must cost one round-trip however many keys they
+    are given.
+    """
+
+    @abstractmethod
+    async def mget(self, keys: Sequence[str]) -> list[bytes | None]: ...
+
+    @abstractmethod
+    async def mset(self, items: Mapping[str, bytes], ttl: float) -> None: ...
+
+    @abstractmethod
+    async def delete(self, keys: Iterable[str]) -> None: ...
+
+    async def close(self) -> None:  # noqa: B027
+        """Release connections; backends without any keep this no-op."""
+
+
+class MemoryBackend(CacheBackend):
+    """In-process stand-in for tests and single-instance deployments."""
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self._data: dict[str, tuple[float, bytes]] = {}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    async def mget(self, keys: Sequence[str]) -> list[bytes | None]:
+        now = self.clock()
+        values = []
+        for key in keys:
+            entry = self._data.get(key)
+            if entry is not None and entry[0] <= now:
+                del self._data[key]
+                entry = None
+            values.append(entry[1] if entry is not None else None)
+        return values
+
+    async def mset(self, items: Mapping[str, bytes], ttl: float) -> None:
+        expires_at = self.clock() + ttl
+        for key, value in items.items():
+            self._data[key] = (expires_at, value)
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        for key in keys:
+            self._data.pop(key, None)
+
+
+class _RedisConnection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def execute(self, commands: Sequence[Sequence[str | bytes]]) -> list:
+        """Send ``commands`` in one write and read their replies in order."""
+        self.writer.write(b"".join(_encode_command(command) for command in commands))
+        await self.writer.drain()
+        return [await self._read_reply() for _ in commands]
+
+    async def _read_reply(self):
+        line = await self.reader.readuntil(b"\r\n")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body
+        if kind == b"-":
+            return RedisError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind in (b"$", b"*"):
+            length = int(body)
+            if length < 0:
+                return None
+            if kind == b"$":
+                return (await self.reader.readexactly(length + 2))[:-2]
+            return [await self._read_reply() for _ in range(length)]
+        raise RedisError(f"Unexpected reply: {line!r}")
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def _encode_command(command: Sequence[str | bytes]) -> bytes:
+    parts = [b"*%d\r\n" % len(command)]
+    for arg in command:
+        data = arg.encode() if isinstance(arg, str) else arg
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+class RedisBackend(CacheBackend):
+    """Minimal asyncio client for the Redis protocol (RESP2).
+
+    Only the handful of commands the link cache needs. Up to ``pool_size``
+    connections are opened lazily; several commands issued together are
+    pipelined in a single write. A connection that fails or times out is
+    dropped and reopened on next use.
+    """
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 6379,
+        db: int = 0,
+        password: str | None = None,
+        pool_size: int = 8,
+        timeout: float = settings.SHARED_CACHE_TIMEOUT,
+    ):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._pool: asyncio.LifoQueue[_RedisConnection | None] = asyncio.LifoQueue()
+        for _ in range(pool_size):
+            self._pool.put_nowait(None)
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RedisBackend":
+        """Create a backend from ``redis://[:password@]host[:port][/db]``."""
+        parts = urlsplit(url)
+        if parts.scheme != "redis":
+            raise ValueError(f"Unsupported shared cache URL: {url}")
+        return cls(
+            host=parts.hostname or "localhost",
+            port=parts.port or 6379,
+            db=int(parts.path.lstrip("/") or 0),
+            password=unquote(parts.password) if parts.password else None,
+            **kwargs,
+        )
+
+    async def _connect(self) -> _RedisConnection:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        connection = _RedisConnection(reader, writer)
+        setup = []
+        if self.password:
+            setup.append(("AUTH", self.password))
+        if self.db:
+            setup.append(("SELECT", str(self.db)))
+        if setup:
+            for reply in await connection.execute(setup):
+                if isinstance(reply, RedisError):
+                    connection.close()
+                    raise reply
+        return connection
+
+    async def execute(self, *commands: Sequence[str | bytes]) -> list:
+        """Run ``commands`` as one pipeline; error replies are raised."""
+        async with asyncio.timeout(self.timeout):
+            connection = await self._pool.get()
+            try:
+                if connection is None:
+                    connection = await self._connect()
+                replies = await connection.execute(commands)
+            except BaseException:
+                # The stream may hold unread replies; never reuse it
+                if connection is not None:
+                    connection.close()
+                    connection = None
+                raise
+            finally:
+                self._pool.put_nowait(connection)
+
+        for reply in replies:
+            if isinstance(reply, RedisError):
+                raise reply
+        return replies
+
+    async def mget(self, keys: Sequence[str]) -> list[bytes | None]:
+        if not keys:
+            return []
+        [values] = await self.execute(("MGET", *keys))
+        return values
+
+    async def mset(self, items: Mapping[str, bytes], ttl: float) -> None:
+        if not items:
+            return
+        milliseconds = str(max(1, int(ttl * 1000)))
+        await self.execute(
+            *(("SET", key, value, "PX", milliseconds) for key, value in items.items())
+        )
+
+    async def delete(self, keys: Iterable[str]) -> None:
+        keys = list(keys)
+        if keys:
+            await self.execute(("DEL", *keys))
+
+    async def close(self) -> None:
+        while not self._pool.empty():
+            connection = self._pool.get_nowait()
+            if connection is not None:
+                connection.close()
+
+
+@dataclass
+class SharedCacheStats:
+    hits: int = 0
+    misses: int = 0
+    errors: int = 0
+
+
+class SharedLinkCache:
+    """Second cache tier shared by all workers, in front of the database.
+
+    Values are stored as ``b"<id>:<target>"``; an empty value is a negative
+    entry for an unknown code. The shared tier only saves database queries,
+    so backend failures are counted and treated as misses instead of failing
+    the request.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        ttl: float = settings.SHARED_CACHE_TTL,
+        negative_ttl: float = settings.LINK_CACHE_NEGATIVE_TTL,
+        prefix: str = "link:",
+    ):
+        self.backend = backend
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.prefix = prefix
+        self.stats = SharedCacheStats()
+        self._failing = False
+
+    async def get(self, code: str):
+        """Return the cached entry, ``None`` for a negative hit or ``MISSING``."""
+        return (await self.get_many([code]))[code]
+
+    async def get_many(self, codes: Sequence[str]) -> dict:
+        """Look up ``codes`` in one round-trip; absent codes map to ``MISSING``."""
+        try:
+            values = await self.backend.mget([self.prefix + code for code in codes])
+        except Exception as e:
+            self._failed(e)
+            self.stats.misses += len(codes)
+            return dict.fromkeys(codes, MISSING)
+        self._recovered()
+
+        found = {}
+        for code, value in zip(codes, values, strict=True):
+            if value is None:
+                self.stats.misses += 1
+                found[code] = MISSING
+            else:
+                self.stats.hits += 1
+                found[code] = _decode(value)
+        return found
+
+    async def set(self, code: str, value: CachedLink | None) -> None:
+        await self.set_many({code: value})
+
+    async def set_many(self, entries: Mapping[str, CachedLink | None]) -> None:
+        positive = {
+            self.prefix + code: _encode(value)
+            for code, value in entries.items()
+            if value is not None
+        }
+        negative = {
+            self.prefix + code: b"" for code, value in entries.items() if value is None
+        }
+        try:
+            if positive and self.ttl > 0:
+                await self.backend.mset(positive, self.ttl)
+            if negative and self.negative_ttl > 0:
+                await self.backend.mset(negative, self.negative_ttl)
+        except Exception as e:
+            self._failed(e)
+        else:
+            self._recovered()
+
+    async def invalidate(self, codes: Iterable[str]) -> None:
+        try:
+            await self.backend.delete(self.prefix + code for code in codes)
+        except Exception as e:
+            self._failed(e)
+        else:
+            self._recovered()
+
+    async def close(self) -> None:
+        await self.backend.close()
+
+    def _failed(self, error: Exception) -> None:
+        self.stats.errors += 1
+        # Log state changes only, not every failed request
+        if not self._failing:
+            self._failing = True
+            logger.error(msg="Shared cache unavailable", exc_info=error)
+
+    def _recovered(self) -> None:
+        if self._failing:
+            self._failing = False
+            logger.info("Shared cache available again")
+
+
+def _encode(link: CachedLink) -> bytes:
+    # ``id[;expires_at[;status[;max_age]]]:target``, unset trailing fields
+    # left out; entries written before these fields existed have no ``;``
+    fields = [str(link.id)]
+    fields.extend("" if value is None else repr(value) for value in link[2:])
+    while fields[-1] == "":
+        fields.pop()
+    return b"%s:%s" % (";".join(fields).encode(), link.target.encode())
+
+
+def _decode(value: bytes) -> CachedLink | None:
+    if not value:
+        return None
+    head, _, target = value.partition(b":")
+    link_id, expires_at, status, max_age = (head.split(b";") + [b""] * 3)[:4]
+    return CachedLink(
+        int(link_id),
+        target.decode(),
+        float(expires_at) if expires_at else None,
+        int(status) if status else None,
+        int(max_age) if max_age else None,
+    )
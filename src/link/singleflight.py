@@ -0,0 +1,73 @@
+import asyncio
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+__all__ = ["SingleFlight", "SingleFlightStats"]
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0
+    # Callers that joined a call already in flight instead of starting one
+    coalesced: int = 0
+    timeouts: int = 0
+    failures: int = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls for the same key into one.
+
+    The first caller for a key starts the call as a task; callers arriving
+    while it is in flight await the same task and get its result, or its
+    exception, instead of running it again. The call is abandoned after
+    ``timeout`` seconds, and every waiter then gets ``TimeoutError``; the key
+    is free again as soon as the call finishes either way.
+
+    The call may use resources owned by the first caller (its database
+    session), so if that caller is cancelled it still waits for the call to
+    finish before propagating the cancellation. Other waiters are unaffected.
+    """
+
+    def __init__(self, timeout: float | None = None):
+        self.timeout = timeout
+        self.stats = SingleFlightStats()
+        self._calls: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def run(
+        self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args: Any
+    ) -> Any:
+        task = self._calls.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+            return await asyncio.shield(task)
+
+        self.stats.calls += 1
+        task = asyncio.create_task(self._call(fn, args))
+        self._calls[key] = task
+        task.add_done_callback(lambda done: self._finished(key, done))
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done():
+                await asyncio.wait([task])
+            raise
+
+    async def _call(self, fn: Callable[..., Awaitable[Any]], args: tuple) -> Any:
+        async with asyncio.timeout(self.timeout):
+            return await fn(*args)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if task.cancelled():
+            return
+        # Retrieved here so it is not reported as lost when nobody waits
+        error = task.exception()
+        if isinstance(error, TimeoutError):
+            self.stats.timeouts += 1
+        elif error is not None:
+            self.stats.failures += 1
@@ -0,0 +1,314 @@
+import asyncio
+import bisect
+import mmap
+import os
+import shutil
+import struct
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from contextlib import suppress
+from datetime import datetime
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.conf import settings
+from src.logger import logger
+
+from .cache import CachedLink
+from .repo import LinkRepo
+
+__all__ = [
+    "RedirectSnapshot",
+    "SnapshotLoader",
+    "SnapshotWriter",
+    "export_snapshot",
+]
+
+# File layout, little-endian:
+#   header       magic, version, link count, export time
+#   code index   ``count`` sorted unsigned 64-bit keys, one per code (``key``)
+#   offset table ``count`` records: id, target offset and length in the heap,
+#                redirect status (0: global), max-age (-1: global) and
+#                expiry (0: never)
+#   target heap  UTF-8 targets, back to back
+MAGIC = b"URLSNAP\0"
+VERSION = 1
+HEADER = struct.Struct("<8sIQd4x")
+RECORD = struct.Struct("<qQIHid")
+KEY = struct.Struct("<Q")
+# Longer codes are left to the database; base62 codes of up to 8 characters
+# are far more than SHORT_URL_LENGTH issues
+MAX_CODE_LENGTH = KEY.size
+
+
+def key(code: str) -> int | None:
+    """Integer ordered like the code's bytes, ``None`` if it cannot be indexed.
+
+    Only base62 codes are indexed: the NUL padding must never be part of a
+    code, or ``abc\\0`` would find ``abc``.
+    """
+    if len(code) > MAX_CODE_LENGTH or not (code.isascii() and code.isalnum()):
+        return None
+    return int.from_bytes(code.encode().ljust(MAX_CODE_LENGTH, b"\0"), "big")
+
+
+class SnapshotWriter:
+    """Writes links, added in increasing code order, to a snapshot file.
+
+    The sections are spooled to temporary files next to ``path`` and only
+    assembled on ``commit``, which replaces ``path`` with a single rename:
+    a loader sees either the previous snapshot or the complete new one.
+    Codes longer than ``MAX_CODE_LENGTH`` are skipped.
+    """
+
+    def __init__(self, path: str | os.PathLike, created_at: float | None = None):
+        self.path = Path(path)
+        self.created_at = time.time() if created_at is None else created_at
+        self.count = 0
+        self.skipped = 0
+        self._sections = [
+            tempfile.TemporaryFile(dir=self.path.parent) for _ in range(3)
+        ]
+        self._heap_size = 0
+        self._last = 0
+
+    def add(self, code: str, link: CachedLink) -> None:
+        code_key = key(code)
+        if code_key is None:
+            self.skipped += 1
+            return
+        if code_key <= self._last:
+            raise ValueError(f"Codes must be added in increasing order: {code!r}")
+        self._last = code_key
+
+        codes, records, heap = self._sections
+        target = link.target.encode()
+        codes.write(KEY.pack(code_key))
+        records.write(
+            RECORD.pack(
+                link.id,
+                self._heap_size,
+                len(target),
+                link.status or 0,
+                -1 if link.max_age is None else link.max_age,
+                link.expires_at or 0.0,
+            )
+        )
+        heap.write(target)
+        self._heap_size += len(target)
+        self.count += 1
+
+    def commit(self) -> None:
+        header = HEADER.pack(MAGIC, VERSION, self.count, self.created_at)
+        with tempfile.NamedTemporaryFile(
+            dir=self.path.parent, prefix=f".{self.path.name}.", delete=False
+        ) as output:
+            try:
+                output.write(header)
+                for section in self._sections:
+                    section.seek(0)
+                    shutil.copyfileobj(section, output, 2**20)
+                output.flush()
+                os.fsync(output.fileno())
+            except BaseException:
+                os.unlink(output.name)
+                raise
+        os.replace(output.name, self.path)
+        self.close()
+
+    def close(self) -> None:
+        for section in self._sections:
+            section.close()
+
+    def __enter__(self) -> "SnapshotWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.commit()
+        else:
+            self.close()
+
+
+class RedirectSnapshot:
+    """Read-only, memory-mapped ``code -> link`` map written by ``SnapshotWriter``.
+
+    Lookups binary-search the code index in place with ``bisect``, which
+    walks it in C: no Python object is kept per link, pages are loaded by
+    the OS on first access, and every worker mapping the same file shares
+    them through the page cache.
+    """
+
+    def __init__(self, path: str | os.PathLike):
+        if sys.byteorder != "little":
+            raise RuntimeError("Redirect snapshots are only mapped on little-endian")
+        self.path = Path(path)
+        with open(self.path, "rb") as file:
+            try:
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                raise ValueError(f"Empty redirect snapshot: {self.path}") from None
+        try:
+            self._read_header()
+        except Exception:
+            self._map.close()
+            raise
+        if hasattr(self._map, "madvise"):
+            # Lookups touch a few scattered pages each; read-ahead only evicts
+            self._map.madvise(mmap.MADV_RANDOM)
+
+    def _read_header(self) -> None:
+        size = len(self._map)
+        if size < HEADER.size:
+            raise ValueError(f"Not a redirect snapshot: {self.path}")
+        magic, version, count, created_at = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a redirect snapshot: {self.path}")
+        self.count = count
+        self.created_at = created_at
+        self._records = HEADER.size + count * KEY.size
+        self._heap = self._records + count * RECORD.size
+        if self._heap > size:
+            raise ValueError(f"Truncated redirect snapshot: {self.path}")
+        self._codes = memoryview(self._map)[HEADER.size : self._records].cast("Q")
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def size_bytes(self) -> int:
+        return len(self._map)
+
+    def get(self, code: str) -> CachedLink | None:
+        """The link of ``code``, or ``None`` when it is not in the snapshot."""
+        code_key = key(code)
+        if code_key is None:
+            return None
+        codes = self._codes
+        index = bisect.bisect_left(codes, code_key)
+        if index == self.count or codes[index] != code_key:
+            return None
+        return self._link(index)
+
+    def _link(self, index: int) -> CachedLink:
+        link_id, offset, length, status, max_age, expires_at = RECORD.unpack_from(
+            self._map, self._records + index * RECORD.size
+        )
+        start = self._heap + offset
+        return CachedLink(
+            link_id,
+            self._map[start : start + length].decode(),
+            expires_at or None,
+            status or None,
+            None if max_age < 0 else max_age,
+        )
+
+    def close(self) -> None:
+        # The index view must go first, mmap refuses to close while exported
+        self._codes.release()
+        self._map.close()
+
+
+async def export_snapshot(
+    path: str | os.PathLike,
+    session: AsyncSession,
+    chunk_size: int = 10_000,
+    now: datetime | None = None,
+) -> SnapshotWriter:
+    """Stream the servable links into a snapshot at ``path``.
+
+    Links created after the export starts, or after the rows were read on
+    a lagging replica, are simply missing and resolved from the database.
+    Returns the committed writer, for its ``count`` and ``skipped``.
+    """
+    now = now or datetime.now()
+    with SnapshotWriter(path, created_at=now.timestamp()) as writer:
+        async for rows in LinkRepo.stream_snapshot(session, now, chunk_size):
+            for code, *columns in rows:
+                writer.add(code, CachedLink.from_row(*columns))
+    return writer
+
+
+class SnapshotLoader:
+    """Keeps the newest snapshot at ``path`` mapped and hands it to ``on_load``.
+
+    The file is checked every ``interval`` seconds with a ``stat``; when a
+    new one has landed it is mapped, passed to ``on_load`` and the previous
+    snapshot is closed. Lookups never await, so none can be running on the
+    old mapping at that point. A missing or invalid file keeps the current
+    snapshot.
+    """
+
+    def __init__(
+        self,
+        path: str | None = settings.REDIRECT_SNAPSHOT_PATH,
+        interval: float = settings.REDIRECT_SNAPSHOT_RELOAD_INTERVAL,
+        on_load: Callable[[RedirectSnapshot | None], None] | None = None,
+    ):
+        self.path = path
+        self.interval = interval
+        self.on_load = on_load
+        self.snapshot: RedirectSnapshot | None = None
+        self.loads = 0
+        self._stamp: tuple | None = None
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def reload(self) -> bool:
+        """Map the file if it changed since the last call; whether it did."""
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        stamp = (stat.st_dev, stat.st_ino, stat.st_size, stat.st_mtime_ns)
+        if stamp == self._stamp:
+            return False
+        # Recorded first, so an invalid file is reported once, not every interval
+        self._stamp = stamp
+        snapshot = RedirectSnapshot(self.path)
+        previous, self.snapshot = self.snapshot, snapshot
+        if self.on_load is not None:
+            self.on_load(snapshot)
+        if previous is not None:
+            previous.close()
+        self.loads += 1
+        logger.info(msg=f"Loaded redirect snapshot of {len(snapshot)} links")
+        return True
+
+    def _try_reload(self) -> None:
+        try:
+            self.reload()
+        except Exception as e:
+            logger.error(msg="Could not load the redirect snapshot", exc_info=e)
+
+    async def start(self) -> None:
+        if self.path is None or self.running:
+            return
+        self._try_reload()
+        if self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name="snapshot-loader")
+
+    async def stop(self) -> None:
+        """Stop watching and unmap the current snapshot."""
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+        if self.snapshot is not None:
+            if self.on_load is not None:
+                self.on_load(None)
+            self.snapshot.close()
+            self.snapshot = None
+            self._stamp = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            self._try_reload()
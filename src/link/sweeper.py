@@ -0,0 +1,115 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from contextlib import suppress
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src import metrics
+from src.config.conf import settings
+from src.database.core import SessionLocal
+from src.logger import logger
+
+from .models import Visit, VisitRollup, VisitUtmRollup
+from .repo import LinkRepo
+from .service import SHORTENER_SERVICE
+
+__all__ = ["LINK_SWEEPER", "LinkSweeper"]
+
+
+class LinkSweeper:
+    """Background removal of expired links.
+
+    Every ``interval`` seconds, links whose ``expires_at`` is more than
+    ``grace`` seconds old are deleted (or moved to ``link_archive`` with
+    ``archive``). Their visits and rollups go first, ``visit_batch_size``
+    rows per transaction, then the links, ``batch_size`` per transaction,
+    so no lock is held for long however many visits a link has. Until then expired links
+    answer 410 instead of 404. Codes of removed links are handed to
+    ``on_swept`` (cache invalidation).
+    """
+
+    def __init__(
+        self,
+        sessionmaker: async_sessionmaker[AsyncSession] = SessionLocal,
+        interval: float = settings.LINK_SWEEP_INTERVAL,
+        batch_size: int = settings.LINK_SWEEP_BATCH_SIZE,
+        visit_batch_size: int = settings.LINK_SWEEP_VISIT_BATCH_SIZE,
+        grace: float = settings.LINK_SWEEP_GRACE,
+        archive: bool = settings.LINK_SWEEP_ARCHIVE,
+        on_swept: Callable[[list[str]], Awaitable[None]] | None = None,
+    ):
+        self.sessionmaker = sessionmaker
+        self.interval = interval
+        self.batch_size = batch_size
+        self.visit_batch_size = visit_batch_size
+        self.grace = grace
+        self.archive = archive
+        self.on_swept = on_swept
+        self.swept = 0
+        self._task: asyncio.Task | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    async def start(self) -> None:
+        if self.running or self.interval <= 0:
+            return
+        self._task = asyncio.create_task(self._run(), name="link-sweeper")
+
+    async def stop(self) -> None:
+        """Stop the background task, abandoning the current batch if any."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def sweep(self, now: datetime | None = None) -> int:
+        """Remove every link expired before the grace period, batch by batch.
+
+        Returns the number of links removed.
+        """
+        before = (now or datetime.now()) - timedelta(seconds=self.grace)
+        for dependent in (Visit, VisitRollup, VisitUtmRollup):
+            while True:
+                async with self.sessionmaker() as session:
+                    deleted = await LinkRepo.delete_expired_dependents(
+                        dependent, before, self.visit_batch_size, session
+                    )
+                    await session.commit()
+                if deleted < self.visit_batch_size:
+                    break
+        total = 0
+        while True:
+            async with self.sessionmaker() as session:
+                codes = await LinkRepo.sweep_expired(
+                    before, self.batch_size, session, archive=self.archive
+                )
+                await session.commit()
+            total += len(codes)
+            self.swept += len(codes)
+            if codes and self.on_swept is not None:
+                await self.on_swept(codes)
+            if len(codes) < self.batch_size:
+                return total
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                swept = await self.sweep()
+            except Exception as e:
+                logger.error(msg="Error sweeping expired links", exc_info=e)
+            else:
+                if swept:
+                    logger.info(msg=f"Swept {swept} expired links")
+            await asyncio.sleep(self.interval)
+
+
+LINK_SWEEPER = LinkSweeper(on_swept=SHORTENER_SERVICE.invalidate)
+
+metrics.Counter("links_swept_total", "Expired links removed").set_function(
+    lambda: LINK_SWEEPER.swept
+)
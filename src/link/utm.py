@@ -0,0 +1,96 @@
+import hashlib
+from collections import OrderedDict
+from collections.abc import Iterable
+from typing import NamedTuple
+from urllib.parse import parse_qsl
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.conf import settings
+
+from .repo import UtmSetRepo
+
+__all__ = ["UTM_DIMENSIONS", "Utm", "UtmSetIds", "parse_utm"]
+
+UTM_DIMENSIONS = ("source", "medium", "campaign", "term", "content")
+# Longer values are cut, so a crafted URL cannot bloat utm_set
+MAX_VALUE_LENGTH = 200
+
+
+class Utm(NamedTuple):
+    """The ``utm_*`` parameters of a redirect request."""
+
+    source: str | None = None
+    medium: str | None = None
+    campaign: str | None = None
+    term: str | None = None
+    content: str | None = None
+
+    @property
+    def digest(self) -> bytes:
+        """Key of the parameter set in ``utm_set``."""
+        # Unit separator, removed from values by ``parse_utm``
+        joined = "\x1f".join(value or "" for value in self)
+        return hashlib.sha256(joined.encode()).digest()
+
+
+def parse_utm(query: str | bytes) -> Utm | None:
+    """UTM parameters of a query string, ``None`` when there are none."""
+    # Most redirects carry no query string at all
+    if isinstance(query, bytes):
+        if b"utm_" not in query:
+            return None
+        query = query.decode("latin-1")
+    elif "utm_" not in query:
+        return None
+    values = {}
+    for key, value in parse_qsl(query):
+        name = key.removeprefix("utm_")
+        if name != key and name in UTM_DIMENSIONS and value:
+            values.setdefault(name, value.replace("\x1f", "")[:MAX_VALUE_LENGTH])
+    return Utm(**values) if values else None
+
+
+class UtmSetIds:
+    """Per-worker LRU mapping UTM parameter sets to their ``utm_set`` ids.
+
+    Campaigns reuse a handful of parameter sets, so once seen a set costs
+    no query; unknown sets are created or looked up in one batch.
+    """
+
+    def __init__(self, max_size: int = settings.UTM_CACHE_SIZE):
+        self.max_size = max_size
+        self.misses = 0
+        self._ids: OrderedDict[Utm, int] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    async def resolve(
+        self, utms: Iterable[Utm], session: AsyncSession
+    ) -> dict[Utm, int]:
+        """Ids of ``utms``; unknown sets are stored and committed first."""
+        ids = {}
+        missing = []
+        for utm in set(utms):
+            utm_set_id = self._ids.get(utm)
+            if utm_set_id is None:
+                missing.append(utm)
+            else:
+                self._ids.move_to_end(utm)
+                ids[utm] = utm_set_id
+        if missing:
+            self.misses += len(missing)
+            # Committed before use, so cached ids always refer to stored rows
+            found = await UtmSetRepo.get_or_create_many(missing, session)
+            for utm in missing:
+                ids[utm] = found[utm.digest]
+                self._add(utm, ids[utm])
+        return ids
+
+    def _add(self, utm: Utm, utm_set_id: int) -> None:
+        if self.max_size <= 0:
+            return
+        self._ids[utm] = utm_set_id
+        while len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
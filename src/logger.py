@@ -1,89 +1,177 @@
-import functools
+import atexit
+import json
 import logging
-from collections.abc import Callable
-from datetime import datetime
+import queue
+import random
+import time
+from collections.abc import Callable, Mapping
+from logging.handlers import QueueHandler, QueueListener
 from typing import Any
 
-from fastapi import Request
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-    handlers=[logging.StreamHandler()],
-)
+from src.config.conf import settings
 
 logger = logging.getLogger(__name__)
+access_logger = logging.getLogger("src.access")
+
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+
 
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line.
 
-def log_request_info(func: Callable[..., Any]) -> Callable[..., Any]:
+    Access records carry their fields in ``record.access`` and are merged
+    into the top-level object.
     """
-    Decorator to log request source IP and timestamp for FastAPI router endpoints.
 
-    This decorator extracts the client IP address and logs it along with the current
-    timestamp when a request is made to the decorated endpoint.
+    def format(self, record: logging.LogRecord) -> str:
+        data = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        access = getattr(record, "access", None)
+        if access:
+            data.update(access)
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, default=str)
+
+
+class LazyQueueHandler(QueueHandler):
+    """``QueueHandler`` that leaves all formatting to the listener thread.
+
+    The stock handler formats the message in ``prepare`` on the calling
+    thread; records only travel through an in-process queue here, so they
+    can be passed along untouched.
+    """
 
-    Args:
-        func: The FastAPI router function to decorate
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        return record
 
-    Returns:
-        The decorated function with request logging functionality
+
+def setup_logging(
+    level: str = settings.LOG_LEVEL,
+    fmt: str = settings.LOG_FORMAT,
+    handlers: list[logging.Handler] | None = None,
+) -> QueueListener:
+    """Route every log record through a queue drained by a background thread.
+
+    Handler I/O (``handlers``, stderr by default) happens on the listener
+    thread, so a slow log sink never blocks the event loop.
+    """
+    if handlers is None:
+        handlers = [logging.StreamHandler()]
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+    root.addHandler(LazyQueueHandler(log_queue))
+    root.setLevel(level)
+
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+
+class AccessLogMiddleware:
+    """Pure ASGI middleware writing one structured access record per request.
+
+    ``sample_rates`` maps endpoint names (e.g. ``"redirect_to_url"``) to the
+    fraction of their requests that are logged; other endpoints use
+    ``default_rate``.
     """
 
-    @functools.wraps(func)
-    async def wrapper(*args, **kwargs):
-        # Find the Request object in the function arguments
-        request = kwargs.get("request")
-        if request is None:
-            for arg in args:
-                if isinstance(arg, Request):
-                    request = arg
-                    break
-
-        if request is not None:
-            # Get client IP (handling potential proxy headers)
-            client_ip = get_client_ip(request)
-            timestamp = datetime.now().isoformat()
-
-            # Log the request information
-            logger.info(
-                f"Request {request.method} {request.url.path} from IP: {client_ip} at {timestamp}"
-            )
-        else:
-            # Fallback if Request object is not found
-            timestamp = datetime.now().isoformat()
-            logger.info(
-                f"Request at {timestamp} - Request object not found in function parameters"
-            )
-
-        # Call the original function
-        return await func(*args, **kwargs)
-
-    return wrapper
-
-
-def get_client_ip(request: Request) -> str:
+    def __init__(
+        self,
+        app,
+        sample_rates: Mapping[str, float] | None = None,
+        default_rate: float = settings.ACCESS_LOG_SAMPLE_RATE,
+        rng: Callable[[], float] = random.random,
+    ):
+        self.app = app
+        self.sample_rates = dict(sample_rates or {})
+        self.default_rate = default_rate
+        self.rng = rng
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not access_logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            endpoint = scope.get("endpoint")
+            name = getattr(endpoint, "__name__", None)
+            rate = self.sample_rates.get(name, self.default_rate)
+            if rate >= 1 or self.rng() < rate:
+                self._log(scope, status_code, time.perf_counter() - start)
+
+    def _log(self, scope, status_code: int, duration: float) -> None:
+        # Arguments are only interpolated by the listener thread
+        access_logger.info(
+            "%s %s %s",
+            scope["method"],
+            scope["path"],
+            status_code,
+            extra={
+                "access": {
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "duration_ms": round(duration * 1000, 3),
+                    "client_ip": get_client_ip(scope),
+                }
+            },
+        )
+
+
+def get_client_ip(scope: dict[str, Any]) -> str:
     """
-    Extract the client IP address from the request, considering proxy headers.
+    Extract the client IP address from an ASGI scope, considering proxy headers.
 
     Args:
-        request: FastAPI Request object
+        scope: ASGI HTTP connection scope
 
     Returns:
         Client IP address as string
     """
-    # Check for common proxy headers first
-    forwarded_for = request.headers.get("X-Forwarded-For")
+    forwarded_for = real_ip = None
+    for name, value in scope.get("headers", ()):
+        if name == b"x-forwarded-for":
+            forwarded_for = value
+        elif name == b"x-real-ip":
+            real_ip = value
+
     if forwarded_for:
         # X-Forwarded-For can contain multiple IPs, get the first one (original client)
-        return forwarded_for.split(",")[0].strip()
+        return forwarded_for.split(b",")[0].strip().decode("latin-1")
 
-    real_ip = request.headers.get("X-Real-IP")
     if real_ip:
-        return real_ip.strip()
+        return real_ip.strip().decode("latin-1")
 
     # Fallback to the direct client IP
-    if request.client:
-        return request.client.host
+    client = scope.get("client")
+    if client:
+        return client[0]
 
     return "unknown"
+
+
+setup_logging()
@@ -1,10 +1,97 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
+
 import uvicorn
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from src.config.conf import settings
+from src.database.core import dispose_engines, engine, replica_engines
+from src.database.partitions import maintain_partitions
+from src.fastpath import RedirectFastPath
+from src.link.recorder import VISIT_RECORDER
+from src.link.service import SHORTENER_SERVICE, SNAPSHOT_LOADER
+from src.link.sweeper import LINK_SWEEPER
+from src.logger import AccessLogMiddleware, logger
+from src.metrics import MetricsMiddleware
 from src.routers import router
+from src.warmup import listen_for_broadcasts, warm_up
+
+
+async def create_visit_partitions() -> None:
+    """Make sure the coming months of visits have a partition to go to.
+
+    Checked on start-up and every ``VISIT_PARTITIONS_INTERVAL`` seconds, so
+    a long-running worker never outlives the partitions created ahead.
+    Expired partitions are only ever purged by ``manage.py partitions``.
+    """
+    while True:
+        try:
+            await maintain_partitions(
+                engine, "visit", "visited_at", ahead=settings.VISIT_PARTITIONS_AHEAD
+            )
+        except Exception as e:
+            logger.error(msg="Could not create visit partitions", exc_info=e)
+        if settings.VISIT_PARTITIONS_INTERVAL <= 0:
+            return
+        await asyncio.sleep(settings.VISIT_PARTITIONS_INTERVAL)
+
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.ready = False
+    await VISIT_RECORDER.start()
+    await LINK_SWEEPER.start()
+    # Mapped before serving, so the first requests skip the database too
+    await SNAPSHOT_LOADER.start()
+    listen = settings.CACHE_WARM_BROADCAST and engine.dialect.name == "postgresql"
+    # Built by the listener once LISTEN is active; warm-up waits for it
+    filter_ready = asyncio.Event() if listen else None
+    # In the background so /health answers while connections are opened
+    warm_up_task = asyncio.create_task(
+        warm_up(
+            app,
+            [engine, *replica_engines] if settings.STARTUP_WARM_POOL else [],
+            connections=settings.DATABASE_ENGINE_POOL_SIZE,
+            cache_size=settings.STARTUP_WARM_CACHE_SIZE,
+            # Other workers' codes only reach the filter through broadcasts
+            code_filter=(
+                engine.dialect.name != "postgresql" or settings.CACHE_WARM_BROADCAST
+            ),
+            filter_ready=filter_ready,
+        )
+    )
+    background = [warm_up_task]
+    if engine.dialect.name == "postgresql":
+        background.append(asyncio.create_task(create_visit_partitions()))
+    if listen:
+        background.append(
+            asyncio.create_task(
+                listen_for_broadcasts(engine, filter_ready=filter_ready)
+            )
+        )
+    try:
+        yield
+    finally:
+        for task in background:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        app.state.ready = False
+        await LINK_SWEEPER.stop()
+        await SNAPSHOT_LOADER.stop()
+        # Drain queued visits before the process exits
+        await VISIT_RECORDER.stop()
+        await dispose_engines()
+        if SHORTENER_SERVICE.shared_cache is not None:
+            await SHORTENER_SERVICE.shared_cache.close()
+
+
+app = FastAPI(lifespan=lifespan)
+
+if settings.REDIRECT_FAST_PATH:
+    # Innermost middleware: still wrapped by CORS, metrics and access logging
+    app.add_middleware(RedirectFastPath, routes=app.routes)
 
 origins = ["*"]
 app.add_middleware(
@@ -14,8 +101,15 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
+# Added last so it wraps every other middleware and times the whole request
+app.add_middleware(
+    AccessLogMiddleware,
+    sample_rates={"redirect_to_url": settings.ACCESS_LOG_REDIRECT_SAMPLE_RATE},
+)
 
 app.include_router(router)
 
 if __name__ == "__main__":
+    # Single process; see src/serve.py for multi-worker serving
     uvicorn.run(app, host="0.0.0.0", port=8000)
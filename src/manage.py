@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""Operational commands for a running deployment.
+
+Usage:
+    python src/manage.py warm-cache --top 10000
+    python src/manage.py warm-cache --code abc123 --code def456
+    python src/manage.py warm-cache --codes-file campaign_codes.txt
+    python src/manage.py partitions --retention 12
+    python src/manage.py snapshot --output /var/lib/shortener/links.snap
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+
+def warm_cache(args: argparse.Namespace) -> int:
+    codes = list(args.code or [])
+    if args.codes_file:
+        lines = Path(args.codes_file).read_text().splitlines()
+        codes.extend(line.strip() for line in lines if line.strip())
+    if (args.top is None) == (not codes):
+        print("Give either --top or --code/--codes-file", file=sys.stderr)
+        return 2
+
+    response = httpx.post(
+        f"{args.url.rstrip('/')}/api/v1/link/cache/warm",
+        json={
+            "top": args.top,
+            "codes": codes or None,
+            "broadcast": not args.no_broadcast,
+        },
+        headers={"X-Admin-Token": args.token or ""},
+        timeout=args.timeout,
+    )
+    if response.is_error:
+        print(
+            f"Warm-up failed: {response.status_code} {response.text}", file=sys.stderr
+        )
+        return 1
+
+    report = response.json()
+    print(
+        f"Loaded {report['links']} links ({report['shared']} from the shared "
+        f"cache) in {report['chunks']} chunks "
+        f"in {report['seconds']:.3f}s, ~{report['memory_bytes'] / 2**20:.1f} MiB "
+        f"on worker {report['instance']}"
+    )
+    if report["broadcast"]:
+        print("Broadcast to the other workers, which load the same links")
+    return 0
+
+
+def partitions(args: argparse.Namespace) -> int:
+    # Imported here: loading the database modules opens the engines
+    from src.database.core import dispose_engines, engine  # noqa: PLC0415
+    from src.database.partitions import maintain_partitions  # noqa: PLC0415
+
+    async def run():
+        try:
+            return await maintain_partitions(
+                engine,
+                "visit",
+                "visited_at",
+                ahead=args.ahead,
+                retention=args.retention,
+                keep_detached=args.keep_detached,
+            )
+        finally:
+            await dispose_engines()
+
+    report = asyncio.run(run())
+    if not report.partitioned:
+        print(f"visit is not partitioned; deleted {report.deleted} expired visits")
+        return 0
+    print(f"Created partitions: {', '.join(report.created) or 'none'}")
+    print(f"Detached partitions: {', '.join(report.detached) or 'none'}")
+    print(f"Dropped partitions: {', '.join(report.dropped) or 'none'}")
+    return 0
+
+
+def snapshot(args: argparse.Namespace) -> int:
+    # Imported here: loading the database modules opens the engines
+    from src.database.core import (  # noqa: PLC0415
+        DATABASE,
+        dispose_engines,
+        session_scope,
+    )
+    from src.link.snapshot import export_snapshot  # noqa: PLC0415
+
+    async def run():
+        try:
+            async with session_scope(DATABASE.read_session()) as session:
+                return await export_snapshot(
+                    args.output, session, chunk_size=args.chunk_size
+                )
+        finally:
+            await dispose_engines()
+
+    start = time.perf_counter()
+    writer = asyncio.run(run())
+    size = Path(args.output).stat().st_size
+    print(
+        f"Exported {writer.count} links to {args.output} "
+        f"({size / 2**20:.1f} MiB) in {time.perf_counter() - start:.1f}s"
+    )
+    if writer.skipped:
+        print(f"Skipped {writer.skipped} links with codes too long to index")
+    return 0
+
+
+def main(argv: list[str] | None = None) -> int:
+    # Imported once the project root is on the path
+    from src.config.conf import settings  # noqa: PLC0415
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    warm = commands.add_parser(
+        "warm-cache", help="Load links into the redirect cache of every worker"
+    )
+    warm.add_argument("--top", type=int, help="Number of most visited links")
+    warm.add_argument("--code", action="append", help="Short code to load")
+    warm.add_argument("--codes-file", help="File with one short code per line")
+    warm.add_argument("--url", default=settings.DEFAULT_DOMAIN)
+    warm.add_argument("--token", default=settings.ADMIN_TOKEN)
+    warm.add_argument("--timeout", type=float, default=300.0)
+    warm.add_argument(
+        "--no-broadcast",
+        action="store_true",
+        help="Only warm the worker that receives the request",
+    )
+    warm.set_defaults(handler=warm_cache)
+
+    maintain = commands.add_parser(
+        "partitions",
+        help="Create upcoming visit partitions and purge the expired ones",
+    )
+    maintain.add_argument(
+        "--ahead",
+        type=int,
+        default=settings.VISIT_PARTITIONS_AHEAD,
+        help="Months of partitions to create after the current one",
+    )
+    maintain.add_argument(
+        "--retention",
+        type=int,
+        default=settings.VISIT_RETENTION_MONTHS,
+        help="Months of visits to keep before the current one (default: all)",
+    )
+    maintain.add_argument(
+        "--keep-detached",
+        action="store_true",
+        help="Detach expired partitions without dropping them, e.g. to archive",
+    )
+    maintain.set_defaults(handler=partitions)
+
+    export = commands.add_parser(
+        "snapshot",
+        help="Export servable links to a memory-mapped redirect snapshot",
+    )
+    export.add_argument(
+        "--output",
+        default=settings.REDIRECT_SNAPSHOT_PATH,
+        required=settings.REDIRECT_SNAPSHOT_PATH is None,
+        help="Snapshot file, replaced atomically (default: REDIRECT_SNAPSHOT_PATH)",
+    )
+    export.add_argument("--chunk-size", type=int, default=10_000)
+    export.set_defaults(handler=snapshot)
+
+    args = parser.parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,15 @@
-from fastapi import APIRouter, Depends, Request, status
+from fastapi import APIRouter, Depends, Request, Response, status
 from fastapi.responses import JSONResponse, RedirectResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.database.core import get_session
-from src.link.service import SHORTENER_SERVICE, VISIT_SERVICE
+from src.database.core import get_read_session
+from src.http_cache import cache_control
+from src.link.recorder import VISIT_RECORDER
+from src.link.service import SHORTENER_SERVICE
+from src.link.utm import parse_utm
+from src.metrics import CONTENT_TYPE, REGISTRY
 
 from .link.api.v1.routers import router as link_v1_router
-from .logger import log_request_info, logger
 
 router = APIRouter()
 api_router = APIRouter(prefix="/api")
@@ -18,20 +21,46 @@ v1_router.include_router(link_v1_router, prefix="/link")
 api_router.include_router(v1_router)
 
 
+# Declared before the catch-all redirect route so they are matched first
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@router.get("/health", include_in_schema=False)
+async def health():
+    """Liveness probe; never touches the database."""
+    return {"status": "ok"}
+
+
+@router.get("/ready", include_in_schema=False)
+async def ready(request: Request):
+    """Readiness probe; fails until start-up warm-up has finished."""
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(
+            content={"status": "starting"},
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+    return {"status": "ready"}
+
+
 @router.get(
     "/{short_code}",
     responses={
         status.HTTP_307_TEMPORARY_REDIRECT: {
-            "description": "Temporary redirect to the target URL",
+            "description": "Redirect to the target URL (301, 302 or 308 when "
+            "configured, see REDIRECT_STATUS)",
         },
         status.HTTP_404_NOT_FOUND: {
             "description": "Link not found",
         },
+        status.HTTP_410_GONE: {
+            "description": "Link expired",
+        },
     },
 )
-@log_request_info
 async def redirect_to_url(
-    request: Request, short_code: str, session: AsyncSession = Depends(get_session)
+    short_code: str, request: Request, session: AsyncSession = Depends(get_read_session)
 ):
     link = await SHORTENER_SERVICE.get_target(short_code, session)
     if not link:
@@ -39,17 +68,19 @@ async def redirect_to_url(
             content={"detail": "Link not found"},
             status_code=status.HTTP_404_NOT_FOUND,
         )
-    try:
-        await VISIT_SERVICE.create_visit(link.id, session, commit=False)
-        await SHORTENER_SERVICE.update_visits_count(link.id, session, commit=False)
-    except Exception as e:
-        logger.error(
-            msg=f"Error updating visits: {link.id}",
-            exc_info=e,
+    # Expiry is cached with the target, so this needs no query
+    if link.expired():
+        return JSONResponse(
+            content={"detail": "Link expired"},
+            status_code=status.HTTP_410_GONE,
         )
-    await session.commit()
+    # Persisted in batches by the background recorder
+    await VISIT_RECORDER.record(link.id, parse_utm(request.url.query))
+    status_code, max_age = SHORTENER_SERVICE.redirect_policy(link)
     return RedirectResponse(
-        url=link.target, status_code=status.HTTP_307_TEMPORARY_REDIRECT
+        url=link.target,
+        status_code=status_code,
+        headers={"cache-control": cache_control(max_age)},
     )
 
 
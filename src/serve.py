@@ -0,0 +1,130 @@
+"""Multi-process server entry point.
+
+Run with ``python -m src.serve [--workers N]``. Workers are separate
+processes, each with its own event loop and connection pools; when
+``DATABASE_MAX_CONNECTIONS`` is set, the pools are sized so that all workers
+together stay within that many connections per database.
+
+On SIGTERM every worker stops accepting connections, finishes in-flight
+requests (for up to ``SERVER_GRACEFUL_TIMEOUT`` seconds) and then runs the
+application shutdown, which flushes queued visits and closes the pools.
+"""
+
+import argparse
+import importlib.util
+import os
+
+import uvicorn
+
+from src.config.conf import settings
+from src.logger import logger
+
+APP = "src.main:app"
+
+
+def worker_pool_limits(
+    budget: int, workers: int, pool_size: int, max_overflow: int
+) -> tuple[int, int]:
+    """Split ``budget`` connections across ``workers`` pools.
+
+    Returns the per-worker ``(pool_size, max_overflow)``. The configured values
+    are kept if they already fit; otherwise they are scaled down keeping their
+    ratio, with at least one persistent connection per worker.
+    """
+    per_worker = budget // workers
+    if per_worker < 1:
+        raise ValueError(
+            f"A budget of {budget} connections cannot serve {workers} workers"
+        )
+    total = pool_size + max_overflow
+    if total <= per_worker:
+        return pool_size, max_overflow
+    size = max(1, per_worker * pool_size // total)
+    return size, per_worker - size
+
+
+def best_available(*candidates: str) -> str:
+    """First of ``candidates`` that can be imported; the last one otherwise."""
+    for name in candidates[:-1]:
+        if importlib.util.find_spec(name) is not None:
+            return name
+    return candidates[-1]
+
+
+def configure_pools(workers: int) -> None:
+    if settings.DATABASE_MAX_CONNECTIONS is None:
+        return
+    budget = settings.DATABASE_MAX_CONNECTIONS
+    replica_size = settings.DATABASE_REPLICA_POOL_SIZE
+    replica_overflow = settings.DATABASE_REPLICA_MAX_OVERFLOW
+    limits = {
+        ("DATABASE_REPLICA_POOL_SIZE", "DATABASE_REPLICA_MAX_OVERFLOW"): (
+            worker_pool_limits(
+                budget,
+                workers,
+                settings.DATABASE_ENGINE_POOL_SIZE
+                if replica_size is None
+                else replica_size,
+                settings.DATABASE_ENGINE_MAX_OVERFLOW
+                if replica_overflow is None
+                else replica_overflow,
+            )
+        ),
+    }
+    if settings.CACHE_WARM_BROADCAST:
+        # Each worker holds one extra primary connection listening for
+        # broadcasts; replicas never get one
+        budget -= workers
+    limits["DATABASE_ENGINE_POOL_SIZE", "DATABASE_ENGINE_MAX_OVERFLOW"] = (
+        worker_pool_limits(
+            budget,
+            workers,
+            settings.DATABASE_ENGINE_POOL_SIZE,
+            settings.DATABASE_ENGINE_MAX_OVERFLOW,
+        )
+    )
+    # Worker processes are spawned and read their settings from the
+    # environment; a single in-process worker uses the loaded settings
+    for names, values in limits.items():
+        for name, value in zip(names, values, strict=True):
+            os.environ[name] = str(value)
+            setattr(settings, name, value)
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Serve the URL shortener.")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=settings.SERVER_WORKERS or os.cpu_count() or 1,
+    )
+    parser.add_argument(
+        "--graceful-timeout", type=float, default=settings.SERVER_GRACEFUL_TIMEOUT
+    )
+    args = parser.parse_args(argv)
+
+    configure_pools(args.workers)
+    loop = best_available("uvloop", "asyncio")
+    http = best_available("httptools", "h11")
+    logger.info(
+        f"Starting {args.workers} workers (loop={loop}, http={http}, "
+        f"pool_size={settings.DATABASE_ENGINE_POOL_SIZE}, "
+        f"max_overflow={settings.DATABASE_ENGINE_MAX_OVERFLOW})"
+    )
+    uvicorn.run(
+        APP,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        timeout_graceful_shutdown=args.graceful_timeout,
+        # Requests are logged by AccessLogMiddleware
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
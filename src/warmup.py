@@ -0,0 +1,333 @@
+"""Connection and redirect cache warm-up.
+
+On start-up the application lifespan runs ``warm_up`` in the background;
+until it finishes, ``GET /ready`` answers 503 so a load balancer keeps
+traffic on the previous deployment while this one opens its connections.
+
+Before a campaign the cache can be filled on demand through
+``POST /api/v1/link/cache/warm`` (or ``python src/manage.py warm-cache``).
+Caches are per worker, so the worker handling the request also broadcasts
+it with PostgreSQL ``NOTIFY`` and every other worker listening with
+``listen_for_broadcasts`` loads the same links. The same listener adds the
+codes other workers create to this worker's code filter.
+"""
+
+import asyncio
+import json
+import sys
+import time
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+
+from fastapi import FastAPI
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import (
+    AsyncConnection,
+    AsyncEngine,
+    AsyncSession,
+    create_async_engine,
+)
+from sqlalchemy.pool import NullPool
+
+from src.config.conf import settings
+from src.database.core import DATABASE, DatabaseRouter, session_scope
+from src.link.cache import MISSING, CachedLink
+from src.link.code_filter import CODES_CHANNEL, BloomFilter
+from src.link.repo import LinkRepo
+from src.link.service import SHORTENER_SERVICE, ShortenerService
+from src.logger import logger
+
+__all__ = [
+    "INSTANCE_ID",
+    "CacheWarmReport",
+    "broadcast_warm_request",
+    "build_code_filter",
+    "listen_for_broadcasts",
+    "open_connections",
+    "prepare_connection",
+    "warm_cache",
+    "warm_up",
+]
+
+# Short codes are never empty, so lookups of this code match nothing
+PROBE_CODE = ""
+
+WARM_CHANNEL = "link_cache_warm"
+# PostgreSQL rejects NOTIFY payloads of 8000 bytes or more
+MAX_PAYLOAD_BYTES = 7999
+# Identifies this worker so it skips its own broadcasts; pids repeat across hosts
+INSTANCE_ID = uuid.uuid4().hex
+
+# Cache bookkeeping per entry: the (expires_at, value) tuple and its float.
+# The OrderedDict slot itself is not included.
+_ENTRY_OVERHEAD = sys.getsizeof((0.0, None)) + sys.getsizeof(0.0)
+
+
+@dataclass
+class CacheWarmReport:
+    links: int = 0
+    # Links found in the shared cache tier instead of the database
+    shared: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    # Approximate size of the cached entries (codes, targets, tuples)
+    memory_bytes: int = 0
+    instance: str = INSTANCE_ID
+
+
+async def prepare_connection(connection: AsyncConnection) -> None:
+    """Run the redirect and stats lookups once on ``connection``.
+
+    asyncpg keeps prepared statements per connection, so later requests on it
+    skip the prepare round-trip.
+    """
+    async with AsyncSession(bind=connection) as session:
+        await LinkRepo.get_target_by_code(PROBE_CODE, session)
+        await LinkRepo.get_stats_by_code(PROBE_CODE, session)
+
+
+async def open_connections(engine: AsyncEngine, count: int) -> int:
+    """Open ``count`` connections at once, prepare them and return them to the pool."""
+    results = await asyncio.gather(
+        *(engine.connect().start() for _ in range(count)), return_exceptions=True
+    )
+    connections = [conn for conn in results if isinstance(conn, AsyncConnection)]
+    try:
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        await asyncio.gather(*(prepare_connection(conn) for conn in connections))
+    finally:
+        for conn in connections:
+            await conn.close()
+    return len(connections)
+
+
+async def warm_cache(
+    session: AsyncSession,
+    limit: int | None = None,
+    codes: Sequence[str] | None = None,
+    chunk_size: int = settings.CACHE_WARM_CHUNK_SIZE,
+    service: ShortenerService = SHORTENER_SERVICE,
+) -> CacheWarmReport:
+    """Load the ``limit`` most visited links, or the given ``codes``, into the cache.
+
+    Rows are streamed ``chunk_size`` at a time, so only one chunk is held in
+    memory besides the cache itself. With a shared cache tier, explicit codes
+    are first fetched from it with one multi-get per chunk and only the rest
+    are read from the database; links read from the database are written back
+    to the shared tier.
+    """
+    start = time.perf_counter()
+    report = CacheWarmReport()
+    cache = service.cache
+    shared = service.shared_cache
+
+    def add(code: str, entry: CachedLink) -> None:
+        cache.set(code, entry)
+        report.links += 1
+        report.memory_bytes += (
+            sys.getsizeof(code)
+            + sys.getsizeof(entry)
+            + sys.getsizeof(entry.id)
+            + sys.getsizeof(entry.target)
+            + _ENTRY_OVERHEAD
+        )
+
+    if codes is not None and shared is not None:
+        remaining = []
+        for offset in range(0, len(codes), chunk_size):
+            found = await shared.get_many(codes[offset : offset + chunk_size])
+            report.chunks += 1
+            for code, entry in found.items():
+                if entry is MISSING:
+                    remaining.append(code)
+                elif entry is not None:
+                    add(code, entry)
+                    report.shared += 1
+        codes = remaining
+
+    async for rows in LinkRepo.stream_targets(session, limit, codes, chunk_size):
+        report.chunks += 1
+        entries = {code: CachedLink.from_row(*columns) for code, *columns in rows}
+        for code, entry in entries.items():
+            add(code, entry)
+        if shared is not None:
+            await shared.set_many(entries)
+    report.seconds = time.perf_counter() - start
+    return report
+
+
+async def broadcast_warm_request(
+    limit: int | None,
+    codes: Sequence[str] | None,
+    database: DatabaseRouter = DATABASE,
+) -> bool:
+    """Ask every other worker to run the same warm-up.
+
+    Returns ``False`` when the primary is not PostgreSQL. Raises
+    ``ValueError`` if the request does not fit in a ``NOTIFY`` payload.
+    """
+    payload = json.dumps(
+        {"instance": INSTANCE_ID, "limit": limit, "codes": codes},
+        separators=(",", ":"),
+    )
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        raise ValueError("Too many codes to broadcast, send them in smaller lists")
+
+    async with session_scope(database.write_session()) as session:
+        if session.bind.dialect.name != "postgresql":
+            return False
+        await session.execute(select(func.pg_notify(WARM_CHANNEL, payload)))
+        await session.commit()
+    return True
+
+
+async def handle_warm_request(
+    payload: str, database: DatabaseRouter = DATABASE
+) -> CacheWarmReport | None:
+    """Run a broadcast warm-up unless it came from this worker."""
+    request = json.loads(payload)
+    if request["instance"] == INSTANCE_ID:
+        return None
+    try:
+        async with session_scope(database.read_session()) as session:
+            report = await warm_cache(session, request["limit"], request["codes"])
+    except Exception as e:
+        logger.error(msg="Broadcast cache warm-up failed", exc_info=e)
+        return None
+    logger.info(
+        f"Cache warm-up loaded {report.links} links in {report.seconds:.3f}s "
+        f"(~{report.memory_bytes} bytes)"
+    )
+    return report
+
+
+async def listen_for_broadcasts(
+    engine: AsyncEngine,
+    retry_interval: float = 5.0,
+    service: ShortenerService = SHORTENER_SERVICE,
+    filter_ready: asyncio.Event | None = None,
+    database: DatabaseRouter = DATABASE,
+) -> None:
+    """Run broadcast warm-ups and learn new codes until cancelled (PostgreSQL only).
+
+    Listens on its own connection outside the pool, reconnecting after
+    ``retry_interval`` seconds if it is lost. Codes committed before
+    ``LISTEN`` took effect are never announced to this worker, so the code
+    filter is built once listening, on every connection. ``filter_ready``
+    is set when the first attempt is over, built or not.
+    """
+    listen_engine = create_async_engine(engine.url, poolclass=NullPool)
+    tasks: set[asyncio.Task] = set()
+
+    def spawn(coroutine) -> None:
+        task = asyncio.create_task(coroutine)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+
+    def on_warm_request(connection, pid, channel, payload):
+        spawn(handle_warm_request(payload))
+
+    def on_codes(connection, pid, channel, payload):
+        if service.code_filter is not None:
+            service.code_filter.add(payload.split(","))
+
+    async def on_connect():
+        try:
+            if service.code_filter is not None:
+                await build_code_filter(database, service)
+        finally:
+            if filter_ready is not None:
+                filter_ready.set()
+
+    callbacks = {WARM_CHANNEL: on_warm_request, CODES_CHANNEL: on_codes}
+    try:
+        while True:
+            try:
+                await _listen(listen_engine, callbacks, on_connect)
+            except Exception as e:
+                logger.error(msg="Broadcast listener failed", exc_info=e)
+            if filter_ready is not None:
+                filter_ready.set()
+            await asyncio.sleep(retry_interval)
+    finally:
+        await listen_engine.dispose()
+
+
+async def _listen(engine: AsyncEngine, callbacks, on_connect) -> None:
+    """Deliver notifications to ``callbacks[channel]`` until the connection is lost."""
+    async with engine.connect() as conn:
+        raw = await conn.get_raw_connection()
+        closed = asyncio.Event()
+        driver = raw.driver_connection
+        driver.add_termination_listener(lambda _: closed.set())
+        for channel, callback in callbacks.items():
+            await driver.add_listener(channel, callback)
+        await on_connect()
+        await closed.wait()
+
+
+async def build_code_filter(
+    database: DatabaseRouter = DATABASE,
+    service: ShortenerService = SHORTENER_SERVICE,
+) -> BloomFilter | None:
+    """Load every code into the code filter of ``service``.
+
+    Read from the primary, which replicas may lag behind. On failure the
+    previous filter (or none, letting every well-formed code through) stays.
+    """
+    start = time.perf_counter()
+    try:
+        async with session_scope(database.write_session()) as session:
+            bloom = await service.code_filter.build(session)
+    except Exception as e:
+        logger.error(msg="Could not build the code filter", exc_info=e)
+        return None
+    logger.info(
+        f"Code filter loaded {bloom.count} codes in "
+        f"{time.perf_counter() - start:.3f}s ({bloom.memory_bytes} bytes, "
+        f"expected false positive rate {bloom.false_positive_rate:.2e})"
+    )
+    return bloom
+
+
+async def warm_up(
+    app: FastAPI,
+    engines: list[AsyncEngine],
+    connections: int,
+    cache_size: int = 0,
+    code_filter: bool = False,
+    database: DatabaseRouter = DATABASE,
+    service: ShortenerService = SHORTENER_SERVICE,
+    filter_ready: asyncio.Event | None = None,
+) -> None:
+    """Fill the pools, the redirect cache and the code filter, then mark ready.
+
+    With ``filter_ready``, the code filter is left to ``listen_for_broadcasts``
+    and waited for instead. Warm-up only saves latency: if it fails the error
+    is logged and the worker reports ready anyway, serving cold like before.
+    """
+    start = time.perf_counter()
+    try:
+        opened = 0
+        for engine in engines:
+            opened += await open_connections(engine, connections)
+        cached = 0
+        if cache_size:
+            async with session_scope(database.read_session()) as session:
+                report = await warm_cache(session, cache_size, service=service)
+            cached = report.links
+    except Exception as e:
+        logger.error(msg="Warm-up failed, serving with cold pools", exc_info=e)
+    else:
+        logger.info(
+            f"Warm-up opened {opened} connections and cached {cached} links "
+            f"in {time.perf_counter() - start:.3f}s"
+        )
+    if filter_ready is not None:
+        await filter_ready.wait()
+    elif code_filter and service.code_filter is not None:
+        await build_code_filter(database, service)
+    app.state.ready = True
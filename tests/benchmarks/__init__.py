@@ -0,0 +1,3 @@
+"""
+Micro-benchmarks for hot paths, run as ``python -m tests.benchmarks.<name>``.
+"""
@@ -0,0 +1,76 @@
+"""
+Redirect latency with a slow log sink: synchronous handler versus queue.
+
+Every redirect is served from the lookup cache so only the app and the
+access log are measured. The sink sleeps ``SINK_LATENCY`` seconds per
+record. Run with ``python -m tests.benchmarks.bench_access_log``.
+"""
+
+import asyncio
+import logging
+import statistics
+import time
+
+from httpx import ASGITransport, AsyncClient
+
+from src.link.cache import CachedLink
+from src.link.service import SHORTENER_SERVICE
+from src.logger import JsonFormatter, setup_logging
+from src.main import app
+
+REQUESTS = 2_000
+SINK_LATENCY = 0.001
+
+
+class SlowHandler(logging.Handler):
+    def emit(self, record):
+        self.format(record)
+        time.sleep(SINK_LATENCY)
+
+
+async def run(client: AsyncClient) -> list[float]:
+    latencies = []
+    for _ in range(REQUESTS):
+        start = time.perf_counter()
+        await client.get("/bench1")
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def summary(label: str, latencies: list[float]) -> None:
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<22} p50 {quantiles[49] * 1000:7.3f} ms   "
+        f"p99 {quantiles[98] * 1000:7.3f} ms"
+    )
+
+
+async def main():
+    SHORTENER_SERVICE.cache.set("bench1", CachedLink(1, "https://example.com"))
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    transport = ASGITransport(app=app)
+
+    async with AsyncClient(transport=transport, base_url="http://bench") as client:
+        access_logger = logging.getLogger("src.access")
+        access_logger.setLevel(logging.WARNING)
+        summary("access log disabled", await run(client))
+        access_logger.setLevel(logging.NOTSET)
+
+        root = logging.getLogger()
+        for handler in root.handlers[:]:
+            root.removeHandler(handler)
+        slow = SlowHandler()
+        slow.setFormatter(JsonFormatter())
+        root.addHandler(slow)
+        summary("synchronous handler", await run(client))
+
+        root.removeHandler(slow)
+        listener = setup_logging(handlers=[SlowHandler()])
+        summary("queue handler", await run(client))
+        listener.stop()
+
+    print(f"(sink latency {SINK_LATENCY * 1000:.1f} ms per record)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+Links/second of ``POST /shorten/bulk`` versus looping ``POST /shorten``.
+
+Runs against a temporary SQLite file by default; set ``BENCH_DATABASE_URI``
+to an empty PostgreSQL database for production-like numbers. Run with
+``python -m tests.benchmarks.bench_bulk_shorten``.
+"""
+
+import asyncio
+import logging
+import os
+import tempfile
+import time
+
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from src.database.core import get_session
+from src.main import app
+
+COUNT = 2_000
+
+
+async def bench_single(client: AsyncClient) -> float:
+    start = time.perf_counter()
+    for i in range(COUNT):
+        await client.post(
+            "/api/v1/link/shorten", json={"target_url": f"https://single.com/{i}"}
+        )
+    return COUNT / (time.perf_counter() - start)
+
+
+async def bench_bulk(client: AsyncClient) -> float:
+    urls = [f"https://bulk.com/{i}" for i in range(COUNT)]
+    start = time.perf_counter()
+    response = await client.post(
+        "/api/v1/link/shorten/bulk", json={"target_urls": urls}
+    )
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 201, response.text
+    return COUNT / elapsed
+
+
+async def main():
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = os.environ.get(
+            "BENCH_DATABASE_URI", f"sqlite+aiosqlite:///{tmp}/bench.db"
+        )
+        engine = create_async_engine(uri)
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        sessionmaker = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+
+        async def _get_session():
+            async with sessionmaker() as session:
+                yield session
+
+        app.dependency_overrides[get_session] = _get_session
+        transport = ASGITransport(app=app)
+        async with AsyncClient(transport=transport, base_url="http://bench") as client:
+            single_rate = await bench_single(client)
+            bulk_rate = await bench_bulk(client)
+        await engine.dispose()
+
+    print(f"looped /shorten : {single_rate:>10,.0f} links/s")
+    print(f"/shorten/bulk   : {bulk_rate:>10,.0f} links/s")
+    print(f"speed-up        : {bulk_rate / single_rate:>10.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
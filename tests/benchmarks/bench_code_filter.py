@@ -0,0 +1,48 @@
+"""
+Memory, speed and false positive rate of the code filter with 10M codes.
+
+Codes are issued by ``ShortCodeCodec`` like in production; the filter is
+then probed with as many codes that were never issued. Set
+``BENCH_CODES`` to use fewer codes. Run with
+``python -m tests.benchmarks.bench_code_filter``.
+"""
+
+import os
+import time
+
+from src.config.conf import settings
+from src.link.code_filter import BloomFilter
+from src.link.codec import ShortCodeCodec
+
+CODES = int(os.environ.get("BENCH_CODES", "10000000"))
+PROBES = 1_000_000
+
+
+def main():
+    codec = ShortCodeCodec(settings.SHORT_URL_LENGTH, settings.SHORT_CODE_SALT)
+    bloom = BloomFilter(CODES, settings.LINK_FILTER_ERROR_RATE)
+
+    build = 0.0
+    for offset in range(0, CODES, 100_000):
+        codes = codec.encode_many(range(offset, min(offset + 100_000, CODES)))
+        start = time.perf_counter()
+        bloom.update(codes)
+        build += time.perf_counter() - start
+
+    absent = codec.encode_many(range(CODES, CODES + PROBES))
+    start = time.perf_counter()
+    false_positives = sum(code in bloom for code in absent)
+    probe = time.perf_counter() - start
+
+    print(f"codes              : {CODES:>14,}")
+    print(f"filter size        : {bloom.memory_bytes / 2**20:>11.1f} MiB")
+    print(f"bits per code      : {bloom.size / CODES:>14.1f}")
+    print(f"hash functions     : {bloom.hashes:>14}")
+    print(f"build              : {CODES / build:>11,.0f} codes/s")
+    print(f"absent code check  : {probe / PROBES * 1e6:>11.2f} us")
+    print(f"expected FP rate   : {bloom.false_positive_rate:>14.5f}")
+    print(f"measured FP rate   : {false_positives / PROBES:>14.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""
+CPU time per redirect and stats lookup: ORM paths versus Core statements.
+
+Measures process CPU time (the driver thread of aiosqlite included) for
+lookups of one link in a temporary SQLite file; set ``BENCH_DATABASE_URI``
+to an empty PostgreSQL database for production-like numbers. Run with
+``python -m tests.benchmarks.bench_lookup_path``.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import SQLModel, func, select
+
+from src.link.models import Link, VisitRollup
+from src.link.repo import LinkRepo
+
+LOOKUPS = 5_000
+CODE = "bench1"
+
+
+async def orm_link(session: AsyncSession):
+    return await LinkRepo.get_by_code(CODE, session)
+
+
+async def orm_columns(session: AsyncSession):
+    result = await session.execute(
+        select(Link.id, Link.target).where(Link.code == CODE)
+    )
+    return result.first()
+
+
+async def precompiled_target(session: AsyncSession):
+    return await LinkRepo.get_target_by_code(CODE, session)
+
+
+async def orm_stats(session: AsyncSession):
+    result = await session.execute(
+        select(
+            Link.id,
+            Link.target,
+            Link.code,
+            Link.created_at,
+            func.coalesce(func.sum(VisitRollup.count), 0),
+        )
+        .outerjoin(VisitRollup, Link.id == VisitRollup.link_id)
+        .where(Link.code == CODE)
+        .group_by(Link.id, Link.target, Link.code, Link.created_at)
+    )
+    return result.first()
+
+
+async def core_stats(session: AsyncSession):
+    return await LinkRepo.get_stats_by_code(CODE, session)
+
+
+async def cpu_per_lookup(lookup, session: AsyncSession) -> float:
+    for _ in range(200):
+        assert await lookup(session) is not None
+    session.expunge_all()
+    start = time.process_time()
+    for _ in range(LOOKUPS):
+        await lookup(session)
+    return (time.process_time() - start) / LOOKUPS
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = os.environ.get(
+            "BENCH_DATABASE_URI", f"sqlite+aiosqlite:///{tmp}/bench.db"
+        )
+        engine = create_async_engine(uri)
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            session.add(Link(target="https://example.com", code=CODE))
+            await session.commit()
+
+            paths = [
+                ("redirect, ORM Link instance", orm_link),
+                ("redirect, ORM column select", orm_columns),
+                ("redirect, precompiled Core", precompiled_target),
+                ("stats, ORM select", orm_stats),
+                ("stats, Core on connection", core_stats),
+            ]
+            for label, lookup in paths:
+                seconds = await cpu_per_lookup(lookup, session)
+                print(f"{label:<30} {seconds * 1e6:>8.1f} us CPU/lookup")
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""
+Per-request cost of MetricsMiddleware and of a single histogram observation.
+
+Run with ``python -m tests.benchmarks.bench_metrics``.
+"""
+
+import asyncio
+import time
+
+from src.metrics import Histogram, MetricsMiddleware
+
+REQUESTS = 200_000
+
+
+class Route:
+    path = "/{short_code}"
+
+
+ROUTE = Route()
+
+
+async def app(scope, receive, send):
+    scope["route"] = ROUTE
+    await send({"type": "http.response.start", "status": 307, "headers": []})
+    await send({"type": "http.response.body", "body": b""})
+
+
+async def receive():
+    return {"type": "http.request", "body": b""}
+
+
+async def send(message):
+    pass
+
+
+async def bench(asgi_app) -> float:
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        scope = {"type": "http", "method": "GET", "path": "/abc123"}
+        await asgi_app(scope, receive, send)
+    return (time.perf_counter() - start) / REQUESTS
+
+
+def bench_observe() -> float:
+    histogram = Histogram("bench_seconds", "Benchmark", registry=None)
+    start = time.perf_counter()
+    for i in range(REQUESTS):
+        histogram.observe(i * 1e-6)
+    return (time.perf_counter() - start) / REQUESTS
+
+
+async def main():
+    bare = await bench(app)
+    wrapped = await bench(MetricsMiddleware(app, enabled=True))
+
+    print(f"bare ASGI app       : {bare * 1e6:7.3f} us/request")
+    print(f"with metrics        : {wrapped * 1e6:7.3f} us/request")
+    print(f"middleware overhead : {(wrapped - bare) * 1e6:7.3f} us/request")
+    print(f"histogram.observe   : {bench_observe() * 1e9:7.0f} ns")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,85 @@
+"""
+Redirect throughput of the full FastAPI stack versus RedirectFastPath.
+
+Both variants run behind the same middleware stack and serve cache hits, so
+no database is needed; the difference is what routing, dependency injection
+and response objects cost per redirect.
+
+Run with ``python -m tests.benchmarks.bench_redirect_fastpath``.
+"""
+
+import asyncio
+import logging
+import time
+
+from fastapi import FastAPI
+from starlette.middleware import Middleware
+
+from src.fastpath import RedirectFastPath
+from src.link.cache import CachedLink
+from src.link.recorder import VISIT_RECORDER
+from src.link.service import SHORTENER_SERVICE
+from src.main import app
+
+REQUESTS = 20_000
+CODES = [f"bench{i:03d}" for i in range(100)]
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def bench(asgi_app) -> float:
+    start = time.perf_counter()
+    for i in range(REQUESTS):
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": f"/{CODES[i % len(CODES)]}",
+            "raw_path": b"",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"localhost")],
+            "client": ("127.0.0.1", 1234),
+            "server": ("localhost", 8000),
+        }
+        await asgi_app(scope, receive, send)
+        # Keep the visit queue from filling up and skewing the second run
+        while not VISIT_RECORDER.queue.empty():
+            VISIT_RECORDER.queue.get_nowait()
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def with_fast_path() -> FastAPI:
+    fast = FastAPI()
+    fast.router.routes = app.router.routes
+    # The last entry of user_middleware is the innermost one
+    fast.user_middleware = [
+        *app.user_middleware,
+        Middleware(RedirectFastPath, routes=app.routes),
+    ]
+    return fast
+
+
+async def main():
+    logging.getLogger("src.access").setLevel(logging.WARNING)
+    for i, code in enumerate(CODES):
+        SHORTENER_SERVICE.cache.set(code, CachedLink(i, f"https://example.com/{i}"))
+
+    fastapi_rps = await bench(app)
+    fast_path_rps = await bench(with_fast_path())
+
+    print(f"FastAPI route  : {fastapi_rps:9.0f} redirects/s")
+    print(f"fast path      : {fast_path_rps:9.0f} redirects/s")
+    print(f"speed-up       : {fast_path_rps / fastapi_rps:9.1f}x")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Size, memory and lookup latency of a redirect snapshot with 50M links.
+
+Writes a snapshot of synthetic links to a temporary file (set
+``BENCH_DIR`` to put it elsewhere, it takes ~4 GiB), maps it and probes
+it with codes that exist and codes that do not. Memory is the resident
+set of this process (Linux), next to the estimated size of the same links
+held in a ``LinkCache``. Set ``BENCH_LINKS`` to use fewer links. Run with
+``python -m tests.benchmarks.bench_redirect_snapshot``.
+"""
+
+import os
+import random
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+from src.link.cache import CachedLink, LinkCache
+from src.link.codec import BASE62
+from src.link.snapshot import RedirectSnapshot, SnapshotWriter
+
+LINKS = int(os.environ.get("BENCH_LINKS", "50000000"))
+PROBES = 200_000
+# Sorted alphabet, so increasing numbers give increasing codes
+ALPHABET = "".join(sorted(BASE62))
+# Room for absent codes between the exported ones
+STRIDE = 1000
+
+
+def code_of(num: int, width: int = 6) -> str:
+    digits = []
+    for _ in range(width):
+        num, digit = divmod(num, 62)
+        digits.append(ALPHABET[digit])
+    return "".join(reversed(digits))
+
+
+def link_of(i: int) -> CachedLink:
+    return CachedLink(i + 1, f"https://example.com/campaign/{i}?utm_source=news")
+
+
+def rss_bytes() -> int:
+    with open("/proc/self/statm") as statm:
+        return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+
+
+def cache_bytes_per_link(sample: int = 100_000) -> float:
+    cache = LinkCache(max_size=sample)
+    tracemalloc.start()
+    for i in range(sample):
+        cache.set(code_of(i * STRIDE), link_of(i))
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return size / sample
+
+
+def timed(snapshot: RedirectSnapshot, codes: list[str]) -> list[float]:
+    get = snapshot.get
+    clock = time.perf_counter_ns
+    latencies = []
+    for code in codes:
+        start = clock()
+        get(code)
+        latencies.append(clock() - start)
+    return latencies
+
+
+def report(name: str, latencies: list[float]) -> None:
+    latencies.sort()
+    p99 = latencies[int(len(latencies) * 0.99)]
+    print(
+        f"{name:<19}: {statistics.median(latencies) / 1000:>8.2f} us p50 "
+        f"{p99 / 1000:>8.2f} us p99"
+    )
+
+
+def main():
+    with tempfile.TemporaryDirectory(dir=os.environ.get("BENCH_DIR")) as directory:
+        path = os.path.join(directory, "links.snap")
+        start = time.perf_counter()
+        with SnapshotWriter(path) as writer:
+            for i in range(LINKS):
+                writer.add(code_of(i * STRIDE), link_of(i))
+        export = time.perf_counter() - start
+
+        # Generated first, so they do not count in the RSS growth
+        rng = random.Random(0)
+        hits = [code_of(rng.randrange(LINKS) * STRIDE) for _ in range(PROBES)]
+        misses = [
+            code_of(rng.randrange(LINKS) * STRIDE + STRIDE // 2) for _ in range(PROBES)
+        ]
+        before = rss_bytes()
+        start = time.perf_counter()
+        snapshot = RedirectSnapshot(path)
+        load = time.perf_counter() - start
+        mapped = rss_bytes() - before
+
+        # Cold: pages of the index are faulted in by the first probes
+        cold = timed(snapshot, hits[: PROBES // 10])
+        hot = timed(snapshot, hits)
+        absent = timed(snapshot, misses)
+        probed = rss_bytes() - before
+        assert snapshot.get(hits[0]) is not None and snapshot.get(misses[0]) is None
+
+        print(f"links              : {LINKS:>14,}")
+        print(f"export             : {LINKS / export:>11,.0f} links/s")
+        print(f"file size          : {snapshot.size_bytes / 2**20:>11.1f} MiB")
+        print(f"bytes per link     : {snapshot.size_bytes / LINKS:>14.1f}")
+        print(f"map                : {load * 1000:>11.2f} ms")
+        print(f"RSS after map      : {mapped / 2**20:>11.1f} MiB")
+        print(f"RSS after probes   : {probed / 2**20:>11.1f} MiB")
+        print(
+            f"LinkCache estimate : {cache_bytes_per_link() * LINKS / 2**20:>11.1f} MiB"
+        )
+        report("cold hit", cold)
+        report("hit", hot)
+        report("miss", absent)
+        snapshot.close()
+
+
+if __name__ == "__main__":
+    main()
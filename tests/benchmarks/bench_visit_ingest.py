@@ -0,0 +1,82 @@
+"""
+Visits/second written by ORM add/flush, Core executemany and COPY.
+
+Runs against a temporary SQLite file by default, where COPY is not
+available; set ``BENCH_DATABASE_URI`` to an empty PostgreSQL database
+(``postgresql+asyncpg://...``) to include it. Run with
+``python -m tests.benchmarks.bench_visit_ingest``.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from src.link.models import Link, Visit
+from src.link.repo import VisitRepo
+
+SIZES = (1_000, 10_000, 100_000)
+
+
+async def orm(rows: list[dict], session: AsyncSession) -> None:
+    session.add_all(Visit(**row) for row in rows)
+    await session.flush()
+    await session.commit()
+
+
+async def executemany(rows: list[dict], session: AsyncSession) -> None:
+    await VisitRepo.bulk_create(rows, session, copy_min_rows=sys.maxsize)
+
+
+async def copy(rows: list[dict], session: AsyncSession) -> None:
+    await VisitRepo.bulk_create(rows, session, copy_min_rows=0)
+
+
+async def rate(writer, rows: list[dict], sessionmaker) -> float:
+    async with sessionmaker() as session:
+        start = time.perf_counter()
+        await writer(rows, session)
+        return len(rows) / (time.perf_counter() - start)
+
+
+async def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        uri = os.environ.get(
+            "BENCH_DATABASE_URI", f"sqlite+aiosqlite:///{tmp}/bench.db"
+        )
+        engine = create_async_engine(uri)
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+        sessionmaker = async_sessionmaker(
+            engine, class_=AsyncSession, expire_on_commit=False
+        )
+        async with sessionmaker() as session:
+            link = Link(target="https://example.com", code="bench1")
+            session.add(link)
+            await session.commit()
+
+        writers = {"ORM add/flush": orm, "Core executemany": executemany}
+        if engine.dialect.driver == "asyncpg":
+            writers["COPY"] = copy
+
+        print(f"{'rows':>8}  " + "".join(f"{name:>18}" for name in writers))
+        for size in SIZES:
+            visited_at = datetime.now()
+            rows = [
+                {"link_id": link.id, "visited_at": visited_at, "utm_set_id": None}
+                for _ in range(size)
+            ]
+            rates = [
+                await rate(writer, rows, sessionmaker) for writer in writers.values()
+            ]
+            print(f"{size:>8,}  " + "".join(f"{r:>14,.0f} r/s" for r in rates))
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
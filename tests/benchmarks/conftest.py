@@ -0,0 +1,11 @@
+import pytest
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip pytest-benchmark tests unless ``--benchmark-enable`` is passed."""
+    if config.getoption("benchmark_enable", default=False):
+        return
+    skip = pytest.mark.skip(reason="benchmarks run with --benchmark-enable")
+    for item in items:
+        if "benchmark" in getattr(item, "fixturenames", ()):
+            item.add_marker(skip)
@@ -0,0 +1,68 @@
+"""
+Codes/second of the short code paths, tracked with pytest-benchmark.
+
+Compares the original uuid4 + base62 codes with the sequence codec. Skipped
+unless ``--benchmark-enable`` is passed; compare runs with ``pytest
+tests/benchmarks --benchmark-enable --benchmark-autosave`` and
+``pytest-benchmark compare``.
+"""
+
+import uuid
+
+import pytest
+
+from src.link.codec import ShortCodeCodec, base62_encode, base62_encode_many
+from src.link.service import ShortenerService
+
+pytest.importorskip("pytest_benchmark")
+
+pytestmark = pytest.mark.slow
+
+BATCH = 10_000
+
+
+@pytest.fixture(scope="module")
+def codec() -> ShortCodeCodec:
+    return ShortCodeCodec(length=6, salt=0)
+
+
+@pytest.fixture(scope="module")
+def uuids() -> list[int]:
+    return [uuid.uuid4().int for _ in range(BATCH)]
+
+
+def _report(benchmark) -> None:
+    benchmark.extra_info["codes_per_second"] = BATCH / benchmark.stats["mean"]
+
+
+def test_bench_generate_short_code(benchmark):
+    service = ShortenerService()
+    url = "https://example.com"
+    benchmark(lambda: [service.generate_short_code(url) for _ in range(BATCH)])
+    _report(benchmark)
+
+
+def test_bench_uuid_base62(benchmark, uuids):
+    benchmark(lambda: [base62_encode(num, 6) for num in uuids])
+    _report(benchmark)
+
+
+def test_bench_uuid_base62_many(benchmark, uuids):
+    benchmark(base62_encode_many, uuids, 6)
+    _report(benchmark)
+
+
+def test_bench_codec_encode(benchmark, codec):
+    benchmark(lambda: [codec.encode(num) for num in range(1, BATCH + 1)])
+    _report(benchmark)
+
+
+def test_bench_codec_encode_many(benchmark, codec):
+    benchmark(codec.encode_many, range(1, BATCH + 1))
+    _report(benchmark)
+
+
+def test_bench_codec_decode(benchmark, codec):
+    codes = codec.encode_many(range(1, BATCH + 1))
+    benchmark(lambda: [codec.decode(code) for code in codes])
+    _report(benchmark)
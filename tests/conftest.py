@@ -59,6 +59,10 @@ async def db_session(test_sessionmaker) -> AsyncGenerator[AsyncSession]:
     async with test_sessionmaker() as session:
         yield session
         await session.rollback()
+        # Tests commit their data; wipe it so fixed codes do not collide
+        for table in reversed(SQLModel.metadata.sorted_tables):
+            await session.execute(table.delete())
+        await session.commit()
 
 
 @pytest_asyncio.fixture
@@ -74,7 +78,7 @@ async def sample_link(db_session: AsyncSession) -> Link:
 @pytest_asyncio.fixture
 async def sample_visit(db_session: AsyncSession, sample_link: Link) -> Visit:
     """Create a sample visit for testing."""
-    visit = Visit(link_id=sample_link.id, utm="utm_source=test&utm_medium=test")
+    visit = Visit(link_id=sample_link.id)
     db_session.add(visit)
     await db_session.commit()
     await db_session.refresh(visit)
@@ -0,0 +1,308 @@
+from datetime import datetime, timedelta
+
+import pytest
+import pytest_asyncio
+from httpx import ASGITransport, AsyncClient
+
+from src.database.core import get_read_session, get_session
+from src.link.repo import (
+    LinkRepo,
+    UtmSetRepo,
+    VisitRollupRepo,
+    VisitUtmRollupRepo,
+)
+from src.link.utm import Utm
+from src.main import app
+
+
+@pytest_asyncio.fixture
+async def client(override_get_session):
+    """HTTP client bound to the app with the test database session."""
+    app.dependency_overrides[get_session] = override_get_session
+    app.dependency_overrides[get_read_session] = override_get_session
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+class TestLinkApi:
+    """Integration tests for the link API."""
+
+    @pytest.mark.asyncio
+    async def test_shorten(self, client: AsyncClient):
+        """Test shortening a single URL."""
+        response = await client.post(
+            "/api/v1/link/shorten", json={"target_url": "example.com/one"}
+        )
+
+        assert response.status_code == 201
+        assert response.json()["target_url"] == "https://example.com/one"
+
+    @pytest.mark.asyncio
+    async def test_shorten_with_lifetime(self, client: AsyncClient, db_session):
+        """Test expiring links and the 410 answered once they expired."""
+        url = "/api/v1/link/shorten"
+        expires_at = (datetime.now() + timedelta(hours=1)).replace(microsecond=0)
+
+        response = await client.post(
+            url,
+            json={
+                "target_url": "soon.com",
+                "expires_at": expires_at.isoformat(),
+                "max_visits": 10,
+            },
+        )
+
+        assert response.status_code == 201
+        assert response.json()["expires_at"] == expires_at.isoformat()
+        assert response.json()["max_visits"] == 10
+        code = response.json()["shortened_url"].rsplit("/", 1)[-1]
+        link = await LinkRepo.get_by_code(code, db_session)
+        assert (link.expires_at, link.max_visits) == (expires_at, 10)
+
+        link.expires_at = datetime.now() - timedelta(seconds=1)
+        await db_session.commit()
+        redirect = await client.get(f"/{code}")
+        assert redirect.status_code == 410
+        assert redirect.json() == {"detail": "Link expired"}
+
+        past = (datetime.now() - timedelta(hours=1)).isoformat()
+        for body in ({"expires_at": past}, {"max_visits": 0}):
+            response = await client.post(url, json={"target_url": "a.com", **body})
+            assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_shorten_cacheable_redirect(self, client: AsyncClient):
+        """Test a permanent, cacheable redirect chosen for one link."""
+        response = await client.post(
+            "/api/v1/link/shorten",
+            json={
+                "target_url": "cached.com",
+                "redirect_status": 301,
+                "cache_max_age": 86400,
+            },
+        )
+
+        assert response.status_code == 201
+        assert response.json()["redirect_status"] == 301
+        code = response.json()["shortened_url"].rsplit("/", 1)[-1]
+        redirect = await client.get(f"/{code}")
+        assert redirect.status_code == 301
+        assert redirect.headers["location"] == "https://cached.com"
+        assert redirect.headers["cache-control"] == "public, max-age=86400"
+
+        response = await client.post(
+            "/api/v1/link/shorten",
+            json={"target_url": "a.com", "redirect_status": 303},
+        )
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_shorten_bulk(self, client: AsyncClient):
+        """Test bulk shortening returns results in input order."""
+        response = await client.post(
+            "/api/v1/link/shorten/bulk",
+            json={"target_urls": ["https://a.com", "", "b.com/x"]},
+        )
+
+        assert response.status_code == 201
+        results = response.json()["results"]
+        assert [result["target_url"] for result in results] == [
+            "https://a.com",
+            "https://",
+            "https://b.com/x",
+        ]
+        assert results[0]["shortened_url"] is not None
+        assert results[1]["error"] == "Invalid target URL"
+        assert results[1]["shortened_url"] is None
+        assert results[2]["shortened_url"] is not None
+
+        code = results[2]["shortened_url"].rsplit("/", 1)[-1]
+        redirect = await client.get(f"/{code}")
+        assert redirect.status_code == 307
+        assert redirect.headers["location"] == "https://b.com/x"
+
+    @pytest.mark.asyncio
+    async def test_shorten_bulk_too_many(self, client: AsyncClient, monkeypatch):
+        """Test that oversized batches are rejected."""
+        monkeypatch.setattr("src.config.conf.settings.BULK_SHORTEN_MAX_ITEMS", 2)
+
+        response = await client.post(
+            "/api/v1/link/shorten/bulk",
+            json={"target_urls": ["a.com", "b.com", "c.com"]},
+        )
+
+        assert response.status_code == 413
+
+    @pytest.mark.asyncio
+    async def test_stats_series(self, client: AsyncClient, db_session):
+        """Test totals and hourly/daily series from the visit rollup."""
+        response = await client.post(
+            "/api/v1/link/shorten", json={"target_url": "stats.com"}
+        )
+        code = response.json()["shortened_url"].rsplit("/", 1)[-1]
+        link = await LinkRepo.get_by_code(code, db_session)
+        await VisitRollupRepo.increment(
+            {
+                (link.id, datetime(2026, 3, 1, 9)): 2,
+                (link.id, datetime(2026, 3, 1, 11)): 1,
+                (link.id, datetime(2026, 3, 2, 0)): 4,
+            },
+            db_session,
+        )
+        url = f"/api/v1/link/stats/{code}"
+
+        response = await client.get(url)
+        assert response.json()["visits_count"] == 7
+        assert "series" not in response.json()
+
+        response = await client.get(
+            url,
+            params={
+                "granularity": "hour",
+                "start": "2026-03-01T09:00:00",
+                "end": "2026-03-01T11:30:00",
+            },
+        )
+        assert response.json()["series"] == [
+            {"start": "2026-03-01T09:00:00", "visits": 2},
+            {"start": "2026-03-01T10:00:00", "visits": 0},
+            {"start": "2026-03-01T11:00:00", "visits": 1},
+        ]
+
+        response = await client.get(
+            url,
+            params={
+                "granularity": "day",
+                "start": "2026-03-01T00:00:00",
+                "end": "2026-03-03T00:00:00",
+            },
+        )
+        assert response.json()["series"] == [
+            {"start": "2026-03-01T00:00:00", "visits": 3},
+            {"start": "2026-03-02T00:00:00", "visits": 4},
+        ]
+
+        response = await client.get(
+            url,
+            params={"granularity": "hour", "start": "2020-01-01T00:00:00"},
+        )
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_stats_utm_breakdown(self, client: AsyncClient, db_session):
+        """Test visits per UTM source from the UTM rollup."""
+        response = await client.post(
+            "/api/v1/link/shorten", json={"target_url": "utm.com"}
+        )
+        code = response.json()["shortened_url"].rsplit("/", 1)[-1]
+        link = await LinkRepo.get_by_code(code, db_session)
+        news, ads = Utm(source="news", medium="email"), Utm(source="ads")
+        ids = await UtmSetRepo.get_or_create_many([news, ads], db_session)
+        await VisitUtmRollupRepo.increment(
+            {
+                (link.id, datetime(2026, 3, 1, 9), ids[news.digest]): 2,
+                (link.id, datetime(2026, 3, 2, 9), ids[news.digest]): 3,
+                (link.id, datetime(2026, 3, 2, 9), ids[ads.digest]): 1,
+            },
+            db_session,
+        )
+        url = f"/api/v1/link/stats/{code}"
+
+        response = await client.get(url, params={"utm": "source"})
+        assert response.json()["utm"] == [
+            {"value": "news", "visits": 5},
+            {"value": "ads", "visits": 1},
+        ]
+
+        response = await client.get(
+            url, params={"utm": "medium", "start": "2026-03-02T00:00:00"}
+        )
+        assert response.json()["utm"] == [{"value": "email", "visits": 3}]
+        assert (await client.get(url, params={"utm": "page"})).status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_stats_conditional(self, client: AsyncClient, db_session):
+        """Test ETag and Last-Modified revalidation of stats."""
+        response = await client.post(
+            "/api/v1/link/shorten", json={"target_url": "etag.com"}
+        )
+        code = response.json()["shortened_url"].rsplit("/", 1)[-1]
+        link = await LinkRepo.get_by_code(code, db_session)
+        url = f"/api/v1/link/stats/{code}"
+
+        # Visits may still be queued: no date until the flush interval is over
+        assert "last-modified" not in (await client.get(url)).headers
+        link.created_at -= timedelta(minutes=1)
+        await db_session.commit()
+
+        response = await client.get(url)
+        tag = response.headers["etag"]
+        assert response.headers["cache-control"] == "no-cache"
+        last_modified = response.headers["last-modified"]
+
+        cached = await client.get(url, headers={"if-none-match": tag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == tag
+        since = await client.get(url, headers={"if-modified-since": last_modified})
+        assert since.status_code == 304
+
+        await LinkRepo.increment_visits_counts({link.id: 1}, db_session)
+        await VisitRollupRepo.increment(
+            {(link.id, datetime(2026, 3, 1, 9)): 1}, db_session
+        )
+        changed = await client.get(url, headers={"if-none-match": tag})
+        assert changed.status_code == 200
+        assert changed.headers["etag"] != tag
+        assert changed.json()["visits_count"] == 1
+
+        # A series ending now changes with the clock: validated by ETag only
+        series = await client.get(url, params={"granularity": "hour"})
+        assert "last-modified" not in series.headers
+
+    @pytest.mark.asyncio
+    async def test_warm_cache(self, client: AsyncClient, monkeypatch):
+        """Test that cache warm-up needs the admin token."""
+        await client.post("/api/v1/link/shorten", json={"target_url": "warm.com"})
+        url = "/api/v1/link/cache/warm"
+        body = {"top": 10, "broadcast": False}
+
+        monkeypatch.setattr("src.config.conf.settings.ADMIN_TOKEN", None)
+        assert (await client.post(url, json=body)).status_code == 403
+
+        monkeypatch.setattr("src.config.conf.settings.ADMIN_TOKEN", "secret")
+        headers = {"X-Admin-Token": "secret"}
+        assert (await client.post(url, json=body)).status_code == 403
+        assert (await client.post(url, json={}, headers=headers)).status_code == 422
+        for top in (0, -1):
+            response = await client.post(url, json={"top": top}, headers=headers)
+            assert response.status_code == 422
+
+        response = await client.post(url, json=body, headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["links"] == 1
+        assert response.json()["broadcast"] is False
+
+
+class TestProbes:
+    """Integration tests for the health and readiness probes."""
+
+    @pytest.mark.asyncio
+    async def test_health(self, client: AsyncClient):
+        """Test that the liveness probe always answers."""
+        response = await client.get("/health")
+
+        assert response.status_code == 200
+        assert response.json() == {"status": "ok"}
+
+    @pytest.mark.asyncio
+    async def test_ready(self, client: AsyncClient, monkeypatch):
+        """Test that readiness follows the warm-up state."""
+        monkeypatch.setattr(app.state, "ready", False, raising=False)
+        assert (await client.get("/ready")).status_code == 503
+
+        app.state.ready = True
+        assert (await client.get("/ready")).status_code == 200
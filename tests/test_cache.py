@@ -0,0 +1,80 @@
+from src.link.cache import MISSING, CachedLink, LinkCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestLinkCache:
+    """Test cases for LinkCache class."""
+
+    def test_get_missing(self):
+        """Test that an unknown code is reported as missing."""
+        cache = LinkCache(max_size=10, ttl=60, negative_ttl=10)
+
+        assert cache.get("abc123") is MISSING
+        assert cache.stats.misses == 1
+
+    def test_set_and_get(self):
+        """Test storing and reading an entry."""
+        cache = LinkCache(max_size=10, ttl=60, negative_ttl=10)
+        cache.set("abc123", CachedLink(1, "https://example.com"))
+
+        assert cache.get("abc123") == CachedLink(1, "https://example.com")
+        assert cache.stats.hits == 1
+
+    def test_negative_entry(self):
+        """Test that unknown codes can be cached as None."""
+        cache = LinkCache(max_size=10, ttl=60, negative_ttl=10)
+        cache.set("nope12", None)
+
+        assert cache.get("nope12") is None
+        assert cache.stats.hits == 1
+
+    def test_ttl_expiration(self):
+        """Test that positive and negative entries expire separately."""
+        clock = FakeClock()
+        cache = LinkCache(max_size=10, ttl=60, negative_ttl=10, clock=clock)
+        cache.set("abc123", CachedLink(1, "https://example.com"))
+        cache.set("nope12", None)
+
+        clock.now = 30
+        assert cache.get("nope12") is MISSING
+        assert cache.get("abc123") is not MISSING
+
+        clock.now = 61
+        assert cache.get("abc123") is MISSING
+        assert cache.stats.expirations == 2
+        assert len(cache) == 0
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = LinkCache(max_size=2, ttl=60, negative_ttl=10)
+        cache.set("a", CachedLink(1, "https://a.com"))
+        cache.set("b", CachedLink(2, "https://b.com"))
+        cache.get("a")
+        cache.set("c", CachedLink(3, "https://c.com"))
+
+        assert "a" in cache
+        assert "b" not in cache
+        assert "c" in cache
+        assert cache.stats.evictions == 1
+
+    def test_disabled(self):
+        """Test that a zero size cache stores nothing."""
+        cache = LinkCache(max_size=0, ttl=60, negative_ttl=10)
+        cache.set("abc123", CachedLink(1, "https://example.com"))
+
+        assert len(cache) == 0
+
+    def test_invalidate(self):
+        """Test removing a single entry."""
+        cache = LinkCache(max_size=10, ttl=60, negative_ttl=10)
+        cache.set("abc123", None)
+        cache.invalidate("abc123")
+
+        assert cache.get("abc123") is MISSING
@@ -0,0 +1,158 @@
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.link import code_filter as code_filter_module
+from src.link.code_filter import BloomFilter, CodeFilter, _payloads
+from src.link.models import Link
+from src.link.repo import LinkRepo
+from src.link.service import ShortenerService
+
+
+class TestBloomFilter:
+    """Test cases for the Bloom filter."""
+
+    def test_no_false_negatives_and_bounded_false_positives(self):
+        """Test that added items are always found and others rarely are."""
+        bloom = BloomFilter(10_000, 0.01)
+        bloom.update(f"in{i}" for i in range(10_000))
+
+        assert all(f"in{i}" in bloom for i in range(10_000))
+        false_positives = sum(f"out{i}" in bloom for i in range(10_000))
+        assert false_positives < 300
+        assert bloom.false_positive_rate == pytest.approx(0.01, rel=0.1)
+
+    def test_sizing(self):
+        """Test that size and hash count follow the textbook formulas."""
+        bloom = BloomFilter(1_000_000, 0.001)
+
+        assert bloom.hashes == 10
+        # ~14.4 bits per item
+        assert bloom.memory_bytes == pytest.approx(1_797_000, rel=0.01)
+        assert bloom.false_positive_rate == 0
+
+    def test_invalid_parameters(self):
+        """Test that impossible filters are refused."""
+        with pytest.raises(ValueError):
+            BloomFilter(0, 0.01)
+        with pytest.raises(ValueError):
+            BloomFilter(100, 1.0)
+
+
+class TestCodeFilter:
+    """Test cases for the short code guard."""
+
+    def test_syntax_check_before_build(self):
+        """Test that only base62 codes pass until the filter is built."""
+        code_filter = CodeFilter(length=6)
+
+        assert not code_filter.might_exist("wp-login.php")
+        assert not code_filter.might_exist("favicon.ico")
+        assert not code_filter.might_exist("abc12é")
+        assert code_filter.might_exist("abc123")
+        # Any length, since codes of other lengths may exist
+        assert code_filter.might_exist("abc1234567")
+        assert code_filter.stats.malformed == 3
+        assert code_filter.stats.passed == 2
+
+    @pytest.mark.asyncio
+    async def test_build_rejects_absent_codes(self, db_session: AsyncSession):
+        """Test that a built filter rejects unknown codes and lengths."""
+        db_session.add_all(
+            [
+                Link(target="https://example.com/1", code="flt001"),
+                Link(target="https://example.com/2", code="legacy"),
+                Link(target="https://example.com/3", code="old1234"),
+            ]
+        )
+        await db_session.commit()
+        code_filter = CodeFilter(length=6, min_capacity=1000)
+
+        await code_filter.build(db_session, chunk_size=2)
+
+        assert code_filter.ready
+        assert code_filter.might_exist("flt001")
+        assert code_filter.might_exist("old1234")
+        assert not code_filter.might_exist("flt999")
+        assert not code_filter.might_exist("abcdefghij")
+        assert code_filter.stats.absent == 1
+
+        code_filter.add(["flt999"])
+        assert code_filter.might_exist("flt999")
+
+    @pytest.mark.asyncio
+    async def test_codes_added_during_build_are_kept(self, db_session: AsyncSession):
+        """Test that codes created while the filter is being built are not lost."""
+        db_session.add(Link(target="https://example.com", code="flt002"))
+        await db_session.commit()
+        code_filter = CodeFilter(length=6, min_capacity=1000)
+        stream_codes = LinkRepo.stream_codes
+
+        async def stream_and_create(session, chunk_size):
+            async for codes in stream_codes(session, chunk_size):
+                code_filter.add(["during"])
+                yield codes
+
+        with patch.object(LinkRepo, "stream_codes", stream_and_create):
+            await code_filter.build(db_session)
+
+        assert code_filter.might_exist("flt002")
+        assert code_filter.might_exist("during")
+
+    def test_payloads_fit_notify(self):
+        """Test that announced codes are split below the NOTIFY payload limit."""
+        codes = [f"c{i:05d}" for i in range(3000)]
+
+        payloads = list(_payloads(codes))
+
+        assert len(payloads) == 3
+        assert all(
+            len(payload) <= code_filter_module.MAX_PAYLOAD_BYTES for payload in payloads
+        )
+        assert ",".join(payloads).split(",") == codes
+
+
+class TestServiceCodeFilter:
+    """Test cases for the code filter in front of redirect lookups."""
+
+    @pytest.mark.asyncio
+    async def test_rejected_codes_skip_lookup(self, db_session: AsyncSession):
+        """Test that rejected codes are answered without a query or cache entry."""
+        service = ShortenerService(code_filter=CodeFilter(length=6))
+
+        with patch.object(service.repo, "get_target_by_code") as mock_get:
+            assert await service.get_target("wp-login.php", db_session) is None
+
+            mock_get.assert_not_called()
+        assert "wp-login.php" not in service.cache
+
+    @pytest.mark.asyncio
+    async def test_created_codes_are_added(self, db_session: AsyncSession):
+        """Test that codes created by this worker pass a built filter."""
+        code_filter = CodeFilter(length=6, min_capacity=1000)
+        await code_filter.build(db_session)
+        service = ShortenerService(code_filter=code_filter)
+
+        await service.perform_create("https://example.com/f", "flt003", db_session)
+        result = await service.get_target("flt003", db_session)
+
+        assert result is not None
+        assert result.target == "https://example.com/f"
+
+    @pytest.mark.asyncio
+    async def test_codes_announced_before_commit(self, db_session: AsyncSession):
+        """Test that codes are announced in the transaction inserting them."""
+        service = ShortenerService(code_filter=CodeFilter(length=6))
+        service.announce = True
+        announced = []
+
+        async def announce(codes, session):
+            link = await service.repo.get_target_by_code("flt004", session)
+            announced.append((codes, session.in_transaction(), link is not None))
+
+        with patch("src.link.service.announce_codes", announce):
+            await service.perform_create("https://example.com/a", "flt004", db_session)
+
+        assert announced == [(["flt004"], True, True)]
+        assert not db_session.in_transaction()
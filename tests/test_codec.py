@@ -0,0 +1,166 @@
+import random
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.link.allocator import CodeAllocator
+from src.link.codec import (
+    BASE62,
+    ShortCodeCodec,
+    base62_decode,
+    base62_encode,
+    base62_encode_many,
+)
+from src.link.repo import LinkRepo
+
+
+def naive_base62_encode(num: int) -> str:
+    """Reference implementation: every digit, prepended one by one."""
+    if num == 0:
+        return BASE62[0]
+    encoded = ""
+    while num > 0:
+        num, rem = divmod(num, 62)
+        encoded = BASE62[rem] + encoded
+    return encoded
+
+
+class TestBase62:
+    """Test cases for the plain base62 helpers."""
+
+    def test_matches_reference(self):
+        """Test that encoding matches the naive implementation."""
+        rng = random.Random(0)
+        for num in [
+            0,
+            1,
+            61,
+            62,
+            3843,
+            3844,
+            *(rng.getrandbits(128) for _ in range(200)),
+        ]:
+            assert base62_encode(num) == naive_base62_encode(num)
+            assert base62_decode(base62_encode(num)) == num
+
+    def test_truncated_matches_reference(self):
+        """Test that only the leading digits are produced when truncating."""
+        rng = random.Random(1)
+        for num in [0, 5, 123456789, *(rng.getrandbits(128) for _ in range(200))]:
+            for length in (1, 6, 8, 22, 30):
+                assert base62_encode(num, length) == naive_base62_encode(num)[:length]
+
+    def test_encode_many(self):
+        """Test batch encoding."""
+        assert base62_encode_many([0, 61, 62], length=6) == ["a", "9", "ba"]
+
+    def test_decode_invalid(self):
+        """Test that characters outside the alphabet are rejected."""
+        with pytest.raises(ValueError):
+            base62_decode("ab-c")
+
+
+class TestShortCodeCodec:
+    """Test cases for ShortCodeCodec class."""
+
+    def test_roundtrip(self):
+        """Test that decode inverts encode."""
+        codec = ShortCodeCodec(length=6, salt=42)
+
+        for num in [0, 1, 2, 61, 62, 12345, 10**9, codec.capacity - 1]:
+            code = codec.encode(num)
+            assert len(code) == 6
+            assert set(code) <= set(BASE62)
+            assert codec.decode(code) == num
+
+    def test_bijective_on_small_space(self):
+        """Test that every integer maps to a distinct code."""
+        codec = ShortCodeCodec(length=2, salt=7)
+
+        codes = {codec.encode(num) for num in range(codec.capacity)}
+
+        assert len(codes) == codec.capacity == 62**2
+
+    def test_consecutive_values_are_scattered(self):
+        """Test that sequential integers do not produce sequential codes."""
+        codec = ShortCodeCodec(length=6, salt=1)
+
+        first, second = codec.encode(1000), codec.encode(1001)
+
+        assert sum(a != b for a, b in zip(first, second, strict=True)) > 1
+
+    def test_encode_many(self):
+        """Test that batch encoding matches single encoding."""
+        codec = ShortCodeCodec(length=6, salt=3)
+
+        assert codec.encode_many(range(100)) == [codec.encode(n) for n in range(100)]
+
+    def test_salt_changes_codes(self):
+        """Test that different salts give different mappings."""
+        assert ShortCodeCodec(6, salt=1).encode(5) != ShortCodeCodec(6, salt=2).encode(
+            5
+        )
+
+    def test_out_of_range(self):
+        """Test that integers outside the code space are rejected."""
+        codec = ShortCodeCodec(length=2)
+
+        with pytest.raises(ValueError):
+            codec.encode(codec.capacity)
+        with pytest.raises(ValueError):
+            codec.encode(-1)
+
+    def test_decode_invalid(self):
+        """Test that malformed codes are rejected."""
+        codec = ShortCodeCodec(length=6)
+
+        with pytest.raises(ValueError):
+            codec.decode("abc")
+        with pytest.raises(ValueError):
+            codec.decode("abc-12")
+
+
+class TestCodeAllocator:
+    """Test cases for CodeAllocator class."""
+
+    @pytest.mark.asyncio
+    async def test_leases_one_block_per_block_size(self, db_session: AsyncSession):
+        """Test that sequence values are reserved a block at a time."""
+        leases = []
+        counter = iter(range(1, 10**6))
+
+        async def reserve(count, session):
+            leases.append(count)
+            return [next(counter) for _ in range(count)]
+
+        allocator = CodeAllocator(ShortCodeCodec(6), block_size=10, reserve=reserve)
+        codes = [await allocator.allocate(db_session) for _ in range(25)]
+
+        assert len(set(codes)) == 25
+        assert leases == [10, 10, 10]
+        assert allocator.remaining == 5
+
+    @pytest.mark.asyncio
+    async def test_skips_codes_of_older_links(self, db_session: AsyncSession):
+        """Test that a code already used by a pre-sequence link is never reissued."""
+        codec = ShortCodeCodec(6, salt=7)
+        await LinkRepo.create("https://legacy.com", codec.encode(2), db_session)
+
+        async def reserve(count, session):
+            return list(range(1, count + 1))
+
+        allocator = CodeAllocator(codec, block_size=3, reserve=reserve)
+        codes = await allocator.allocate_many(2, db_session)
+
+        assert codes == [codec.encode(1), codec.encode(3)]
+        assert allocator.skipped == 1
+
+    @pytest.mark.asyncio
+    async def test_allocate_many(self, db_session: AsyncSession):
+        """Test that a large request reserves everything in one lease."""
+        allocator = CodeAllocator(ShortCodeCodec(6), block_size=10)
+
+        codes = await allocator.allocate_many(50, db_session)
+
+        assert len(set(codes)) == 50
+        assert allocator.remaining == 0
@@ -0,0 +1,234 @@
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import bindparam, select
+from sqlalchemy.dialects.postgresql import asyncpg, psycopg
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlmodel import SQLModel
+
+from src.database.compiled import PrecompiledQuery
+from src.database.core import DatabaseRouter, ReplicaSet, asyncpg_connect_args
+from src.link.code_filter import CodeFilter
+from src.link.models import Link
+from src.link.service import ShortenerService
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeEngine:
+    def __init__(self, checked_out: int = 0):
+        self.pool = SimpleNamespace(checkedout=lambda: checked_out)
+
+
+@pytest_asyncio.fixture
+async def sqlite_cluster(tmp_path):
+    """A primary and two replicas, each a separate SQLite file."""
+    engines = [
+        create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/{name}.db")
+        for name in ("primary", "replica0", "replica1")
+    ]
+    for engine in engines:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+    yield engines
+
+    for engine in engines:
+        await engine.dispose()
+
+
+def make_router(engines, **kwargs) -> DatabaseRouter:
+    primary, *replicas = engines
+    sessionmaker = async_sessionmaker(
+        primary, class_=AsyncSession, expire_on_commit=False
+    )
+    return DatabaseRouter(sessionmaker, ReplicaSet(replicas), **kwargs)
+
+
+class TestReplicaSet:
+    """Test cases for ReplicaSet class."""
+
+    def test_round_robin(self):
+        """Test that replicas are used in turn."""
+        a, b = FakeEngine(), FakeEngine()
+        replicas = ReplicaSet([a, b], selection="round_robin")
+
+        assert [replicas.choose() for _ in range(4)] == [a, b, a, b]
+
+    def test_least_connections(self):
+        """Test that the least busy replica is picked."""
+        busy, idle = FakeEngine(5), FakeEngine(1)
+        replicas = ReplicaSet([busy, idle], selection="least_connections")
+
+        assert replicas.choose() is idle
+
+    def test_ejection_and_readmission(self):
+        """Test that an ejected replica is skipped until its timeout passes."""
+        clock = FakeClock()
+        a, b = FakeEngine(), FakeEngine()
+        replicas = ReplicaSet([a, b], eject_seconds=10, clock=clock)
+
+        replicas.eject(a)
+        assert {replicas.choose() for _ in range(3)} == {b}
+
+        replicas.eject(b)
+        assert replicas.choose() is None
+
+        clock.now = 11
+        assert replicas.healthy() == [a, b]
+
+    def test_unknown_selection(self):
+        """Test that an invalid selection strategy is rejected."""
+        with pytest.raises(ValueError):
+            ReplicaSet([], selection="random")
+
+
+class TestDatabaseRouter:
+    """Test cases for DatabaseRouter class, with SQLite files as replicas."""
+
+    @pytest.mark.asyncio
+    async def test_sessions_are_routed(self, sqlite_cluster):
+        """Test that writes go to the primary and reads to the replicas."""
+        primary, replica0, replica1 = sqlite_cluster
+        router = make_router(sqlite_cluster)
+
+        async with router.write_session() as session:
+            assert session.bind is primary
+        async with router.read_session() as first, router.read_session() as second:
+            assert {first.bind, second.bind} == {replica0, replica1}
+            assert first.info["replica"] is first.bind
+
+    @pytest.mark.asyncio
+    async def test_fallback_to_primary_for_fresh_codes(self, sqlite_cluster):
+        """Test that a code missing on a lagging replica is found on the primary."""
+        router = make_router(sqlite_cluster)
+        async with router.write_session() as session:
+            session.add(Link(target="https://example.com/fresh", code="fresh1"))
+            await session.commit()
+
+        service = ShortenerService()
+        async with router.read_session() as session:
+            link = await service.get_target("fresh1", session)
+            stats_link = await service.get_link_by_code("fresh1", session)
+
+        assert link is not None
+        assert link.target == "https://example.com/fresh"
+        assert stats_link is not None
+
+    @pytest.mark.asyncio
+    async def test_fallback_only_for_codes_passing_the_filter(self, sqlite_cluster):
+        """Test that codes the code filter rules out are not retried on the primary."""
+        router = make_router(sqlite_cluster)
+        code_filter = CodeFilter(length=6, min_capacity=1000)
+        async with router.write_session() as session:
+            await code_filter.build(session)
+            session.add(Link(target="https://example.com/fresh", code="fresh2"))
+            await session.commit()
+        # Announced by the worker that created it
+        code_filter.add(["fresh2"])
+        service = ShortenerService(code_filter=code_filter)
+        fallbacks = []
+
+        async with router.read_session() as session:
+            primary_fallback = session.info["primary_fallback"]
+
+            def counted():
+                fallbacks.append(1)
+                return primary_fallback()
+
+            session.info["primary_fallback"] = counted
+            assert await service.get_link_by_code("scan01", session) is None
+            assert await service.get_url_stats("scan02", session) is None
+            assert fallbacks == []
+
+            assert await service.get_link_by_code("fresh2", session) is not None
+            assert fallbacks == [1]
+        assert code_filter.stats.passed == 0
+
+    @pytest.mark.asyncio
+    async def test_no_fallback(self, sqlite_cluster):
+        """Test that the fallback can be disabled."""
+        router = make_router(sqlite_cluster, fallback_to_primary=False)
+        async with router.write_session() as session:
+            session.add(Link(target="https://example.com/lag", code="lagged"))
+            await session.commit()
+
+        async with router.read_session() as session:
+            assert await ShortenerService().get_target("lagged", session) is None
+
+    @pytest.mark.asyncio
+    async def test_connection_error_ejects_replica(self, sqlite_cluster):
+        """Test that a failing replica stops receiving reads."""
+        router = make_router(sqlite_cluster)
+        session = router.read_session()
+        failed = session.info["replica"]
+
+        router.report_failure(session, OperationalError("SELECT 1", {}, OSError()))
+        await session.close()
+
+        assert failed not in router.replicas.healthy()
+        assert {router.read_session().bind for _ in range(3)} == set(
+            router.replicas.healthy()
+        )
+
+
+class TestPrecompiledQuery:
+    """Test cases for statements compiled once per dialect."""
+
+    @pytest.mark.asyncio
+    async def test_compiled_once(self, db_session: AsyncSession, sample_link: Link):
+        """Test that the SQL is compiled on first use and reused after."""
+        table = Link.__table__
+        query = PrecompiledQuery(
+            select(table.c.id, table.c.target).where(table.c.code == bindparam("code"))
+        )
+
+        row = (await query.execute(db_session, code="abc123")).first()
+        assert tuple(row) == (sample_link.id, "https://example.com")
+
+        with patch.object(query.statement, "compile") as compile_:
+            assert (await query.execute(db_session, code="nope12")).first() is None
+            compile_.assert_not_called()
+
+    def test_parameter_styles(self):
+        """Test that positional and named dialects both get their parameters."""
+        table = Link.__table__
+        query = PrecompiledQuery(
+            select(table.c.id).where(table.c.code == bindparam("code"))
+        )
+
+        sql, names = query.compile(asyncpg.dialect())
+        assert sql.endswith("WHERE link.code = $1::VARCHAR")
+        assert names == ["code"]
+        sql, names = query.compile(psycopg.dialect())
+        assert sql.endswith("WHERE link.code = %(code)s::VARCHAR")
+        assert names is None
+
+
+class TestStatementCache:
+    """Test cases for asyncpg prepared statement caching options."""
+
+    def test_default_cache(self):
+        """Test that both statement caches get the configured size."""
+        assert asyncpg_connect_args(100) == {
+            "prepared_statement_cache_size": 100,
+            "statement_cache_size": 100,
+        }
+
+    def test_pgbouncer_mode(self):
+        """Test that disabling the cache also makes statement names unique."""
+        args = asyncpg_connect_args(0)
+
+        assert args["prepared_statement_cache_size"] == 0
+        assert args["statement_cache_size"] == 0
+        name_func = args["prepared_statement_name_func"]
+        assert name_func() != name_func()
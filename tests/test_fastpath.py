@@ -0,0 +1,154 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.database.core import DatabaseRouter
+from src.fastpath import RedirectFastPath
+from src.link.cache import CachedLink, LinkCache
+from src.link.recorder import VisitRecorder
+from src.link.repo import LinkRepo
+from src.link.service import ShortenerService
+from src.link.snapshot import RedirectSnapshot, SnapshotWriter
+from src.link.utm import Utm
+from src.metrics import REQUEST_LATENCY, MetricsMiddleware
+
+
+def make_app(test_sessionmaker, **kwargs):
+    app = FastAPI()
+
+    @app.get("/metrics")
+    async def metrics():
+        return {"static": True}
+
+    service = ShortenerService(cache=LinkCache(max_size=100))
+    recorder = VisitRecorder(sessionmaker=test_sessionmaker)
+    fast_path = RedirectFastPath(
+        app,
+        routes=app.routes,
+        service=service,
+        recorder=recorder,
+        database=DatabaseRouter(test_sessionmaker),
+        **kwargs,
+    )
+    return fast_path, service, recorder
+
+
+async def get(app, path: str):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path)
+
+
+class TestRedirectFastPath:
+    """Test cases for RedirectFastPath class."""
+
+    @pytest.mark.asyncio
+    async def test_redirect_and_record(
+        self, db_session: AsyncSession, test_sessionmaker
+    ):
+        """Test that a known code redirects and queues a visit."""
+        link = await LinkRepo.create(
+            "https://example.com/a b?q=1", "fast01", db_session
+        )
+        app, service, recorder = make_app(test_sessionmaker)
+
+        response = await get(app, "/fast01")
+
+        assert response.status_code == 307
+        assert response.headers["location"] == "https://example.com/a%20b?q=1"
+        assert response.headers["content-length"] == "0"
+        assert recorder.queue.get_nowait().link_id == link.id
+        assert "fast01" in service.cache
+
+        await get(app, "/fast01?utm_source=news&utm_campaign=spring")
+        assert recorder.queue.get_nowait().utm == Utm(source="news", campaign="spring")
+
+    @pytest.mark.asyncio
+    async def test_cache_hit_skips_database(self, test_sessionmaker):
+        """Test that cached codes are served without opening a session."""
+        app, service, _ = make_app(test_sessionmaker)
+        service.cache.set("cached", CachedLink(7, "https://cached.com"))
+        app.database = None
+
+        response = await get(app, "/cached")
+
+        assert response.status_code == 307
+        assert response.headers["location"] == "https://cached.com"
+
+    @pytest.mark.asyncio
+    async def test_snapshot_skips_database(self, test_sessionmaker, tmp_path):
+        """Test that codes in the redirect snapshot need neither cache nor session."""
+        path = tmp_path / "links.snap"
+        with SnapshotWriter(path) as writer:
+            writer.add("snap01", CachedLink(7, "https://snap.com", status=308))
+        app, service, recorder = make_app(test_sessionmaker)
+        service.use_snapshot(RedirectSnapshot(path))
+        app.database = None
+
+        response = await get(app, "/snap01")
+        service.snapshot.close()
+
+        assert response.status_code == 308
+        assert response.headers["location"] == "https://snap.com"
+        assert recorder.queue.get_nowait().link_id == 7
+        assert "snap01" not in service.cache
+
+    @pytest.mark.asyncio
+    async def test_redirect_status_and_cache_control(self, test_sessionmaker):
+        """Test per-link status codes and max-age next to the global ones."""
+        app, service, _ = make_app(test_sessionmaker)
+        service.cache.set("perm01", CachedLink(7, "https://a.com", None, 308, 3600))
+        service.cache.set("temp01", CachedLink(8, "https://b.com"))
+        app.database = None
+
+        permanent = await get(app, "/perm01")
+        temporary = await get(app, "/temp01")
+
+        assert permanent.status_code == 308
+        assert permanent.headers["cache-control"] == "public, max-age=3600"
+        assert temporary.status_code == 307
+        assert temporary.headers["cache-control"] == "no-store"
+
+    @pytest.mark.asyncio
+    async def test_not_found(self, test_sessionmaker):
+        """Test that unknown codes get the same 404 body as the route."""
+        app, _, recorder = make_app(test_sessionmaker)
+
+        response = await get(app, "/nope00")
+
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Link not found"}
+        assert recorder.queue.empty()
+
+    @pytest.mark.asyncio
+    async def test_expired(self, test_sessionmaker):
+        """Test that cached expired links get a 410 and no visit."""
+        app, service, recorder = make_app(test_sessionmaker)
+        service.cache.set("gone01", CachedLink(7, "https://gone.com", 1.0))
+        app.database = None
+
+        response = await get(app, "/gone01")
+
+        assert response.status_code == 410
+        assert response.json() == {"detail": "Link expired"}
+        assert recorder.queue.empty()
+
+    @pytest.mark.asyncio
+    async def test_delegates_other_requests(self, test_sessionmaker):
+        """Test that static routes, nested paths and non-GET go to the app."""
+        app, _, _ = make_app(test_sessionmaker)
+
+        assert (await get(app, "/metrics")).json() == {"static": True}
+        assert (await get(app, "/api/v1")).status_code == 404
+        assert (await get(app, "/api/v1")).json() == {"detail": "Not Found"}
+
+    @pytest.mark.asyncio
+    async def test_labels_route_for_metrics(self, test_sessionmaker):
+        """Test that fast path requests are labelled with the route template."""
+        app, _, _ = make_app(test_sessionmaker)
+        before = REQUEST_LATENCY.labels("GET", "/{short_code}").count
+
+        await get(MetricsMiddleware(app, enabled=True), "/nope00")
+
+        assert REQUEST_LATENCY.labels("GET", "/{short_code}").count == before + 1
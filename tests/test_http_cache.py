@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+from starlette.datastructures import Headers
+
+from src.http_cache import (
+    cache_control,
+    cache_control_header,
+    conditional_json,
+    etag,
+    http_date,
+    not_modified,
+)
+
+
+class TestHttpCache:
+    """Test cases for the HTTP caching helpers."""
+
+    def test_cache_control(self):
+        """Test cacheable, revalidated and uncacheable responses."""
+        assert cache_control(3600) == "public, max-age=3600"
+        assert cache_control(0) == "no-store"
+        assert cache_control(0, revalidate=True) == "no-cache"
+        assert cache_control_header(60) == (b"cache-control", b"public, max-age=60")
+
+    def test_if_none_match(self):
+        """Test strong tags, weak comparison, lists and the wildcard."""
+        tag = etag(b"{}")
+
+        assert not_modified(Headers({"if-none-match": tag}), tag)
+        assert not_modified(Headers({"if-none-match": f'"x", W/{tag}'}), tag)
+        assert not_modified(Headers({"if-none-match": "*"}), tag)
+        assert not not_modified(Headers({"if-none-match": etag(b"[]")}), tag)
+        assert not not_modified(Headers(), tag)
+
+    def test_if_modified_since(self):
+        """Test dates, second resolution and the precedence of If-None-Match."""
+        modified = datetime(2026, 3, 1, 9, 30, 15, 500_000)
+        same = Headers(
+            {"if-modified-since": http_date(modified + timedelta(seconds=0.5))}
+        )
+        # Dates are rounded up: the same second may hold later changes
+        earlier = Headers({"if-modified-since": http_date(modified)})
+
+        assert not_modified(same, '"a"', modified)
+        assert not not_modified(earlier, '"a"', modified)
+        assert not not_modified(same, '"a"')
+        assert not not_modified(
+            Headers({"if-modified-since": "yesterday"}), '"a"', modified
+        )
+        assert not not_modified(
+            Headers({"if-modified-since": http_date(modified), "if-none-match": '"b"'}),
+            '"a"',
+            modified,
+        )
+
+    def test_conditional_json(self):
+        """Test that a matching request gets a 304 with the same validators."""
+        modified = datetime(2026, 3, 1, 9)
+        response = conditional_json(
+            Headers(), {"a": 1}, max_age=0, last_modified=modified
+        )
+
+        assert response.status_code == 200
+        assert response.headers["cache-control"] == "no-cache"
+        assert response.headers["last-modified"] == http_date(modified)
+
+        revalidated = conditional_json(
+            Headers({"if-none-match": response.headers["etag"]}),
+            {"a": 1},
+            max_age=0,
+        )
+        assert revalidated.status_code == 304
+        assert revalidated.body == b""
+        assert revalidated.headers["etag"] == response.headers["etag"]
+        assert "last-modified" not in revalidated.headers
+
+        changed = conditional_json(
+            Headers({"if-none-match": response.headers["etag"]}),
+            {"a": 2},
+            max_age=60,
+        )
+        assert changed.status_code == 200
+        assert changed.headers["cache-control"] == "public, max-age=60"
+
+        current = conditional_json(
+            Headers(), {"a": 1}, max_age=0, last_modified=datetime.now()
+        )
+        assert "last-modified" not in current.headers
@@ -0,0 +1,103 @@
+import json
+import logging
+import queue
+
+import pytest
+from httpx import ASGITransport, AsyncClient
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse
+from starlette.routing import Route
+
+from src.logger import (
+    AccessLogMiddleware,
+    JsonFormatter,
+    LazyQueueHandler,
+    get_client_ip,
+)
+
+
+async def redirect_to_url(request):
+    return PlainTextResponse("", status_code=307)
+
+
+async def other(request):
+    return PlainTextResponse("ok")
+
+
+def make_app(**kwargs) -> AccessLogMiddleware:
+    app = Starlette(
+        routes=[Route("/api/other", other), Route("/{code}", redirect_to_url)]
+    )
+    return AccessLogMiddleware(app, **kwargs)
+
+
+class TestAccessLogMiddleware:
+    """Test cases for AccessLogMiddleware class."""
+
+    @pytest.mark.asyncio
+    async def test_logs_structured_record(self, caplog):
+        """Test that each request produces one access record."""
+        app = make_app()
+        transport = ASGITransport(app=app, client=("10.0.0.1", 1234))
+
+        with caplog.at_level(logging.INFO, logger="src.access"):
+            async with AsyncClient(transport=transport, base_url="http://t") as client:
+                await client.get(
+                    "/abc123", headers={"X-Forwarded-For": "1.2.3.4, 5.6.7.8"}
+                )
+
+        [record] = [r for r in caplog.records if r.name == "src.access"]
+        assert record.access["method"] == "GET"
+        assert record.access["path"] == "/abc123"
+        assert record.access["status"] == 307
+        assert record.access["client_ip"] == "1.2.3.4"
+        assert record.access["duration_ms"] >= 0
+
+    @pytest.mark.asyncio
+    async def test_sampling_per_endpoint(self, caplog):
+        """Test that only the configured endpoint is sampled."""
+        app = make_app(sample_rates={"redirect_to_url": 0.0}, rng=lambda: 0.5)
+        transport = ASGITransport(app=app)
+
+        with caplog.at_level(logging.INFO, logger="src.access"):
+            async with AsyncClient(transport=transport, base_url="http://t") as client:
+                await client.get("/abc123")
+                await client.get("/api/other")
+
+        paths = [r.access["path"] for r in caplog.records if r.name == "src.access"]
+        assert paths == ["/api/other"]
+
+
+class TestLogging:
+    """Test cases for the logging building blocks."""
+
+    def test_json_formatter(self):
+        """Test that access fields are merged into the JSON line."""
+        record = logging.LogRecord(
+            "src.access", logging.INFO, "", 0, "%s", ("x",), None
+        )
+        record.access = {"status": 200}
+
+        data = json.loads(JsonFormatter().format(record))
+
+        assert data["message"] == "x"
+        assert data["status"] == 200
+        assert data["level"] == "INFO"
+
+    def test_queue_handler_does_not_format(self):
+        """Test that records are queued without interpolating arguments."""
+        log_queue = queue.SimpleQueue()
+        handler = LazyQueueHandler(log_queue)
+        record = logging.LogRecord("t", logging.INFO, "", 0, "%s-%s", ("a", "b"), None)
+
+        handler.emit(record)
+
+        queued = log_queue.get_nowait()
+        assert queued.msg == "%s-%s"
+        assert queued.args == ("a", "b")
+
+    def test_get_client_ip(self):
+        """Test client IP resolution order."""
+        assert get_client_ip({"headers": [(b"x-real-ip", b" 9.9.9.9 ")]}) == "9.9.9.9"
+        assert get_client_ip({"headers": [], "client": ("8.8.8.8", 1)}) == "8.8.8.8"
+        assert get_client_ip({"headers": []}) == "unknown"
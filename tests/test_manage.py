@@ -0,0 +1,58 @@
+from types import SimpleNamespace
+
+from src import manage
+
+
+class TestWarmCacheCommand:
+    """Test cases for the warm-cache command."""
+
+    def test_posts_codes(self, monkeypatch, tmp_path, capsys):
+        """Test that codes from flags and a file are sent in one request."""
+        calls = []
+
+        def post(url, **kwargs):
+            calls.append((url, kwargs))
+            report = {
+                "links": 3,
+                "shared": 0,
+                "chunks": 1,
+                "seconds": 0.01,
+                "memory_bytes": 2**20,
+                "instance": "abc",
+                "broadcast": True,
+            }
+            return SimpleNamespace(is_error=False, json=lambda: report)
+
+        monkeypatch.setattr(manage.httpx, "post", post)
+        codes_file = tmp_path / "codes.txt"
+        codes_file.write_text("bbb\n\nccc\n")
+
+        status = manage.main(
+            [
+                "warm-cache",
+                "--code",
+                "aaa",
+                "--codes-file",
+                str(codes_file),
+                "--url",
+                "http://app/",
+                "--token",
+                "secret",
+            ]
+        )
+
+        [(url, kwargs)] = calls
+        assert status == 0
+        assert url == "http://app/api/v1/link/cache/warm"
+        assert kwargs["json"] == {
+            "top": None,
+            "codes": ["aaa", "bbb", "ccc"],
+            "broadcast": True,
+        }
+        assert kwargs["headers"] == {"X-Admin-Token": "secret"}
+        assert "Loaded 3 links" in capsys.readouterr().out
+
+    def test_needs_top_or_codes(self):
+        """Test that the command refuses ambiguous requests."""
+        assert manage.main(["warm-cache"]) == 2
+        assert manage.main(["warm-cache", "--top", "5", "--code", "aaa"]) == 2
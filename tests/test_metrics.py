@@ -0,0 +1,103 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.main import app as main_app
+from src.metrics import (
+    REQUEST_LATENCY,
+    Counter,
+    Gauge,
+    Histogram,
+    Metric,
+    MetricsMiddleware,
+    Registry,
+)
+
+
+class TestRegistry:
+    """Test cases for the metric types and text exposition."""
+
+    def test_counter_and_gauge(self):
+        """Test label handling and rendering of simple metrics."""
+        registry = Registry()
+        counter = Counter("hits_total", "Hits", ["route"], registry=registry)
+        gauge = Gauge("depth", "Depth", registry=registry)
+        counter.labels("/a").inc()
+        counter.labels("/a").inc(2)
+        gauge.set_function(lambda: 7)
+
+        text = registry.render()
+
+        assert "# TYPE hits_total counter" in text
+        assert 'hits_total{route="/a"} 3' in text
+        assert "depth 7" in text
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test that bucket counts accumulate up to +Inf."""
+        registry = Registry()
+        histogram = Histogram("latency", "Latency", buckets=[0.1, 1], registry=registry)
+        for value in (0.05, 0.5, 5):
+            histogram.observe(value)
+
+        lines = registry.render().splitlines()
+
+        assert 'latency_bucket{le="0.1"} 1' in lines
+        assert 'latency_bucket{le="1"} 2' in lines
+        assert 'latency_bucket{le="+Inf"} 3' in lines
+        assert "latency_count 3" in lines
+        assert "latency_sum 5.55" in lines
+
+    def test_metric_needs_a_type(self):
+        """Test that the untyped base class cannot be registered."""
+        with pytest.raises(TypeError):
+            Metric("untyped", "Untyped", registry=Registry())
+
+    def test_duplicate_name(self):
+        """Test that a metric name can only be registered once."""
+        registry = Registry()
+        Counter("dup", "Dup", registry=registry)
+
+        with pytest.raises(ValueError):
+            Counter("dup", "Dup", registry=registry)
+
+    def test_label_escaping(self):
+        """Test that label values are escaped."""
+        registry = Registry()
+        Counter("c", "C", ["path"], registry=registry).labels('a"b').inc()
+
+        assert 'c{path="a\\"b"} 1' in registry.render()
+
+
+class TestMetricsMiddleware:
+    """Test cases for MetricsMiddleware class."""
+
+    @pytest.mark.asyncio
+    async def test_records_route_template(self):
+        """Test that latency is labelled by route template, not raw path."""
+        app = FastAPI()
+
+        @app.get("/items/{item_id}")
+        async def item(item_id: str):
+            return {}
+
+        transport = ASGITransport(app=MetricsMiddleware(app, enabled=True))
+        async with AsyncClient(transport=transport, base_url="http://t") as client:
+            await client.get("/items/1")
+            await client.get("/items/2")
+            await client.get("/nowhere/at/all")
+
+        assert REQUEST_LATENCY.labels("GET", "/items/{item_id}").count == 2
+        assert REQUEST_LATENCY.labels("GET", "unmatched").count >= 1
+
+    @pytest.mark.asyncio
+    async def test_metrics_endpoint(self):
+        """Test that the application exposes its metrics."""
+        transport = ASGITransport(app=main_app)
+        async with AsyncClient(transport=transport, base_url="http://t") as client:
+            response = await client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "db_pool_saturation" in response.text
+        assert "link_cache_hit_ratio" in response.text
+        assert "visit_queue_depth" in response.text
@@ -3,7 +3,7 @@ from datetime import datetime
 import pytest
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.link.models import Link, Visit
+from src.link.models import Link, UtmSet, Visit
 
 
 class TestLinkModel:
@@ -51,13 +51,13 @@ class TestLinkModel:
 
         # Create visits for the link
         visit1 = Visit(link_id=link.id)
-        visit2 = Visit(link_id=link.id, utm="utm_source=test")
+        visit2 = Visit(link_id=link.id)
 
         db_session.add_all([visit1, visit2])
         await db_session.commit()
 
-        # Refresh and check relationship
-        await db_session.refresh(link)
+        # Refresh and check relationship (visits are only loaded on request)
+        await db_session.refresh(link, attribute_names=["visits"])
         assert len(link.visits) == 2
         assert all(visit.link_id == link.id for visit in link.visits)
 
@@ -69,7 +69,10 @@ class TestVisitModel:
     async def test_visit_creation(self, db_session: AsyncSession, sample_link: Link):
         """Test Visit model database operations."""
         # Create a visit
-        visit = Visit(link_id=sample_link.id, utm="utm_source=test")
+        utm_set = UtmSet(hash=b"test", source="test")
+        db_session.add(utm_set)
+        await db_session.flush()
+        visit = Visit(link_id=sample_link.id, utm_set_id=utm_set.id)
         db_session.add(visit)
         await db_session.commit()
         await db_session.refresh(visit)
@@ -77,5 +80,5 @@ class TestVisitModel:
         # Verify the visit was saved
         assert visit.id is not None
         assert visit.link_id == sample_link.id
-        assert visit.utm == "utm_source=test"
+        assert visit.utm_set_id == utm_set.id
         assert isinstance(visit.visited_at, datetime)
@@ -0,0 +1,174 @@
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src import main, manage
+from src.database import partitions
+from src.database.partitions import (
+    PartitionReport,
+    add_months,
+    is_partition_name,
+    maintain_partitions,
+    month_start,
+    partition_name,
+)
+from src.link.models import Link, Visit
+
+
+class TestPartitionNames:
+    """Test cases for monthly partition arithmetic and naming."""
+
+    def test_month_arithmetic(self):
+        """Test that months roll over year boundaries both ways."""
+        month = month_start(datetime(2026, 11, 17, 8, 30))
+        assert month == datetime(2026, 11, 1)
+        assert add_months(month, 2) == datetime(2027, 1, 1)
+        assert add_months(month, -11) == datetime(2025, 12, 1)
+        assert add_months(month, 0) == month
+
+    def test_partition_names(self):
+        """Test that partition names encode the month they hold."""
+        assert partition_name("visit", datetime(2026, 3, 1)) == "visit_p2026_03"
+        assert is_partition_name("visit_p2026_03")
+        assert not is_partition_name("visit")
+        assert not is_partition_name("visit_rollup")
+
+
+class TestMaintainPartitions:
+    """Test cases for the non-partitioned fallback used on SQLite."""
+
+    @pytest.mark.asyncio
+    async def test_retention_deletes_expired_rows(
+        self, test_engine, db_session: AsyncSession
+    ):
+        """Test that visits older than the retention window are deleted."""
+        link = Link(target="https://example.com", code="part01")
+        db_session.add(link)
+        await db_session.flush()
+        db_session.add_all(
+            Visit(link_id=link.id, visited_at=visited_at)
+            for visited_at in (
+                datetime(2026, 6, 30, 23, 59),
+                datetime(2026, 7, 1),
+                datetime(2026, 10, 18),
+            )
+        )
+        await db_session.commit()
+
+        report = await maintain_partitions(
+            test_engine,
+            "visit",
+            "visited_at",
+            ahead=3,
+            retention=3,
+            now=datetime(2026, 10, 18, 12),
+        )
+
+        assert report == PartitionReport(partitioned=False, deleted=1)
+        remaining = await db_session.scalar(select(func.min(Visit.visited_at)))
+        assert remaining == datetime(2026, 7, 1)
+
+    @pytest.mark.asyncio
+    async def test_without_retention_keeps_everything(
+        self, test_engine, db_session: AsyncSession
+    ):
+        """Test that nothing is deleted unless a retention is given."""
+        link = Link(target="https://example.com", code="part02")
+        db_session.add(link)
+        await db_session.flush()
+        db_session.add(Visit(link_id=link.id, visited_at=datetime(2000, 1, 1)))
+        await db_session.commit()
+
+        report = await maintain_partitions(test_engine, "visit", "visited_at", 3)
+
+        assert report.deleted == 0
+        assert await db_session.scalar(select(func.count()).select_from(Visit)) == 1
+
+    @pytest.mark.asyncio
+    async def test_zero_retention_keeps_current_month(
+        self, test_engine, db_session: AsyncSession
+    ):
+        """Test that a retention of 0 months keeps only the current month."""
+        link = Link(target="https://example.com", code="part03")
+        db_session.add(link)
+        await db_session.flush()
+        db_session.add_all(
+            Visit(link_id=link.id, visited_at=visited_at)
+            for visited_at in (datetime(2026, 9, 30, 23, 59), datetime(2026, 10, 1))
+        )
+        await db_session.commit()
+
+        report = await maintain_partitions(
+            test_engine,
+            "visit",
+            "visited_at",
+            ahead=3,
+            retention=0,
+            now=datetime(2026, 10, 18, 12),
+        )
+
+        assert report.deleted == 1
+        remaining = await db_session.scalar(select(func.min(Visit.visited_at)))
+        assert remaining == datetime(2026, 10, 1)
+
+
+class TestCreateVisitPartitions:
+    """Test cases for the partition check run by every worker."""
+
+    @pytest.mark.asyncio
+    async def test_workers_keep_creating_partitions(self, monkeypatch):
+        """Test that workers check the partitions again after start-up."""
+        calls = []
+
+        async def maintain(engine, table, column, ahead):
+            calls.append(ahead)
+            if len(calls) == 1:
+                raise RuntimeError("database down")
+            if len(calls) == 3:
+                raise asyncio.CancelledError
+
+        monkeypatch.setattr(main, "maintain_partitions", maintain)
+        monkeypatch.setattr(main.settings, "VISIT_PARTITIONS_INTERVAL", 0.001)
+
+        with pytest.raises(asyncio.CancelledError):
+            await main.create_visit_partitions()
+
+        assert calls == [main.settings.VISIT_PARTITIONS_AHEAD] * 3
+
+
+class TestPartitionsCommand:
+    """Test cases for the partitions command."""
+
+    def test_reports_changes(self, monkeypatch, capsys):
+        """Test that the command passes its options and prints the report."""
+        calls = []
+
+        async def maintain(engine, table, column, **kwargs):
+            calls.append((table, column, kwargs))
+            return PartitionReport(
+                partitioned=True,
+                created=["visit_p2027_01"],
+                detached=["visit_p2025_09"],
+            )
+
+        monkeypatch.setattr(partitions, "maintain_partitions", maintain)
+
+        status = manage.main(
+            ["partitions", "--ahead", "2", "--retention", "12", "--keep-detached"]
+        )
+
+        assert status == 0
+        assert calls == [
+            (
+                "visit",
+                "visited_at",
+                {"ahead": 2, "retention": 12, "keep_detached": True},
+            )
+        ]
+        out = capsys.readouterr().out
+        assert "Created partitions: visit_p2027_01" in out
+        assert "Detached partitions: visit_p2025_09" in out
+        assert "Dropped partitions: none" in out
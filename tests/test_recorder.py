@@ -0,0 +1,165 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.link.models import UtmSet, Visit
+from src.link.recorder import VisitRecorder
+from src.link.repo import LinkRepo, VisitRollupRepo, VisitUtmRollupRepo
+from src.link.utm import Utm
+
+
+class TestVisitRecorder:
+    """Test cases for VisitRecorder class."""
+
+    @staticmethod
+    async def _visit_count(link_id: int, session: AsyncSession) -> int:
+        result = await session.execute(
+            select(func.count(Visit.id)).where(Visit.link_id == link_id)
+        )
+        return result.scalar_one()
+
+    @pytest.mark.asyncio
+    async def test_flush_coalesces_per_link(
+        self, db_session: AsyncSession, test_sessionmaker
+    ):
+        """Test that queued visits are written and counted per link."""
+        first = await LinkRepo.create("https://example.com/a", "rec001", db_session)
+        second = await LinkRepo.create("https://example.com/b", "rec002", db_session)
+        recorder = VisitRecorder(sessionmaker=test_sessionmaker, batch_size=4)
+
+        for _ in range(5):
+            await recorder.record(first.id)
+        await recorder.record(second.id, utm=Utm(source="test"))
+        await recorder.flush()
+
+        assert recorder.queue.empty()
+        assert await self._visit_count(first.id, db_session) == 5
+        assert await self._visit_count(second.id, db_session) == 1
+        assert await LinkRepo.get_constant_visits_count(first.id, db_session) == 5
+        assert await LinkRepo.get_constant_visits_count(second.id, db_session) == 1
+
+    @pytest.mark.asyncio
+    async def test_flush_maintains_rollup(
+        self, db_session: AsyncSession, test_sessionmaker
+    ):
+        """Test that flushed visits are added to their hourly buckets."""
+        link = await LinkRepo.create("https://example.com/r", "rec004", db_session)
+        recorder = VisitRecorder(sessionmaker=test_sessionmaker)
+        morning = datetime(2026, 3, 1, 9, 15)
+
+        await recorder.record(link.id, visited_at=morning)
+        await recorder.record(link.id, visited_at=morning.replace(minute=59))
+        await recorder.record(link.id, visited_at=morning.replace(hour=10))
+        await recorder.flush()
+        await recorder.record(link.id, visited_at=morning)
+        await recorder.flush()
+
+        series = await VisitRollupRepo.get_series(
+            link.id, datetime(2026, 3, 1), datetime(2026, 3, 2), db_session
+        )
+        assert [tuple(row) for row in series] == [
+            (datetime(2026, 3, 1, 9), 3),
+            (datetime(2026, 3, 1, 10), 1),
+        ]
+
+    @pytest.mark.asyncio
+    async def test_utm_rollup(self, db_session: AsyncSession, test_sessionmaker):
+        """Test that UTM sets are stored once and rolled up per hour."""
+        link = await LinkRepo.create("https://example.com/u", "rec007", db_session)
+        recorder = VisitRecorder(sessionmaker=test_sessionmaker)
+        morning = datetime(2026, 3, 1, 9, 15)
+        news = Utm(source="news", medium="email")
+
+        await recorder.record(link.id, utm=news, visited_at=morning)
+        await recorder.record(link.id, utm=news, visited_at=morning)
+        await recorder.record(link.id, utm=Utm(source="ads"), visited_at=morning)
+        await recorder.record(link.id, visited_at=morning)
+        await recorder.flush()
+
+        sources = await db_session.execute(
+            select(UtmSet.source)
+            .select_from(Visit)
+            .outerjoin(UtmSet, Visit.utm_set_id == UtmSet.id)
+            .where(Visit.link_id == link.id)
+        )
+        assert sorted(sources.scalars(), key=str) == [None, "ads", "news", "news"]
+        sources = await VisitUtmRollupRepo.get_breakdown(link.id, "source", db_session)
+        assert [tuple(row) for row in sources] == [("news", 2), ("ads", 1)]
+        mediums = await VisitUtmRollupRepo.get_breakdown(link.id, "medium", db_session)
+        assert [tuple(row) for row in mediums] == [("email", 2)]
+
+    @pytest.mark.asyncio
+    async def test_max_visits_expires_link(
+        self, db_session: AsyncSession, test_sessionmaker
+    ):
+        """Test that reaching max_visits expires the link and reports its code."""
+        link = await LinkRepo.create(
+            "https://example.com/m", "rec005", db_session, max_visits=3
+        )
+        other = await LinkRepo.create("https://example.com/n", "rec006", db_session)
+        expired = []
+
+        async def on_expired(codes):
+            expired.extend(codes)
+
+        recorder = VisitRecorder(sessionmaker=test_sessionmaker, on_expired=on_expired)
+        for _ in range(2):
+            await recorder.record(link.id)
+            await recorder.record(other.id)
+        await recorder.flush()
+        assert expired == []
+
+        await recorder.record(link.id)
+        await recorder.flush()
+        await recorder.record(link.id)
+        await recorder.flush()
+
+        assert expired == ["rec005"]
+        row = await LinkRepo.get_target_by_code("rec005", db_session)
+        assert row[2] is not None and row[2] <= datetime.now()
+        assert (await LinkRepo.get_target_by_code("rec006", db_session))[2] is None
+
+    @pytest.mark.asyncio
+    async def test_drop_policy(self, test_sessionmaker):
+        """Test that events are dropped when the queue is full."""
+        recorder = VisitRecorder(
+            sessionmaker=test_sessionmaker, queue_size=2, policy="drop"
+        )
+
+        assert await recorder.record(1)
+        assert await recorder.record(1)
+        assert not await recorder.record(1)
+        assert recorder.dropped == 1
+
+    def test_unknown_policy(self):
+        """Test that an invalid backpressure policy is rejected."""
+        with pytest.raises(ValueError):
+            VisitRecorder(policy="ignore")
+
+    @pytest.mark.asyncio
+    async def test_stop_drains_queue(self, db_session: AsyncSession, test_sessionmaker):
+        """Test that stopping the recorder persists pending visits."""
+        link = await LinkRepo.create("https://example.com/c", "rec003", db_session)
+        recorder = VisitRecorder(sessionmaker=test_sessionmaker, flush_interval=60)
+        await recorder.start()
+
+        for _ in range(3):
+            await recorder.record(link.id)
+        await recorder.stop()
+
+        assert not recorder.running
+        assert await self._visit_count(link.id, db_session) == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_counted(self, test_sessionmaker):
+        """Test that a failing write is logged and counted, not raised."""
+        recorder = VisitRecorder(sessionmaker=test_sessionmaker)
+        await recorder.record(1)
+
+        recorder.sessionmaker = None
+        await recorder.flush()
+
+        assert recorder.failed == 1
+        assert recorder.queue.empty()
@@ -1,10 +1,16 @@
-from datetime import datetime
+import os
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
 
 import pytest
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import delete, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import SQLModel
 
 from src.link.models import Link, Visit
-from src.link.repo import LinkRepo, VisitRepo
+from src.link.repo import LinkRepo, VisitRepo, VisitRollupRepo, hour_bucket
 
 
 class TestLinkRepo:
@@ -50,11 +56,19 @@ class TestLinkRepo:
 
         # Create some visits
         visit1 = Visit(link_id=link.id)
-        visit2 = Visit(link_id=link.id, utm="utm_source=test")
+        visit2 = Visit(link_id=link.id)
         visit3 = Visit(link_id=link.id)
 
         db_session.add_all([visit1, visit2, visit3])
-        await db_session.commit()
+        # Stats are read from the rollup the visit recorder maintains
+        now = datetime.now()
+        await VisitRollupRepo.increment(
+            {
+                (link.id, hour_bucket(now)): 2,
+                (link.id, hour_bucket(now - timedelta(hours=1))): 1,
+            },
+            db_session,
+        )
 
         # Get stats
         stats = await LinkRepo.get_stats_by_code(code, db_session)
@@ -66,6 +80,74 @@ class TestLinkRepo:
         assert stats["visit_count"] == 3
         assert isinstance(stats["created_at"], datetime)
 
+    @pytest.mark.asyncio
+    async def test_get_stats_by_code_without_visits(self, db_session: AsyncSession):
+        """Test that links nobody visited yet still have stats."""
+        await LinkRepo.create("https://example.com/new", "fresh1", db_session)
+
+        stats = await LinkRepo.get_stats_by_code("fresh1", db_session)
+
+        assert stats is not None
+        assert stats["visit_count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_get_or_create(self, db_session: AsyncSession):
+        """Test that a second insert with the same hash returns the first link."""
+        url = "https://example.com/dedup"
+        first = await LinkRepo.get_or_create(url, "dedup1", b"h" * 32, db_session)
+        second = await LinkRepo.get_or_create(url, "dedup2", b"h" * 32, db_session)
+
+        assert first.created
+        assert not second.created
+        assert second.id == first.id
+        assert second.code == "dedup1"
+        assert await LinkRepo.get_by_code("dedup2", db_session) is None
+
+    @pytest.mark.asyncio
+    async def test_bulk_create(self, db_session: AsyncSession):
+        """Test inserting many links in chunks."""
+        links = [(f"https://example.com/{i}", f"bulk{i:03d}") for i in range(25)]
+
+        ids = await LinkRepo.bulk_create(links, db_session, chunk_size=10)
+
+        assert len(ids) == 25
+        found = await LinkRepo.get_by_code("bulk007", db_session)
+        assert found is not None
+        assert found.id == ids["bulk007"]
+        assert found.target == "https://example.com/7"
+        assert found.visits_count == 0
+
+    @pytest.mark.asyncio
+    async def test_stream_targets(self, db_session: AsyncSession):
+        """Test streaming the most visited links and explicit codes in chunks."""
+        db_session.add_all(
+            Link(target=f"https://example.com/{i}", code=f"top{i:03d}", visits_count=i)
+            for i in range(5)
+        )
+        await db_session.commit()
+
+        chunks = [
+            rows
+            async for rows in LinkRepo.stream_targets(db_session, limit=3, chunk_size=2)
+        ]
+        assert [len(rows) for rows in chunks] == [2, 1]
+        assert [row.code for rows in chunks for row in rows] == [
+            "top004",
+            "top003",
+            "top002",
+        ]
+
+        chunks = [
+            rows
+            async for rows in LinkRepo.stream_targets(
+                db_session, codes=["top000", "nope00", "top001"], chunk_size=2
+            )
+        ]
+        assert sorted(row.code for rows in chunks for row in rows) == [
+            "top000",
+            "top001",
+        ]
+
     @pytest.mark.asyncio
     async def test_update_visits_count(self, db_session: AsyncSession):
         """Test updating visits count."""
@@ -109,5 +191,186 @@ class TestVisitRepo:
 
         assert visit.id is not None
         assert visit.link_id == sample_link.id
-        assert visit.utm is None
+        assert visit.utm_set_id is None
         assert isinstance(visit.visited_at, datetime)
+
+    @pytest.mark.asyncio
+    async def test_bulk_create_executemany(
+        self, db_session: AsyncSession, sample_link: Link
+    ):
+        """Test that batches use one executemany, past SQLite's bind limit."""
+        visited_at = datetime(2026, 3, 1, 9)
+        rows = [
+            {"link_id": sample_link.id, "visited_at": visited_at, "utm_set_id": None}
+            for _ in range(12_000)
+        ]
+
+        with capture_statements(db_session) as statements:
+            await VisitRepo.bulk_create(rows, db_session)
+
+        assert len(statements) == 1
+        count = await db_session.scalar(select(func.count()).select_from(Visit))
+        assert count == 12_000
+
+    @pytest.mark.asyncio
+    async def test_bulk_create_copy(self):
+        """Test that large asyncpg batches are sent with COPY in a transaction."""
+        copies = []
+
+        class DriverConnection:
+            in_transaction = False
+
+            def is_in_transaction(self):
+                return self.in_transaction
+
+            async def copy_records_to_table(self, table, records, columns):
+                assert self.in_transaction
+                copies.append((table, records, columns))
+
+        driver = DriverConnection()
+
+        class Connection:
+            async def get_raw_connection(self):
+                return SimpleNamespace(driver_connection=driver)
+
+            async def exec_driver_sql(self, statement):
+                driver.in_transaction = True
+
+        class Session:
+            bind = SimpleNamespace(dialect=SimpleNamespace(driver="asyncpg"))
+            commits = 0
+
+            async def connection(self):
+                return Connection()
+
+            async def commit(self):
+                self.commits += 1
+
+        session = Session()
+        visited_at = datetime(2026, 3, 1, 9)
+        rows = [{"link_id": 1, "visited_at": visited_at, "utm_set_id": 5}] * 3
+
+        await VisitRepo.bulk_create(rows, session, copy_min_rows=3)
+
+        assert copies == [
+            (
+                "visit",
+                [(1, visited_at, 5)] * 3,
+                ("link_id", "visited_at", "utm_set_id"),
+            )
+        ]
+        assert session.commits == 1
+
+    @pytest.mark.asyncio
+    @pytest.mark.skipif(
+        not os.environ.get("TEST_POSTGRES_URI"),
+        reason="set TEST_POSTGRES_URI to an asyncpg URI to run",
+    )
+    async def test_copy_rolled_back_with_session(self):
+        """Test that COPY takes part in the session transaction on Postgres."""
+        engine = create_async_engine(os.environ["TEST_POSTGRES_URI"])
+        try:
+            async with engine.begin() as connection:
+                await connection.run_sync(SQLModel.metadata.create_all)
+            async with AsyncSession(engine) as session:
+                link = await LinkRepo.create("https://copy.com", "copyRB", session)
+                link_id = link.id
+                before = await session.scalar(select(func.count(Visit.id)))
+
+                rows = [{"link_id": link_id, "visited_at": datetime.now()}] * 3
+                await VisitRepo.bulk_create(
+                    rows, session, commit=False, copy_min_rows=1
+                )
+                await session.rollback()
+
+                assert await session.scalar(select(func.count(Visit.id))) == before
+                await session.execute(delete(Link).where(Link.id == link_id))
+                await session.commit()
+        finally:
+            await engine.dispose()
+
+
+@contextmanager
+def capture_statements(session: AsyncSession):
+    """Collect the SQL statements executed through ``session``."""
+    statements: list[str] = []
+
+    def _record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    sync_engine = session.bind.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _record)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", _record)
+
+
+class TestLinkLookupCost:
+    """Regression tests: resolving a link must not scale with its visits."""
+
+    async def _lookup(self, code: str, session: AsyncSession) -> list[str]:
+        with capture_statements(session) as statements:
+            row = await LinkRepo.get_target_by_code(code, session)
+            link = await LinkRepo.get_by_code(code, session)
+
+        assert row is not None
+        assert link is not None
+        assert not any(isinstance(obj, Visit) for obj in session.identity_map.values())
+        return statements
+
+    @pytest.mark.asyncio
+    async def test_lookup_cost_constant_as_visits_grow(self, db_session: AsyncSession):
+        """Test that lookups issue the same queries with 0 and 200 visits."""
+        link = await LinkRepo.create("https://example.com/hot", "hot123", db_session)
+        db_session.expunge_all()
+        before = await self._lookup("hot123", db_session)
+
+        db_session.add_all([Visit(link_id=link.id) for _ in range(200)])
+        await db_session.commit()
+        db_session.expunge_all()
+        after = await self._lookup("hot123", db_session)
+
+        assert before == after
+        assert len(after) == 2
+        assert not any(re.search(r"\bvisit\b", statement) for statement in after)
+
+    @pytest.mark.asyncio
+    async def test_get_by_code_with_visits(self, db_session: AsyncSession):
+        """Test that visits are loaded only when explicitly requested."""
+        link = await LinkRepo.create("https://example.com/v", "vis123", db_session)
+        db_session.add_all([Visit(link_id=link.id) for _ in range(3)])
+        await db_session.commit()
+        db_session.expunge_all()
+
+        found = await LinkRepo.get_by_code("vis123", db_session, with_visits=True)
+
+        assert found is not None
+        assert len(found.visits) == 3
+
+
+class TestVisitRollupRepo:
+    """Test cases for VisitRollupRepo class."""
+
+    @pytest.mark.asyncio
+    async def test_increment_and_series(
+        self, db_session: AsyncSession, sample_link: Link
+    ):
+        """Test that increments accumulate per bucket and read back in order."""
+        start = datetime(2026, 1, 1, 10)
+        later = datetime(2026, 1, 1, 12)
+
+        await VisitRollupRepo.increment(
+            {(sample_link.id, later): 1, (sample_link.id, start): 2}, db_session
+        )
+        await VisitRollupRepo.increment({(sample_link.id, start): 3}, db_session)
+
+        series = await VisitRollupRepo.get_series(
+            sample_link.id, start, later + timedelta(hours=1), db_session
+        )
+        assert [tuple(row) for row in series] == [(start, 5), (later, 1)]
+
+        series = await VisitRollupRepo.get_series(
+            sample_link.id, start, later, db_session
+        )
+        assert [tuple(row) for row in series] == [(start, 5)]
@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from src import serve
+from src.config.conf import settings
+from src.serve import best_available, worker_pool_limits
+
+
+class TestWorkerPoolLimits:
+    """Test cases for worker_pool_limits function."""
+
+    def test_keeps_settings_that_fit(self):
+        """Test that pools already within the budget are unchanged."""
+        assert worker_pool_limits(100, 4, 10, 5) == (10, 5)
+
+    def test_scales_down_keeping_ratio(self):
+        """Test that the budget is split across workers."""
+        pool_size, max_overflow = worker_pool_limits(90, 4, 10, 20)
+
+        assert (pool_size, max_overflow) == (7, 15)
+        assert 4 * (pool_size + max_overflow) <= 90
+
+    def test_at_least_one_pooled_connection(self):
+        """Test that every worker keeps a persistent connection."""
+        assert worker_pool_limits(8, 4, 1, 20) == (1, 1)
+
+    def test_budget_too_small(self):
+        """Test that a budget below one connection per worker is rejected."""
+        with pytest.raises(ValueError):
+            worker_pool_limits(3, 4, 10, 20)
+
+
+class TestServe:
+    """Test cases for the serve entry point."""
+
+    def test_best_available(self):
+        """Test that missing modules fall back to the last candidate."""
+        assert best_available("json", "asyncio") == "json"
+        assert best_available("no_such_module_here", "asyncio") == "asyncio"
+
+    def test_main(self, monkeypatch):
+        """Test that workers get their share of the connection budget."""
+        calls = []
+        monkeypatch.setattr(serve.uvicorn, "run", lambda *a, **kw: calls.append(kw))
+        monkeypatch.setattr(settings, "DATABASE_MAX_CONNECTIONS", 60)
+        monkeypatch.setattr(settings, "DATABASE_ENGINE_POOL_SIZE", 10)
+        monkeypatch.setattr(settings, "DATABASE_ENGINE_MAX_OVERFLOW", 20)
+        monkeypatch.setattr(settings, "CACHE_WARM_BROADCAST", False)
+        monkeypatch.setattr(settings, "DATABASE_REPLICA_POOL_SIZE", None)
+        monkeypatch.setattr(settings, "DATABASE_REPLICA_MAX_OVERFLOW", None)
+        # Registered with monkeypatch so the values set by main are undone
+        monkeypatch.setenv("DATABASE_ENGINE_POOL_SIZE", "10")
+        monkeypatch.setenv("DATABASE_ENGINE_MAX_OVERFLOW", "20")
+        monkeypatch.delenv("DATABASE_REPLICA_POOL_SIZE", raising=False)
+        monkeypatch.delenv("DATABASE_REPLICA_MAX_OVERFLOW", raising=False)
+
+        serve.main(["--workers", "3", "--graceful-timeout", "5"])
+
+        [kwargs] = calls
+        assert kwargs["workers"] == 3
+        assert kwargs["timeout_graceful_shutdown"] == 5
+        assert os.environ["DATABASE_ENGINE_POOL_SIZE"] == "6"
+        assert os.environ["DATABASE_ENGINE_MAX_OVERFLOW"] == "14"
+        assert settings.DATABASE_ENGINE_POOL_SIZE == 6
+        assert os.environ["DATABASE_REPLICA_POOL_SIZE"] == "6"
+        assert settings.DATABASE_REPLICA_MAX_OVERFLOW == 14
+
+        # The broadcast listener only connects to the primary
+        monkeypatch.setattr(settings, "CACHE_WARM_BROADCAST", True)
+        monkeypatch.setattr(settings, "DATABASE_ENGINE_POOL_SIZE", 10)
+        monkeypatch.setattr(settings, "DATABASE_ENGINE_MAX_OVERFLOW", 20)
+        monkeypatch.setattr(settings, "DATABASE_REPLICA_POOL_SIZE", None)
+        monkeypatch.setattr(settings, "DATABASE_REPLICA_MAX_OVERFLOW", None)
+        serve.configure_pools(3)
+
+        primary = settings.DATABASE_ENGINE_POOL_SIZE
+        assert (primary, settings.DATABASE_ENGINE_MAX_OVERFLOW) == (6, 13)
+        replica = settings.DATABASE_REPLICA_POOL_SIZE
+        assert (replica, settings.DATABASE_REPLICA_MAX_OVERFLOW) == (6, 14)
@@ -1,10 +1,13 @@
+import asyncio
 from unittest.mock import patch
 
 import pytest
+from sqlalchemy import event, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from src.link.cache import CachedLink
 from src.link.models import Link, Visit
-from src.link.service import ShortenerService, VisitService
+from src.link.service import ShortenerService, VisitService, target_hash
 
 
 class TestShortenerService:
@@ -18,8 +21,7 @@ class TestShortenerService:
 
         assert short_url == f"{service.DEFAULT_DOMAIN}/abc123"
 
-    @pytest.mark.asyncio
-    async def test_generate_short_code(self):
+    def test_generate_short_code(self):
         """Test generating short code from URL."""
         service = ShortenerService()
 
@@ -27,7 +29,7 @@ class TestShortenerService:
             # Mock UUID to return predictable value
             mock_uuid.return_value.int = 123456789
 
-            code = await service.generate_short_code("https://example.com")
+            code = service.generate_short_code("https://example.com")
 
             assert len(code) + 1 == service.length
 
@@ -36,7 +38,7 @@ class TestShortenerService:
         """Test creating short URL with session."""
         service = ShortenerService()
 
-        with patch.object(service, "generate_short_code", return_value="abc123"):
+        with patch.object(service, "allocate_short_code", return_value="abc123"):
             with patch.object(service, "perform_create") as mock_create:
                 mock_create.return_value = Link(
                     id=1, target="https://example.com", code="abc123"
@@ -51,6 +53,62 @@ class TestShortenerService:
                     "https://example.com", "abc123", db_session
                 )
 
+    @pytest.mark.asyncio
+    async def test_create_short_urls(self, db_session: AsyncSession):
+        """Test shortening many URLs at once keeps input order."""
+        service = ShortenerService()
+        urls = [f"https://example.com/{i}" for i in range(5)]
+
+        short_urls = await service.create_short_urls(urls, db_session)
+
+        assert len(short_urls) == 5
+        for url, short_url in zip(urls, short_urls, strict=True):
+            code = short_url.rsplit("/", 1)[-1]
+            link = await service.get_target(code, db_session)
+            assert link.target == url
+
+    @pytest.mark.asyncio
+    async def test_create_short_url_deduplicated(self, db_session: AsyncSession):
+        """Test that shortening the same target twice returns the same code."""
+        service = ShortenerService()
+        service.deduplicate = True
+
+        first = await service.create_short_url("https://Example.com", db_session)
+        second = await service.create_short_url("https://example.com:443/", db_session)
+        other = await service.create_short_url("https://example.com/x", db_session)
+
+        assert first == second
+        assert other != first
+
+    @pytest.mark.asyncio
+    async def test_create_short_urls_deduplicated(self, db_session: AsyncSession):
+        """Test that bulk shortening reuses links of single and earlier bulk calls."""
+        service = ShortenerService()
+        service.deduplicate = True
+        single = await service.create_short_url("https://example.com/b0", db_session)
+        urls = [
+            "https://example.com/b1",
+            "https://Example.com/b0",
+            "https://example.com/b1",
+        ]
+
+        first = await service.create_short_urls(urls, db_session)
+        retried = await service.create_short_urls(urls, db_session)
+
+        assert first == retried
+        assert first[1] == single
+        assert first[0] == first[2]
+        count = await db_session.scalar(
+            select(func.count()).select_from(Link).where(Link.target.like("%/b_"))
+        )
+        assert count == 2
+
+    def test_target_hash_normalization(self):
+        """Test that only case-insensitive URL parts are normalized."""
+        assert target_hash("HTTPS://Example.COM") == target_hash("https://example.com/")
+        assert target_hash("http://a.com:80/x") == target_hash("http://a.com/x")
+        assert target_hash("https://a.com/X") != target_hash("https://a.com/x")
+
     @pytest.mark.asyncio
     async def test_perform_create(self, db_session: AsyncSession):
         """Test performing link creation."""
@@ -66,9 +124,26 @@ class TestShortenerService:
 
             assert result == mock_link
             mock_repo_create.assert_called_once_with(
-                "https://example.com", "test123", db_session
+                "https://example.com", "test123", db_session, commit=False
             )
 
+    def test_redirect_policy(self):
+        """Test global defaults, per-link settings and the cap at expiry."""
+        service = ShortenerService()
+        service.redirect_status, service.redirect_max_age = 302, 0
+        now = 1_790_000_000.0
+
+        assert service.redirect_policy(CachedLink(1, "https://a.com")) == (302, 0)
+        permanent = CachedLink(1, "https://a.com", None, 308, 86400)
+        assert service.redirect_policy(permanent) == (308, 86400)
+        expiring = permanent._replace(expires_at=now + 90.5)
+        assert service.redirect_policy(expiring, now) == (308, 90)
+
+        service.redirect_max_age = 600
+        assert service.redirect_policy(CachedLink(1, "https://a.com")) == (302, 600)
+        uncached = CachedLink(1, "https://a.com", None, None, 0)
+        assert service.redirect_policy(uncached) == (302, 0)
+
     @pytest.mark.asyncio
     async def test_get_target_existing_link(
         self, db_session: AsyncSession, sample_link: Link
@@ -76,10 +151,86 @@ class TestShortenerService:
         """Test getting target for existing link."""
         service = ShortenerService()
 
-        with patch.object(service.repo, "get_by_code", return_value=sample_link):
+        with patch.object(
+            service.repo,
+            "get_target_by_code",
+            return_value=(sample_link.id, sample_link.target),
+        ):
             result = await service.get_target("abc123", db_session)
 
-            assert result == sample_link
+            assert result.id == sample_link.id
+            assert result.target == sample_link.target
+
+    @pytest.mark.asyncio
+    async def test_get_target_served_from_cache(
+        self, db_session: AsyncSession, sample_link: Link
+    ):
+        """Test that repeated lookups do not hit the repository."""
+        service = ShortenerService()
+
+        with patch.object(
+            service.repo,
+            "get_target_by_code",
+            return_value=(sample_link.id, sample_link.target),
+        ) as mock_get:
+            first = await service.get_target("abc123", db_session)
+            second = await service.get_target("abc123", db_session)
+
+            assert first == second
+            mock_get.assert_called_once_with("abc123", db_session)
+            assert service.cache.stats.hits == 1
+            assert service.cache.stats.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_get_target_caches_unknown_code(self, db_session: AsyncSession):
+        """Test that unknown codes are negatively cached."""
+        service = ShortenerService()
+
+        with patch.object(
+            service.repo, "get_target_by_code", return_value=None
+        ) as mock_get:
+            assert await service.get_target("nope12", db_session) is None
+            assert await service.get_target("nope12", db_session) is None
+
+            mock_get.assert_called_once()
+
+    @pytest.mark.asyncio
+    async def test_perform_create_invalidates_negative_entry(
+        self, db_session: AsyncSession
+    ):
+        """Test that creating a link drops a cached miss for its code."""
+        service = ShortenerService()
+        service.cache.set("new123", None)
+
+        await service.perform_create("https://example.com/new", "new123", db_session)
+        result = await service.get_target("new123", db_session)
+
+        assert result is not None
+        assert result.target == "https://example.com/new"
+
+    @pytest.mark.asyncio
+    async def test_concurrent_lookups_one_query(
+        self, db_session: AsyncSession, sample_link: Link
+    ):
+        """Test that 1,000 concurrent misses for one code run one query."""
+        service = ShortenerService()
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        sync_engine = db_session.bind.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", record)
+        try:
+            results = await asyncio.gather(
+                *(service.get_target("abc123", db_session) for _ in range(1000))
+            )
+        finally:
+            event.remove(sync_engine, "before_cursor_execute", record)
+
+        assert set(results) == {CachedLink(sample_link.id, "https://example.com")}
+        assert len(statements) == 1
+        assert service.lookups.stats.coalesced == 999
 
     @pytest.mark.asyncio
     async def test_get_url_stats(self, db_session: AsyncSession):
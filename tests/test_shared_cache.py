@@ -0,0 +1,280 @@
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.link.cache import MISSING, CachedLink, LinkCache
+from src.link.service import ShortenerService
+from src.link.shared_cache import (
+    CacheBackend,
+    MemoryBackend,
+    RedisBackend,
+    RedisError,
+    SharedLinkCache,
+)
+
+
+class StandInRedis:
+    """Tiny Redis protocol server with the commands the cache uses."""
+
+    def __init__(self):
+        self.data: dict[bytes, tuple[float, bytes]] = {}
+        self.commands: list[list[bytes]] = []
+        self.writers: list[asyncio.StreamWriter] = []
+        self.server: asyncio.Server | None = None
+
+    @property
+    def port(self) -> int:
+        return self.server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        self.drop_connections()
+        self.server.close()
+        await self.server.wait_closed()
+
+    def drop_connections(self) -> None:
+        for writer in self.writers:
+            writer.close()
+        self.writers.clear()
+
+    async def _serve(self, reader, writer):
+        self.writers.append(writer)
+        try:
+            while True:
+                command = await self._read_command(reader)
+                self.commands.append(command)
+                writer.write(self._run(command))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+    @staticmethod
+    async def _read_command(reader) -> list[bytes]:
+        count = int((await reader.readuntil(b"\r\n"))[1:-2])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readuntil(b"\r\n"))[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2])
+        return args
+
+    def _get(self, key: bytes) -> bytes:
+        entry = self.data.get(key)
+        if entry is None or entry[0] <= time.monotonic():
+            return b"$-1\r\n"
+        return b"$%d\r\n%s\r\n" % (len(entry[1]), entry[1])
+
+    def _run(self, command: list[bytes]) -> bytes:
+        name, *args = command
+        match name.upper():
+            case b"MGET":
+                return b"*%d\r\n" % len(args) + b"".join(map(self._get, args))
+            case b"SET":
+                key, value, _, milliseconds = args
+                self.data[key] = (time.monotonic() + int(milliseconds) / 1000, value)
+                return b"+OK\r\n"
+            case b"DEL":
+                removed = sum(self.data.pop(key, None) is not None for key in args)
+                return b":%d\r\n" % removed
+            case b"SELECT":
+                return b"+OK\r\n"
+            case _:
+                return b"-ERR unknown command\r\n"
+
+
+# Served by the test's own event loop, not the session-wide fixture loop
+@pytest_asyncio.fixture(loop_scope="function")
+async def redis_server():
+    server = StandInRedis()
+    await server.start()
+    yield server
+    await server.stop()
+
+
+class TestMemoryBackend:
+    """Test cases for MemoryBackend class."""
+
+    @pytest.mark.asyncio
+    async def test_ttl(self):
+        """Test that entries expire after their TTL."""
+        now = [0.0]
+        backend = MemoryBackend(clock=lambda: now[0])
+
+        await backend.mset({"a": b"1", "b": b"2"}, ttl=10)
+        assert await backend.mget(["a", "b", "c"]) == [b"1", b"2", None]
+
+        now[0] = 10.0
+        assert await backend.mget(["a"]) == [None]
+        assert len(backend) == 1
+
+    def test_backends_implement_the_interface(self):
+        """Test that a backend missing a method cannot be created."""
+
+        class Partial(CacheBackend):
+            async def mget(self, keys):
+                return [None] * len(keys)
+
+        with pytest.raises(TypeError):
+            Partial()
+
+
+class TestRedisBackend:
+    """Test cases for RedisBackend class against a stand-in server."""
+
+    @pytest.mark.asyncio
+    async def test_round_trip(self, redis_server: StandInRedis):
+        """Test setting, multi-getting and deleting keys."""
+        backend = RedisBackend.from_url(f"redis://127.0.0.1:{redis_server.port}/2")
+
+        await backend.mset({"a": b"1", "b": b"\r\n2"}, ttl=60)
+        assert await backend.mget(["a", "missing", "b"]) == [b"1", None, b"\r\n2"]
+        await backend.delete(["a"])
+        assert await backend.mget(["a"]) == [None]
+        await backend.close()
+
+        assert redis_server.commands[0] == [b"SELECT", b"2"]
+
+    @pytest.mark.asyncio
+    async def test_pipelined(self, redis_server: StandInRedis):
+        """Test that many keys cost one write and one connection."""
+        backend = RedisBackend(port=redis_server.port, host="127.0.0.1")
+
+        await backend.mset({f"k{i}": b"v" for i in range(100)}, ttl=60)
+        values = await backend.mget([f"k{i}" for i in range(100)])
+
+        assert values == [b"v"] * 100
+        assert len(redis_server.writers) == 1
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_reconnects(self, redis_server: StandInRedis):
+        """Test that a dropped connection is replaced on next use."""
+        backend = RedisBackend(port=redis_server.port, host="127.0.0.1")
+        await backend.mset({"a": b"1"}, ttl=60)
+
+        redis_server.drop_connections()
+        with pytest.raises((ConnectionError, asyncio.IncompleteReadError)):
+            await backend.mget(["a"])
+
+        assert await backend.mget(["a"]) == [b"1"]
+        await backend.close()
+
+    @pytest.mark.asyncio
+    async def test_error_reply(self, redis_server: StandInRedis):
+        """Test that error replies are raised."""
+        backend = RedisBackend(port=redis_server.port, host="127.0.0.1")
+
+        with pytest.raises(RedisError):
+            await backend.execute(("NOPE",))
+        await backend.close()
+
+
+class TestSharedLinkCache:
+    """Test cases for SharedLinkCache class."""
+
+    @pytest.mark.asyncio
+    async def test_get_many(self):
+        """Test positive, negative and missing entries."""
+        cache = SharedLinkCache(MemoryBackend())
+        await cache.set_many(
+            {"abc123": CachedLink(7, "https://example.com/a:b"), "nope00": None}
+        )
+
+        found = await cache.get_many(["abc123", "nope00", "other0"])
+
+        assert found == {
+            "abc123": CachedLink(7, "https://example.com/a:b"),
+            "nope00": None,
+            "other0": MISSING,
+        }
+        assert cache.stats.hits == 2
+        assert cache.stats.misses == 1
+
+    @pytest.mark.asyncio
+    async def test_expiry_round_trip(self):
+        """Test that expiry is kept and entries without one still decode."""
+        backend = MemoryBackend()
+        cache = SharedLinkCache(backend)
+        await cache.set("exp001", CachedLink(7, "https://a.com/x:y", 1790000000.5))
+        # Written before entries carried an expiry
+        await backend.mset({cache.prefix + "old001": b"8:https://b.com"}, 60)
+
+        found = await cache.get_many(["exp001", "old001"])
+
+        assert found == {
+            "exp001": CachedLink(7, "https://a.com/x:y", 1790000000.5),
+            "old001": CachedLink(8, "https://b.com"),
+        }
+
+    @pytest.mark.asyncio
+    async def test_unavailable_backend_is_a_miss(self, redis_server: StandInRedis):
+        """Test that backend failures degrade to misses."""
+        backend = RedisBackend(port=redis_server.port, host="127.0.0.1")
+        await redis_server.stop()
+        cache = SharedLinkCache(backend)
+
+        assert await cache.get("abc123") is MISSING
+        await cache.set("abc123", CachedLink(1, "https://example.com"))
+        assert cache.stats.errors == 2
+        await backend.close()
+
+
+class CountingRepo:
+    """Repository stub counting redirect lookups."""
+
+    def __init__(self, links: dict[str, tuple[int, str]]):
+        self.links = links
+        self.lookups = 0
+
+    async def get_target_by_code(self, code: str, session):
+        self.lookups += 1
+        await asyncio.sleep(0)
+        return self.links.get(code)
+
+
+class TestTwoTierLookup:
+    """Test cases for ShortenerService with a shared cache tier."""
+
+    @pytest.mark.asyncio
+    async def test_shared_hit_skips_database(self, db_session: AsyncSession):
+        """Test that one worker's lookup is reused by another."""
+        shared = SharedLinkCache(MemoryBackend())
+        repo = CountingRepo({"abc123": (1, "https://example.com")})
+        first = ShortenerService(repo=repo, cache=LinkCache(), shared_cache=shared)
+        second = ShortenerService(repo=repo, cache=LinkCache(), shared_cache=shared)
+
+        assert await first.get_target("abc123", db_session) == CachedLink(
+            1, "https://example.com"
+        )
+        assert await second.get_target("abc123", db_session) == CachedLink(
+            1, "https://example.com"
+        )
+        assert repo.lookups == 1
+
+    @pytest.mark.asyncio
+    async def test_create_invalidates_shared_entry(self, db_session: AsyncSession):
+        """Test that a negative entry cached by any worker is dropped on create."""
+        shared = SharedLinkCache(MemoryBackend())
+        service = ShortenerService(cache=LinkCache(), shared_cache=shared)
+        await shared.set("new123", None)
+
+        await service.perform_create("https://example.com/new", "new123", db_session)
+
+        assert await shared.get("new123") is MISSING
+
+    @pytest.mark.asyncio
+    async def test_concurrent_misses_coalesced(self, db_session: AsyncSession):
+        """Test that concurrent misses for one code run a single lookup."""
+        repo = CountingRepo({"abc123": (1, "https://example.com")})
+        service = ShortenerService(repo=repo, cache=LinkCache())
+
+        results = await asyncio.gather(
+            *(service.get_target("abc123", db_session) for _ in range(20))
+        )
+
+        assert set(results) == {CachedLink(1, "https://example.com")}
+        assert repo.lookups == 1
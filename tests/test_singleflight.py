@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from src.link.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    """Test cases for SingleFlight class."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_calls_share_result(self):
+        """Test that callers of one key share a single call."""
+        flight = SingleFlight()
+        calls = []
+
+        async def fetch(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key.upper()
+
+        results = await asyncio.gather(
+            *(flight.run(key, fetch, key) for key in ["a", "b", "a", "a", "b"])
+        )
+
+        assert results == ["A", "B", "A", "A", "B"]
+        assert sorted(calls) == ["a", "b"]
+        assert (flight.stats.calls, flight.stats.coalesced) == (2, 3)
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_error_reaches_every_waiter(self):
+        """Test that a failed call raises in all callers, then frees the key."""
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("database down")
+
+        results = await asyncio.gather(
+            *(flight.run("a", fail) for _ in range(10)), return_exceptions=True
+        )
+
+        assert all(isinstance(result, RuntimeError) for result in results)
+        assert flight.stats.failures == 1
+        assert await flight.run("a", asyncio.sleep, 0, "ok") == "ok"
+
+    @pytest.mark.asyncio
+    async def test_timeout(self):
+        """Test that a hung call times out for every waiter and frees the key."""
+        flight = SingleFlight(timeout=0.01)
+
+        results = await asyncio.gather(
+            *(flight.run("a", asyncio.sleep, 10) for _ in range(5)),
+            return_exceptions=True,
+        )
+
+        assert all(isinstance(result, TimeoutError) for result in results)
+        assert flight.stats.timeouts == 1
+        assert len(flight) == 0
+
+    @pytest.mark.asyncio
+    async def test_first_caller_cancelled(self):
+        """Test that cancelling the first caller does not break the shared call."""
+        flight = SingleFlight()
+        release = asyncio.Event()
+        finished = []
+
+        async def fetch():
+            await release.wait()
+            finished.append(True)
+            return "value"
+
+        first = asyncio.create_task(flight.run("a", fetch))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(flight.run("a", fetch))
+        await asyncio.sleep(0)
+
+        first.cancel()
+        await asyncio.sleep(0)
+        # Still waiting for the call, which may use the first caller's session
+        assert not first.done()
+
+        release.set()
+        assert await second == "value"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert finished == [True]
@@ -0,0 +1,198 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.link.cache import CachedLink
+from src.link.models import Link
+from src.link.service import ShortenerService
+from src.link.snapshot import (
+    RedirectSnapshot,
+    SnapshotLoader,
+    SnapshotWriter,
+    export_snapshot,
+)
+from tests.test_repo import capture_statements
+
+
+def write_snapshot(path, links: dict[str, CachedLink]) -> None:
+    with SnapshotWriter(path) as writer:
+        for code in sorted(links):
+            writer.add(code, links[code])
+
+
+class TestRedirectSnapshot:
+    """Test cases for writing and reading redirect snapshots."""
+
+    def test_round_trip(self, tmp_path):
+        """Test that every link is found with all of its redirect settings."""
+        links = {
+            "aaaaaa": CachedLink(1, "https://a.com"),
+            "AbC123": CachedLink(2, "https://b.com/ü?q=1", 1893456000.0, 308, 60),
+            "zz": CachedLink(3, "https://c.com", status=301, max_age=0),
+        }
+        path = tmp_path / "links.snap"
+        write_snapshot(path, links)
+
+        snapshot = RedirectSnapshot(path)
+        try:
+            assert len(snapshot) == 3
+            for code, link in links.items():
+                assert snapshot.get(code) == link
+            for code in ("aaaaab", "z", "zz0", "zzzzzzzzz", "ü", "", "zz\x00", "zz-"):
+                assert snapshot.get(code) is None
+        finally:
+            snapshot.close()
+
+    def test_empty(self, tmp_path):
+        """Test that a snapshot without links answers every lookup with None."""
+        path = tmp_path / "empty.snap"
+        write_snapshot(path, {})
+
+        snapshot = RedirectSnapshot(path)
+        assert snapshot.get("abc") is None
+        snapshot.close()
+
+    def test_writer_checks_order(self, tmp_path):
+        """Test that unsorted codes are refused and the target left untouched."""
+        path = tmp_path / "links.snap"
+        path.write_bytes(b"previous")
+
+        with pytest.raises(ValueError, match="increasing order"):
+            with SnapshotWriter(path) as writer:
+                writer.add("bbbbbb", CachedLink(1, "https://b.com"))
+                writer.add("aaaaaa", CachedLink(2, "https://a.com"))
+
+        assert path.read_bytes() == b"previous"
+        assert os.listdir(tmp_path) == ["links.snap"]
+
+    def test_writer_skips_long_codes(self, tmp_path):
+        """Test that codes wider than the index are left to the database."""
+        with SnapshotWriter(tmp_path / "links.snap") as writer:
+            writer.add("abc", CachedLink(1, "https://a.com"))
+            writer.add("abcdefghi", CachedLink(2, "https://b.com"))
+
+        assert (writer.count, writer.skipped) == (1, 1)
+
+    def test_invalid_files(self, tmp_path):
+        """Test that empty, foreign and truncated files are rejected."""
+        path = tmp_path / "links.snap"
+        write_snapshot(path, {"aaaaaa": CachedLink(1, "https://a.com")})
+        data = path.read_bytes()
+
+        for content in (b"", b"not a snapshot at all, really", data[:40]):
+            path.write_bytes(content)
+            with pytest.raises(ValueError):
+                RedirectSnapshot(path)
+
+
+class TestExportSnapshot:
+    """Test cases for export_snapshot."""
+
+    @pytest.mark.asyncio
+    async def test_export(self, db_session: AsyncSession, tmp_path):
+        """Test that only links that cannot change before expiring are exported."""
+        now = datetime.now()
+        db_session.add_all(
+            [
+                Link(target="https://b.com", code="snapB1"),
+                Link(
+                    target="https://a.com",
+                    code="snapA1",
+                    expires_at=now + timedelta(days=1),
+                    redirect_status=308,
+                    redirect_max_age=60,
+                ),
+                Link(target="https://c.com", code="snapC1", max_visits=10),
+                Link(
+                    target="https://d.com",
+                    code="snapD1",
+                    expires_at=now - timedelta(days=1),
+                ),
+            ]
+        )
+        await db_session.commit()
+        path = tmp_path / "links.snap"
+
+        writer = await export_snapshot(path, db_session, chunk_size=1, now=now)
+
+        snapshot = RedirectSnapshot(path)
+        try:
+            assert len(snapshot) == writer.count
+            assert snapshot.get("snapB1").target == "https://b.com"
+            link = snapshot.get("snapA1")
+            assert link.expires_at == pytest.approx(
+                (now + timedelta(days=1)).timestamp()
+            )
+            assert (link.status, link.max_age) == (308, 60)
+            assert snapshot.get("snapC1") is None
+            assert snapshot.get("snapD1") is None
+            assert snapshot.created_at == pytest.approx(now.timestamp())
+        finally:
+            snapshot.close()
+
+
+class TestSnapshotLoader:
+    """Test cases for SnapshotLoader."""
+
+    @pytest.mark.asyncio
+    async def test_hot_swap(self, tmp_path):
+        """Test that a new file replaces the mapped snapshot and the old is closed."""
+        path = tmp_path / "links.snap"
+        loaded = []
+        loader = SnapshotLoader(str(path), interval=0, on_load=loaded.append)
+
+        await loader.start()
+        assert loader.snapshot is None
+
+        write_snapshot(path, {"aaaaaa": CachedLink(1, "https://a.com")})
+        assert loader.reload()
+        assert not loader.reload()
+        first = loader.snapshot
+
+        write_snapshot(path, {"bbbbbb": CachedLink(2, "https://b.com")})
+        assert loader.reload()
+        assert loaded == [first, loader.snapshot]
+        assert loader.snapshot.get("bbbbbb") == CachedLink(2, "https://b.com")
+        with pytest.raises(ValueError):
+            first.get("aaaaaa")
+
+        # A broken file is reported and the current snapshot kept
+        path.write_bytes(b"garbage")
+        with pytest.raises(ValueError):
+            loader.reload()
+        assert not loader.reload()
+        assert loader.snapshot is loaded[-1]
+
+        await loader.stop()
+        assert loaded[-1] is None
+        assert loader.snapshot is None
+        assert loader.loads == 2
+
+
+class TestServiceSnapshot:
+    """Test cases for redirects served from the snapshot."""
+
+    @pytest.mark.asyncio
+    async def test_snapshot_then_database(self, db_session: AsyncSession, tmp_path):
+        """Test that the snapshot answers first and newer codes hit the database."""
+        path = tmp_path / "links.snap"
+        write_snapshot(path, {"snapX1": CachedLink(99, "https://snap.com")})
+        newer = Link(target="https://new.com", code="snapN1")
+        db_session.add(newer)
+        await db_session.commit()
+        service = ShortenerService()
+        service.use_snapshot(RedirectSnapshot(path))
+
+        try:
+            with capture_statements(db_session) as statements:
+                link = await service.get_target("snapX1", db_session)
+            assert link == CachedLink(99, "https://snap.com")
+            assert statements == []
+            assert "snapX1" not in service.cache
+
+            link = await service.get_target("snapN1", db_session)
+            assert link.id == newer.id
+        finally:
+            service.snapshot.close()
@@ -0,0 +1,140 @@
+from datetime import datetime, timedelta
+
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.config.conf import Settings
+from src.link.models import Link, LinkArchive, Visit, VisitRollup
+from src.link.repo import LinkRepo
+from src.link.sweeper import LinkSweeper
+
+
+async def make_links(session: AsyncSession, now: datetime) -> dict[str, Link]:
+    links = {
+        "live01": Link(target="https://a.com", code="live01"),
+        "soon01": Link(
+            target="https://b.com", code="soon01", expires_at=now + timedelta(hours=1)
+        ),
+        "grace1": Link(
+            target="https://c.com", code="grace1", expires_at=now - timedelta(hours=1)
+        ),
+    }
+    for i in range(5):
+        links[f"old{i:03d}"] = Link(
+            target=f"https://d.com/{i}",
+            code=f"old{i:03d}",
+            expires_at=now - timedelta(days=2, minutes=i),
+            visits_count=1,
+        )
+    session.add_all(links.values())
+    await session.flush()
+    session.add_all(Visit(link_id=link.id) for link in links.values())
+    session.add_all(
+        VisitRollup(link_id=link.id, bucket=datetime(2026, 3, 1), count=1)
+        for link in links.values()
+    )
+    await session.commit()
+    return links
+
+
+class TestLinkSweeper:
+    """Test cases for LinkSweeper class."""
+
+    @staticmethod
+    async def _codes(model, session: AsyncSession) -> set[str]:
+        return set((await session.execute(select(model.code))).scalars())
+
+    @pytest.mark.asyncio
+    async def test_sweep_in_batches(self, db_session: AsyncSession, test_sessionmaker):
+        """Test that links past the grace period go with their visits."""
+        now = datetime.now()
+        await make_links(db_session, now)
+        swept = []
+
+        async def on_swept(codes):
+            swept.append(sorted(codes))
+
+        sweeper = LinkSweeper(
+            sessionmaker=test_sessionmaker,
+            batch_size=2,
+            grace=86400,
+            on_swept=on_swept,
+        )
+
+        assert await sweeper.sweep(now) == 5
+
+        assert [len(codes) for codes in swept] == [2, 2, 1]
+        assert await self._codes(Link, db_session) == {"live01", "soon01", "grace1"}
+        visits = await db_session.scalar(select(func.count(Visit.id)))
+        rollups = await db_session.scalar(select(func.count()).select_from(VisitRollup))
+        assert visits == rollups == 3
+        assert await self._codes(LinkArchive, db_session) == set()
+        assert await sweeper.sweep(now) == 0
+
+    @pytest.mark.asyncio
+    async def test_visits_deleted_in_chunks(self, db_session: AsyncSession):
+        """Test that visits of expired links go at most ``limit`` rows at a time."""
+        now = datetime.now()
+        links = await make_links(db_session, now)
+        popular = links["old000"]
+        db_session.add_all(Visit(link_id=popular.id) for _ in range(4))
+        await db_session.commit()
+
+        before = now - timedelta(days=1)
+        deleted = []
+        while not deleted or deleted[-1] == 3:
+            deleted.append(
+                await LinkRepo.delete_expired_dependents(Visit, before, 3, db_session)
+            )
+            await db_session.commit()
+
+        assert deleted == [3, 3, 3, 0]
+        visits = await db_session.scalar(select(func.count(Visit.id)))
+        assert visits == 3
+        assert (
+            await LinkRepo.delete_expired_dependents(
+                VisitRollup, before, 10, db_session
+            )
+            == 5
+        )
+
+    @pytest.mark.asyncio
+    async def test_archive(self, db_session: AsyncSession, test_sessionmaker):
+        """Test that archived links keep their details and visit count."""
+        now = datetime.now()
+        links = await make_links(db_session, now)
+        sweeper = LinkSweeper(sessionmaker=test_sessionmaker, grace=0, archive=True)
+
+        assert await sweeper.sweep(now) == 6
+
+        archived = await db_session.get(LinkArchive, links["old000"].id)
+        assert archived.code == "old000"
+        assert archived.target == "https://d.com/0"
+        assert archived.visits_count == 1
+        assert archived.expires_at == links["old000"].expires_at
+        assert await self._codes(Link, db_session) == {"live01", "soon01"}
+        assert await LinkRepo.get_target_by_code("grace1", db_session) is None
+
+    @pytest.mark.asyncio
+    async def test_disabled(self, test_sessionmaker):
+        """Test that a zero interval never starts the background task."""
+        sweeper = LinkSweeper(sessionmaker=test_sessionmaker, interval=0)
+
+        await sweeper.start()
+
+        assert not sweeper.running
+        await sweeper.stop()
+
+    def test_grace_covers_queued_visits(self):
+        """Test that links cannot be swept while workers may still queue visits."""
+        with pytest.raises(ValidationError, match="LINK_SWEEP_GRACE"):
+            Settings(
+                _env_file=None,
+                LINK_SWEEP_GRACE=0,
+                LINK_CACHE_TTL=300,
+                VISIT_FLUSH_INTERVAL=1,
+            )
+        settings = Settings(_env_file=None, LINK_SWEEP_GRACE=301, LINK_CACHE_TTL=300)
+        assert settings.LINK_SWEEP_GRACE == 301
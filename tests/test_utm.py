@@ -0,0 +1,71 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.link.models import UtmSet
+from src.link.utm import MAX_VALUE_LENGTH, Utm, UtmSetIds, parse_utm
+from tests.test_repo import capture_statements
+
+
+class TestParseUtm:
+    """Test cases for parse_utm."""
+
+    def test_parse(self):
+        """Test that only known, non-empty utm_* parameters are kept."""
+        utm = parse_utm(
+            b"utm_source=news&utm_medium=email&utm_campaign=spring%20sale"
+            b"&utm_id=7&utm_term=&page=2"
+        )
+
+        assert utm == Utm(source="news", medium="email", campaign="spring sale")
+
+    def test_no_utm(self):
+        """Test that query strings without UTM parameters give None."""
+        assert parse_utm(b"") is None
+        assert parse_utm("page=2&ref=home") is None
+        assert parse_utm("utm_other=x") is None
+
+    def test_long_values_are_cut(self):
+        """Test that values are bounded."""
+        utm = parse_utm("utm_source=" + "x" * 1000)
+
+        assert len(utm.source) == MAX_VALUE_LENGTH
+
+    def test_digest(self):
+        """Test that the digest tells parameters apart."""
+        assert Utm(source="a").digest == Utm(source="a").digest
+        assert Utm(source="a").digest != Utm(medium="a").digest
+        assert Utm(source="a", medium="b").digest != Utm(source="ab").digest
+
+
+class TestUtmSetIds:
+    """Test cases for the utm_set id cache."""
+
+    @pytest.mark.asyncio
+    async def test_resolve_then_cached(self, db_session: AsyncSession):
+        """Test that sets are stored once and then resolved without queries."""
+        ids = UtmSetIds(max_size=10)
+        news, ads = Utm(source="news"), Utm(source="ads", medium="cpc")
+
+        first = await ids.resolve([news, ads, news], db_session)
+        with capture_statements(db_session) as statements:
+            again = await ids.resolve([ads, news], db_session)
+
+        assert again == first
+        assert statements == []
+        assert ids.misses == 2
+        count = await db_session.scalar(select(func.count()).select_from(UtmSet))
+        assert count == 2
+
+    @pytest.mark.asyncio
+    async def test_evicted_sets_are_found_again(self, db_session: AsyncSession):
+        """Test that an evicted set gets its existing id, not a new row."""
+        ids = UtmSetIds(max_size=1)
+        news = Utm(source="news")
+
+        first = await ids.resolve([news], db_session)
+        await ids.resolve([Utm(source="ads")], db_session)
+        assert len(ids) == 1
+
+        assert await ids.resolve([news], db_session) == first
+        assert ids.misses == 3
@@ -0,0 +1,258 @@
+import asyncio
+from contextlib import suppress
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlmodel import SQLModel
+
+from src.database.core import DatabaseRouter
+from src.link.cache import CachedLink, LinkCache
+from src.link.code_filter import CODES_CHANNEL, CodeFilter
+from src.link.models import Link
+from src.link.service import SHORTENER_SERVICE, ShortenerService
+from src.link.shared_cache import MemoryBackend, SharedLinkCache
+from src.warmup import (
+    INSTANCE_ID,
+    WARM_CHANNEL,
+    broadcast_warm_request,
+    handle_warm_request,
+    listen_for_broadcasts,
+    open_connections,
+    warm_cache,
+    warm_up,
+)
+
+
+@pytest_asyncio.fixture
+async def file_engine(tmp_path):
+    """A pooled SQLite engine, unlike the in-memory test engine."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/warmup.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+class TestWarmUp:
+    """Test cases for the start-up warm-up."""
+
+    @pytest.mark.asyncio
+    async def test_open_connections(self, file_engine):
+        """Test that connections are opened at once and returned to the pool."""
+        await file_engine.dispose()
+
+        assert await open_connections(file_engine, 3) == 3
+        assert file_engine.pool.checkedin() == 3
+        assert file_engine.pool.checkedout() == 0
+
+    @pytest.mark.asyncio
+    async def test_warm_up_caches_top_links(
+        self, file_engine, db_session: AsyncSession, test_sessionmaker
+    ):
+        """Test that the most visited links are cached before reporting ready."""
+        db_session.add_all(
+            [
+                Link(target="https://a.com", code="warm01", visits_count=5),
+                Link(target="https://b.com", code="warm02", visits_count=50),
+                Link(target="https://c.com", code="warm03", visits_count=1),
+            ]
+        )
+        await db_session.commit()
+        app = SimpleNamespace(state=SimpleNamespace(ready=False))
+        service = ShortenerService(
+            cache=LinkCache(max_size=100), code_filter=CodeFilter(min_capacity=100)
+        )
+
+        await warm_up(
+            app,
+            [file_engine],
+            connections=2,
+            cache_size=2,
+            code_filter=True,
+            service=service,
+            database=DatabaseRouter(test_sessionmaker),
+        )
+
+        assert app.state.ready
+        assert file_engine.pool.checkedin() == 2
+        assert len(service.cache) == 2
+        assert service.cache.get("warm02").target == "https://b.com"
+        assert "warm03" not in service.cache
+        assert service.code_filter.ready
+        assert service.code_filter.might_exist("warm03")
+
+    @pytest.mark.asyncio
+    async def test_warm_up_failure_still_ready(self, tmp_path):
+        """Test that a failed warm-up does not keep the worker out of rotation."""
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/no/such.db")
+        app = SimpleNamespace(state=SimpleNamespace(ready=False))
+
+        await warm_up(app, [engine], connections=2)
+
+        assert app.state.ready
+        await engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_warm_up_waits_for_listener_filter(self, test_sessionmaker):
+        """Test that warm-up leaves the code filter to the listener and waits."""
+        app = SimpleNamespace(state=SimpleNamespace(ready=False))
+        service = ShortenerService(code_filter=CodeFilter(min_capacity=100))
+        filter_ready = asyncio.Event()
+
+        task = asyncio.create_task(
+            warm_up(
+                app,
+                [],
+                connections=0,
+                code_filter=True,
+                service=service,
+                database=DatabaseRouter(test_sessionmaker),
+                filter_ready=filter_ready,
+            )
+        )
+        await asyncio.sleep(0.01)
+        assert not app.state.ready
+
+        filter_ready.set()
+        await task
+
+        assert app.state.ready
+        assert not service.code_filter.ready
+
+
+class TestListenForBroadcasts:
+    """Test cases for the broadcast listener."""
+
+    @pytest.mark.asyncio
+    async def test_filter_built_once_listening(
+        self, db_session: AsyncSession, test_sessionmaker
+    ):
+        """Test that the filter is built after LISTEN, again on every reconnect."""
+        service = ShortenerService(code_filter=CodeFilter(min_capacity=100))
+        filter_ready = asyncio.Event()
+        built = []
+
+        async def listen(engine, callbacks, on_connect):
+            assert set(callbacks) == {WARM_CHANNEL, CODES_CHANNEL}
+            if not built:
+                # Created while this worker was not listening yet
+                db_session.add(Link(target="https://example.com", code="lsn001"))
+                await db_session.commit()
+            await on_connect()
+            built.append(service.code_filter.bloom)
+            if len(built) == 1:
+                raise ConnectionError("connection lost")
+            await asyncio.Event().wait()
+
+        with patch("src.warmup._listen", listen):
+            task = asyncio.create_task(
+                listen_for_broadcasts(
+                    SimpleNamespace(url="sqlite+aiosqlite://"),
+                    retry_interval=0,
+                    service=service,
+                    filter_ready=filter_ready,
+                    database=DatabaseRouter(test_sessionmaker),
+                )
+            )
+            await asyncio.wait_for(filter_ready.wait(), 1)
+            assert service.code_filter.might_exist("lsn001")
+            while len(built) < 2:
+                await asyncio.sleep(0.01)
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+        assert built[0] is not None and built[1] is not built[0]
+
+    @pytest.mark.asyncio
+    async def test_filter_ready_when_listening_fails(self):
+        """Test that warm-up is not held up when LISTEN cannot be set up."""
+        filter_ready = asyncio.Event()
+
+        async def listen(engine, callbacks, on_connect):
+            raise ConnectionError("refused")
+
+        with patch("src.warmup._listen", listen):
+            task = asyncio.create_task(
+                listen_for_broadcasts(
+                    SimpleNamespace(url="sqlite+aiosqlite://"),
+                    retry_interval=60,
+                    service=ShortenerService(code_filter=CodeFilter()),
+                    filter_ready=filter_ready,
+                )
+            )
+            await asyncio.wait_for(filter_ready.wait(), 1)
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+
+
+class TestWarmCache:
+    """Test cases for on-demand cache warm-up."""
+
+    @pytest.mark.asyncio
+    async def test_warm_cache_report(self, db_session: AsyncSession):
+        """Test that codes are loaded chunk by chunk and reported."""
+        db_session.add_all(
+            Link(target=f"https://example.com/{i}", code=f"hot{i:03d}")
+            for i in range(5)
+        )
+        await db_session.commit()
+        service = ShortenerService(cache=LinkCache(max_size=100))
+
+        report = await warm_cache(
+            db_session,
+            codes=[f"hot{i:03d}" for i in range(5)],
+            chunk_size=2,
+            service=service,
+        )
+
+        assert report.links == 5
+        assert report.chunks == 3
+        assert report.memory_bytes > 5 * len("https://example.com/0")
+        assert report.instance == INSTANCE_ID
+        assert len(service.cache) == 5
+
+    @pytest.mark.asyncio
+    async def test_warm_cache_from_shared_tier(self, db_session: AsyncSession):
+        """Test that codes found in the shared tier skip the database."""
+        db_session.add(Link(target="https://example.com/db", code="db0001"))
+        await db_session.commit()
+        shared = SharedLinkCache(MemoryBackend())
+        await shared.set("sh0001", CachedLink(99, "https://example.com/shared"))
+        service = ShortenerService(cache=LinkCache(max_size=100), shared_cache=shared)
+
+        report = await warm_cache(
+            db_session, codes=["sh0001", "db0001"], service=service
+        )
+
+        assert (report.links, report.shared) == (2, 1)
+        assert service.cache.get("sh0001").id == 99
+        assert (await shared.get("db0001")).target == "https://example.com/db"
+
+    @pytest.mark.asyncio
+    async def test_handle_broadcast(self, db_session: AsyncSession, test_sessionmaker):
+        """Test that other workers' broadcasts are run and our own are skipped."""
+        db_session.add(Link(target="https://example.com", code="cast01"))
+        await db_session.commit()
+        database = DatabaseRouter(test_sessionmaker)
+        payload = '{"instance": "%s", "limit": null, "codes": ["cast01"]}'
+
+        assert await handle_warm_request(payload % INSTANCE_ID, database) is None
+        report = await handle_warm_request(payload % "other", database)
+
+        assert report.links == 1
+        assert "cast01" in SHORTENER_SERVICE.cache
+        SHORTENER_SERVICE.cache.invalidate("cast01")
+
+    @pytest.mark.asyncio
+    async def test_broadcast(self, test_sessionmaker):
+        """Test that broadcasts need PostgreSQL and a small enough payload."""
+        database = DatabaseRouter(test_sessionmaker)
+
+        assert not await broadcast_warm_request(10, None, database)
+        with pytest.raises(ValueError):
+            await broadcast_warm_request(None, ["x" * 100] * 100, database)